@@ -1,19 +1,21 @@
+import sys
 import time
-import serial
+from pathlib import Path
+
 import adafruit_fingerprint
 
-# Use the port that worked!
-uart = serial.Serial("/dev/ttyAMA0", baudrate=57600, timeout=1)
-finger = adafruit_fingerprint.Adafruit_Fingerprint(uart)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from cbord_cli.fingerprint_index import TemplateIndex
+from cbord_cli.fingerprint_link import FingerprintLink
+
+# Use the port that worked! The baud rate is auto-detected.
+finger = FingerprintLink("/dev/ttyAMA0").open()
+index = TemplateIndex(finger)
 
 def get_next_free_id():
-    """Checks the sensor's memory for the first available empty slot"""
-    # R503 usually has 127 slots (some have 300)
-    for slot in range(1, 128):
-        # We try to load a model; if it fails, the slot is empty
-        if finger.load_model(slot) != adafruit_fingerprint.OK:
-            return slot
-    return None
+    """Reads the sensor's template index in bulk and returns the first empty slot"""
+    return index.next_free_slot()
 
 def enroll_finger(location):
     """Enrolls a fingerprint at the given location index"""
@@ -53,7 +55,7 @@ def enroll_finger(location):
         return False
 
     print(f"Storing model at ID #{location}...", end="", flush=True)
-    if finger.store_model(location) == adafruit_fingerprint.OK:
+    if index.store(location):
         print("Stored!")
         return True
     else:
@@ -64,7 +66,7 @@ def enroll_finger(location):
 next_slot = get_next_free_id()
 
 if next_slot is not None:
-    print(f"Next available memory slot found: {next_slot}")
+    print(f"Next available memory slot found: {next_slot} ({index.count()}/{index.capacity()} used)")
     # 2. Run enrollment using that slot
     if enroll_finger(next_slot):
         print(f"Success! Fingerprint is saved in slot {next_slot}")
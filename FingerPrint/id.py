@@ -1,9 +1,14 @@
-import serial
+import sys
+from pathlib import Path
+
 import adafruit_fingerprint
 
-# Use the port that worked for you!
-uart = serial.Serial("/dev/ttyAMA0", baudrate=57600, timeout=1)
-finger = adafruit_fingerprint.Adafruit_Fingerprint(uart)
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from cbord_cli.fingerprint_link import FingerprintLink
+
+# Use the port that worked for you! The baud rate is auto-detected.
+finger = FingerprintLink("/dev/ttyAMA0").open()
 
 def get_fingerprint():
     """Get a finger print image, template it, and see if it matches!"""
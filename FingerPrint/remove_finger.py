@@ -1,11 +1,15 @@
-import serial
-import adafruit_fingerprint
 import sys
+from pathlib import Path
+
+import adafruit_fingerprint
+
+sys.path.append(str(Path(__file__).resolve().parent.parent))
+
+from cbord_cli.fingerprint_link import FingerprintLink
 
-# Use the port that worked!
+# Use the port that worked! The baud rate is auto-detected.
 id_to_delete = int(sys.argv[1])
-uart = serial.Serial("/dev/ttyAMA0", baudrate=57600, timeout=1)
-finger = adafruit_fingerprint.Adafruit_Fingerprint(uart)
+finger = FingerprintLink("/dev/ttyAMA0").open()
 
 def delete_fingerprint(location):
     """Delete a fingerprint model from the sensor's flash memory"""
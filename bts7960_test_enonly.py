@@ -2,6 +2,8 @@ from gpiozero import PWMOutputDevice
 from time import sleep
 import sys
 
+from cbord_cli.motion import MotionProfile, SystemClock, run_move
+
 # ==========================================
 # CONFIGURATION
 # ==========================================
@@ -10,9 +12,14 @@ LPWM_PIN = 18       # GPIO 18 (Physical Pin 12)
 
 SPEED = 0.95        # 95% Power (Your tested stable maximum)
 DURATION = 7        # Seconds for full travel
-RAMP_TIME = 0.05    # Delay between speed steps (seconds)
+RAMP_SECONDS = 1.0  # Soft start / soft stop duration (seconds)
+PROFILE = "s-curve" # "trapezoid" (linear ramp) or "s-curve"
 # ==========================================
 
+# Duty tables are computed once and played against monotonic deadlines.
+MOTION = MotionProfile(SPEED, RAMP_SECONDS, interval=0.02, profile=PROFILE)
+CLOCK = SystemClock()
+
 # Initialize Hardware
 # Frequency at 500Hz helps reduce electrical "ringing" noise
 rpwm = PWMOutputDevice(RPWM_PIN, frequency=500) 
@@ -26,20 +33,11 @@ def move_actuator(pwm_pin, direction_label):
     print(f"\n[ACTION] {direction_label} at {target_int}% speed...")
 
     try:
-        # 1. Ramp Up (Soft Start)
-        for i in range(0, target_int + 1, 5):
-            pwm_pin.value = i / 100
-            sleep(RAMP_TIME)
-        
-        # 2. Sustained Movement
+        # Ramp up (soft start), sustained movement, ramp down (soft stop)
         print(f"Holding for {DURATION}s...")
-        sleep(DURATION)
-        
-        # 3. Ramp Down (Soft Stop)
-        for i in range(target_int, -1, -5):
-            pwm_pin.value = i / 100
-            sleep(RAMP_TIME)
-            
+        report = run_move(pwm_pin, MOTION, DURATION, CLOCK)
+        print(f"[TIMING] {report.summary()}")
+
     except Exception as e:
         print(f"\n[ERROR] Movement interrupted: {e}")
     finally:
@@ -53,6 +51,7 @@ def main():
     print("========================================")
     print(f" Configured Speed: {int(SPEED*100)}%")
     print(f" Configured Time:  {DURATION}s")
+    print(f" Ramp Profile:     {PROFILE} over {RAMP_SECONDS}s")
     print("----------------------------------------")
     print(" Commands:")
     print("  [e] + Enter : EXTEND")
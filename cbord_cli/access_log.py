@@ -0,0 +1,288 @@
+from __future__ import annotations
+
+import argparse
+import atexit
+import gzip
+import json
+import os
+import re
+import threading
+import time
+from collections import deque
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Iterator
+
+from cbord_cli import metrics
+
+ACCESS_LOG_DIR = Path(os.getenv("CBORD_ACCESS_LOG_DIR", Path(__file__).parent / ".access_log"))
+ACTIVE_NAME = "current.jsonl"
+SEGMENT_BYTES = 256_000
+KEEP_SEGMENTS = 500
+FLUSH_INTERVAL = 2.0
+MAX_PENDING = 10_000
+
+# Closed segments are named after their first and last event (ms since the
+# epoch) so a time-range query can skip them without opening them.
+_SEGMENT_RE = re.compile(r"access-(\d+)-(\d+)\.jsonl\.gz$")
+
+
+class AccessLog:
+    """Append-only access log with an in-memory buffer and a writer thread.
+
+    ``log()`` only appends to a deque; the writer thread serializes and
+    appends batches to ``current.jsonl`` every ``flush_interval`` seconds and
+    gzips it into a closed segment once it reaches ``segment_bytes``.
+    """
+
+    def __init__(
+        self,
+        directory: Path = ACCESS_LOG_DIR,
+        segment_bytes: int = SEGMENT_BYTES,
+        keep: int = KEEP_SEGMENTS,
+        flush_interval: float = FLUSH_INTERVAL,
+    ) -> None:
+        self.directory = directory
+        self.segment_bytes = segment_bytes
+        self.keep = keep
+        self.flush_interval = flush_interval
+        self._pending: deque[dict[str, Any]] = deque()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._registered = False
+        self._failing = False
+        # First and last ts in current.jsonl, kept from the batches written
+        # so rotation never has to parse the file (its tail may be torn).
+        self._span: tuple[float, float] | None = None
+
+    def log(self, event: dict[str, Any]) -> None:
+        if len(self._pending) >= MAX_PENDING:
+            metrics.inc("cbord_access_log_dropped_total")
+            return
+        self._pending.append(event)
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self._start()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="access-log", daemon=True)
+            self._thread.start()
+            if not self._registered:
+                atexit.register(self.close)
+                self._registered = True
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+        self.flush()
+
+    def close(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            thread.join(timeout=5)
+
+    def flush(self) -> None:
+        with self._flush_lock:
+            batch = []
+            while self._pending:
+                batch.append(self._pending.popleft())
+            if not batch:
+                return
+            try:
+                with metrics.timer("cbord_access_log_flush_seconds"):
+                    self._write(batch)
+            except (OSError, ValueError) as exc:
+                self._span = None  # re-check the file's tail on the next write
+                metrics.inc("cbord_access_log_dropped_total", len(batch))
+                if not self._failing:
+                    print(f"Could not write access log ({exc}).")
+                self._failing = True
+                return
+            self._failing = False
+            metrics.inc("cbord_access_log_events_total", len(batch))
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        self.directory.mkdir(parents=True, exist_ok=True)
+        active = self.directory / ACTIVE_NAME
+        lines = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in batch)
+        first = self._span[0] if self._span is not None else _first_ts(active, batch[0]["ts"])
+        with active.open("a") as f:
+            # Our own writes end in a newline; a file we have not written to
+            # yet may end in a line torn by power loss or a failed write.
+            if self._span is None and f.tell() and not _ends_with_newline(active):
+                lines = "\n" + lines
+            f.write(lines)
+        self._span = (first, batch[-1]["ts"])
+        if active.stat().st_size >= self.segment_bytes:
+            self._rotate(active)
+
+    def _rotate(self, active: Path) -> None:
+        data = active.read_bytes()
+        first, last = self._span
+        segment = self.directory / f"access-{int(first * 1000)}-{int(last * 1000)}.jsonl.gz"
+        tmp = segment.with_suffix(".tmp")
+        tmp.write_bytes(gzip.compress(data))
+        os.replace(tmp, segment)
+        active.unlink()
+        self._span = None
+        for old in segments(self.directory)[: -self.keep]:
+            old[2].unlink(missing_ok=True)
+
+
+def _ends_with_newline(path: Path) -> bool:
+    with path.open("rb") as f:
+        f.seek(-1, os.SEEK_END)
+        return f.read(1) == b"\n"
+
+
+def _first_ts(active: Path, default: float) -> float:
+    """ts of the first readable event in a current.jsonl left by an earlier process."""
+    if not active.exists():
+        return default
+    with active.open() as f:
+        for line in f:
+            event = _parse(line)
+            if event is not None:
+                return min(event["ts"], default)
+    return default
+
+
+def _parse(line: str) -> dict | None:
+    """The event on ``line``, or None if the line is torn or not an event."""
+    try:
+        event = json.loads(line)
+    except ValueError:
+        return None
+    if not isinstance(event, dict) or not isinstance(event.get("ts"), (int, float)):
+        return None
+    return event
+
+
+log_writer = AccessLog()
+
+
+def log(event: dict[str, Any]) -> None:
+    log_writer.log(event)
+
+
+def run_event(config, context, outcome: str, errors: list[str], started: float, seconds: float) -> dict[str, Any]:
+    """One pipeline run as a log event; ``started`` is wall-clock time."""
+    return {
+        "ts": round(started, 3),
+        "outcome": outcome,
+        "identity": context.identity,
+        "seconds": round(seconds, 3),
+        "runner": config.runner,
+        "session": "session" in context.outputs,
+        "steps": [
+            {
+                "name": result.name,
+                "success": result.success,
+                "message": result.message,
+                "attempts": result.attempts,
+                "seconds": round(result.elapsed, 3),
+            }
+            for result in context.results.values()
+        ],
+        "errors": list(errors),
+    }
+
+
+def segments(directory: Path = ACCESS_LOG_DIR) -> list[tuple[float, float, Path]]:
+    """Closed segments as (first ts, last ts, path), oldest first."""
+    found = []
+    for path in directory.glob("access-*.jsonl.gz"):
+        match = _SEGMENT_RE.match(path.name)
+        if match:
+            found.append((int(match[1]) / 1000, int(match[2]) / 1000, path))
+    return sorted(found)
+
+
+def query(since: float | None = None, until: float | None = None, directory: Path = ACCESS_LOG_DIR) -> Iterator[dict]:
+    """Events with ``since <= ts <= until``, oldest first."""
+    files = [
+        path
+        for first, last, path in segments(directory)
+        if (since is None or last >= since) and (until is None or first <= until)
+    ]
+    active = directory / ACTIVE_NAME
+    if active.exists():
+        files.append(active)
+    for path in files:
+        opener = gzip.open if path.suffix == ".gz" else open
+        try:
+            with opener(path, "rt") as f:
+                for line in f:
+                    event = _parse(line)
+                    if event is None:
+                        continue  # torn by a power cut mid-write
+                    if since is not None and event["ts"] < since:
+                        continue
+                    if until is not None and event["ts"] > until:
+                        break  # events within a file are in time order
+                    yield event
+        except FileNotFoundError:
+            continue  # rotated or pruned while we were scanning
+
+
+def parse_time(value: str, now: float | None = None) -> float:
+    """``30m``, ``12h``, ``7d`` (ago) or an ISO date/time in local time."""
+    now = time.time() if now is None else now
+    units = {"s": 1, "m": 60, "h": 3600, "d": 86400}
+    if value[:-1].replace(".", "", 1).isdigit() and value[-1] in units:
+        return now - float(value[:-1]) * units[value[-1]]
+    return datetime.fromisoformat(value).timestamp()
+
+
+def _format(event: dict) -> str:
+    stamp = time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(event["ts"]))
+    steps = " ".join(
+        f"{step['name']}={'ok' if step['success'] else step['message']}({step['attempts']},{step['seconds']:.1f}s)"
+        for step in event["steps"]
+    )
+    session = " session" if event.get("session") else ""
+    return f"{stamp}  {event['outcome']:<7} {event['identity'] or '-':<12} {event['seconds']:>6.1f}s{session}  {steps}"
+
+
+def _cmd_query(args: argparse.Namespace) -> int:
+    try:
+        since = parse_time(args.since) if args.since else None
+        until = parse_time(args.until) if args.until else None
+    except ValueError as exc:
+        print(f"Invalid time: {exc}")
+        return 1
+    directory = Path(args.dir)
+    shown = 0
+    for event in query(since, until, directory):
+        if args.identity and event["identity"] != args.identity:
+            continue
+        if args.outcome and event["outcome"] != args.outcome:
+            continue
+        print(json.dumps(event) if args.json else _format(event))
+        shown += 1
+        if args.limit and shown >= args.limit:
+            break
+    if not shown and not args.json:
+        print("No matching access events.")
+    return 0
+
+
+def add_subcommand(subparsers) -> None:
+    parser = subparsers.add_parser("access-log", help="Query the access event log.")
+    actions = parser.add_subparsers(dest="access_log_action", required=True)
+    query_parser = actions.add_parser("query", help="List runs in a time range.")
+    query_parser.add_argument("--since", help="Start: 30m, 12h, 7d ago or an ISO date/time.")
+    query_parser.add_argument("--until", help="End, same formats as --since.")
+    query_parser.add_argument("--identity", help="Only runs that named this person.")
+    query_parser.add_argument("--outcome", choices=("granted", "denied", "error"))
+    query_parser.add_argument("--limit", type=int, default=0, help="Stop after N events.")
+    query_parser.add_argument("--json", action="store_true", help="Print raw JSON lines.")
+    query_parser.add_argument("--dir", default=str(ACCESS_LOG_DIR), help="Log directory.")
+    query_parser.set_defaults(handler=_cmd_query)
@@ -0,0 +1,336 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import os
+import queue
+import threading
+from dataclasses import dataclass, field
+
+from cbord_cli import sim_gpio
+from cbord_cli.motion import MotionProfile, MotionRun, SystemClock, TimingReport
+
+IDLE = "idle"
+EXTENDING = "extending"
+HOLDING = "holding"
+RETRACTING = "retracting"
+FAULT = "fault"
+
+
+def _load_pwm_output_device():
+    spec = importlib.util.find_spec("gpiozero")
+    if spec is None:
+        return None
+    gpiozero = importlib.import_module("gpiozero")
+    return getattr(gpiozero, "PWMOutputDevice", None)
+
+
+PWMOutputDevice = _load_pwm_output_device()
+
+
+@dataclass
+class MotorControllerSettings:
+    rpwm_pin: int = 18
+    lpwm_pin: int = 19
+    speed: float = 0.95
+    extend_seconds: float = 9
+    hold_seconds: float = 10
+    retract_seconds: float = 9
+    ramp_step: int = 5
+    ramp_delay: float = 0.05
+    pwm_frequency: int = 500
+    ramp_seconds: float | None = None
+    profile: str = "trapezoid"
+    update_interval: float = 0.02
+
+    def motion_profile(self) -> MotionProfile:
+        ramp_seconds = self.ramp_seconds
+        if ramp_seconds is None:
+            # Same ramp length the old step/delay loop produced.
+            ramp_seconds = (int(self.speed * 100) // max(1, self.ramp_step) + 1) * self.ramp_delay
+        return MotionProfile(self.speed, ramp_seconds, self.update_interval, self.profile)
+
+    @classmethod
+    def from_env(cls) -> "MotorControllerSettings":
+        def _get_float(name: str, default: float) -> float:
+            raw = os.getenv(name)
+            return float(raw) if raw is not None else default
+
+        def _get_int(name: str, default: int) -> int:
+            raw = os.getenv(name)
+            return int(raw) if raw is not None else default
+
+        ramp_seconds = os.getenv("MOTOR_RAMP_SECONDS")
+
+        return cls(
+            rpwm_pin=_get_int("MOTOR_RPWM_PIN", cls.rpwm_pin),
+            lpwm_pin=_get_int("MOTOR_LPWM_PIN", cls.lpwm_pin),
+            speed=_get_float("MOTOR_SPEED", cls.speed),
+            extend_seconds=_get_float("MOTOR_EXTEND_SECONDS", cls.extend_seconds),
+            hold_seconds=_get_float("MOTOR_HOLD_SECONDS", cls.hold_seconds),
+            retract_seconds=_get_float("MOTOR_RETRACT_SECONDS", cls.retract_seconds),
+            ramp_step=_get_int("MOTOR_RAMP_STEP", cls.ramp_step),
+            ramp_delay=_get_float("MOTOR_RAMP_DELAY", cls.ramp_delay),
+            pwm_frequency=_get_int("MOTOR_PWM_FREQUENCY", cls.pwm_frequency),
+            ramp_seconds=float(ramp_seconds) if ramp_seconds is not None else None,
+            profile=os.getenv("MOTOR_PROFILE", cls.profile),
+            update_interval=_get_float("MOTOR_UPDATE_INTERVAL", cls.update_interval),
+        )
+
+
+@dataclass
+class ActuatorStatus:
+    state: str
+    extension: float
+    cycles: int
+    error: str | None
+    timing: dict[str, str] = field(default_factory=dict)
+
+
+@dataclass
+class _Command:
+    kind: str
+    extended: threading.Event = field(default_factory=threading.Event)
+    ok: bool = False
+
+
+class _Abort(Exception):
+    def __init__(self, command: _Command) -> None:
+        super().__init__(command.kind)
+        self.command = command
+
+
+class ActuatorController:
+    """Runs the actuator sequence on its own thread.
+
+    Commands: ``open`` (extend, hold, retract; re-arms the hold if the door is
+    already open), ``extend_hold`` (extend and stay out until ``cancel``),
+    ``cancel`` (abort and retract normally) and ``emergency_retract`` (cut
+    power at once and retract without ramps). ``extension`` is an estimate
+    from travel time, 0.0 retracted to 1.0 fully extended.
+    """
+
+    def __init__(self, settings: MotorControllerSettings, device_factory=None, clock=None) -> None:
+        self.settings = settings
+        self.profile = settings.motion_profile()
+        self._device_factory = device_factory or PWMOutputDevice
+        self.clock = clock or SystemClock()
+        self._commands: queue.Queue[_Command | None] = queue.Queue()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._state = IDLE
+        self._extension = 0.0
+        self._cycles = 0
+        self._error: str | None = None
+        self._timing: dict[str, TimingReport] = {}
+        self._rpwm = None
+        self._lpwm = None
+        self._deferred: list[_Command] = []
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        if self._thread is not None:
+            return
+        self._rpwm = self._device_factory(self.settings.rpwm_pin, frequency=self.settings.pwm_frequency)
+        self._lpwm = self._device_factory(self.settings.lpwm_pin, frequency=self.settings.pwm_frequency)
+        self._thread = threading.Thread(target=self._run, name="actuator", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float | None = None) -> None:
+        if self._thread is None:
+            return
+        self._commands.put(None)
+        self._wakeup.set()
+        self._thread.join(timeout)
+        self._thread = None
+        self._all_off()
+
+    def status(self) -> ActuatorStatus:
+        with self._lock:
+            timing = {phase: report.summary() for phase, report in self._timing.items()}
+            return ActuatorStatus(self._state, round(self._extension, 3), self._cycles, self._error, timing)
+
+    def _submit(self, kind: str) -> _Command:
+        command = _Command(kind)
+        self._commands.put(command)
+        self._wakeup.set()
+        return command
+
+    def open(self, wait: bool = True, timeout: float | None = None) -> bool:
+        command = self._submit("open")
+        if not wait:
+            return True
+        return command.extended.wait(timeout) and command.ok
+
+    def extend_hold(self, wait: bool = True, timeout: float | None = None) -> bool:
+        command = self._submit("extend_hold")
+        if not wait:
+            return True
+        return command.extended.wait(timeout) and command.ok
+
+    def cancel(self) -> None:
+        self._submit("cancel")
+
+    def emergency_retract(self) -> None:
+        self._submit("emergency")
+
+    def _set_state(self, state: str) -> None:
+        with self._lock:
+            self._state = state
+
+    def _all_off(self) -> None:
+        for pin in (self._rpwm, self._lpwm):
+            if pin is not None:
+                pin.off()
+
+    def _poll(self) -> _Command | None:
+        self._wakeup.clear()
+        try:
+            command = self._commands.get_nowait()
+        except queue.Empty:
+            return None
+        if command is None:
+            self._commands.put(None)
+            raise _Abort(_Command("shutdown"))
+        return command
+
+    def _wait(self, seconds: float | None, interruptible: tuple[str, ...]) -> _Command | None:
+        """Sleeps until ``seconds`` pass (forever if None) or a command interrupts.
+
+        Emergency retracts always interrupt; other commands that are not
+        ``interruptible`` are deferred until the current sequence finishes.
+        """
+        deadline = None if seconds is None else self.clock.now() + seconds
+        while True:
+            command = self._poll()
+            if command is not None:
+                if command.kind == "emergency" or command.kind in interruptible:
+                    return command
+                self._deferred.append(command)
+                continue
+            remaining = None if deadline is None else deadline - self.clock.now()
+            if remaining is not None and remaining <= 0:
+                return None
+            self.clock.wait(self._wakeup, remaining)
+
+    def _move(
+        self, phase: str, pin, seconds: float, interruptible: tuple[str, ...]
+    ) -> tuple[_Command | None, float]:
+        """Drives ``pin`` for ``seconds``; returns the interrupt and travel fraction."""
+        run = MotionRun(pin, self.profile, self.clock)
+        run.ramp_up()
+        cruise_start = self.clock.now()
+        deadline = run.cruise_until(seconds)
+        interrupt = self._wait(deadline - self.clock.now(), interruptible)
+        fraction = min(1.0, (self.clock.now() - cruise_start) / seconds) if seconds > 0 else 1.0
+        if interrupt is not None and interrupt.kind == "emergency":
+            pin.off()
+        else:
+            run.ramp_down(now=interrupt is not None)
+
+        report = run.report()
+        with self._lock:
+            self._timing[phase] = report
+        print(f"[actuator] {phase}: {report.summary()}")
+        return interrupt, fraction
+
+    def _retract(self, emergency: bool = False) -> None:
+        self._set_state(RETRACTING)
+        seconds = self.settings.retract_seconds * self._extension
+        if seconds > 0 and emergency:
+            self._rpwm.off()
+            self._lpwm.value = 1.0
+            self.clock.sleep(seconds)
+            self._lpwm.off()
+        elif seconds > 0:
+            start_extension = self._extension
+            interrupt, fraction = self._move("retract", self._lpwm, seconds, ())
+            if interrupt is not None:
+                with self._lock:
+                    self._extension = start_extension * (1.0 - fraction)
+                self._retract(emergency=True)
+                return
+        with self._lock:
+            self._extension = 0.0
+        self._set_state(IDLE)
+
+    def _run_sequence(self, command: _Command) -> None:
+        s = self.settings
+        hold_forever = command.kind == "extend_hold"
+
+        if self._extension < 1.0:
+            self._set_state(EXTENDING)
+            start_extension = self._extension
+            interrupt, fraction = self._move(
+                "extend", self._rpwm, s.extend_seconds * (1.0 - start_extension), ("cancel",)
+            )
+            with self._lock:
+                self._extension = start_extension + (1.0 - start_extension) * fraction
+            if interrupt is not None:
+                command.extended.set()
+                self._retract(emergency=interrupt.kind == "emergency")
+                return
+
+        command.ok = True
+        command.extended.set()
+        with self._lock:
+            self._cycles += 1
+
+        self._set_state(HOLDING)
+        while True:
+            interrupt = self._wait(
+                None if hold_forever else s.hold_seconds,
+                ("cancel", "open", "extend_hold"),
+            )
+            if interrupt is None or interrupt.kind in ("cancel", "emergency"):
+                break
+            # Another open while the door is out: confirm it and re-arm the hold.
+            interrupt.ok = True
+            interrupt.extended.set()
+            hold_forever = interrupt.kind == "extend_hold"
+
+        self._retract(emergency=interrupt is not None and interrupt.kind == "emergency")
+
+    def _run(self) -> None:
+        while True:
+            if self._deferred:
+                command = self._deferred.pop(0)
+            else:
+                command = self._commands.get()
+                if command is None:
+                    return
+            try:
+                if command.kind in ("open", "extend_hold"):
+                    self._run_sequence(command)
+                elif command.kind in ("cancel", "emergency") and self._extension > 0:
+                    self._retract(emergency=command.kind == "emergency")
+            except _Abort:
+                self._all_off()
+                command.extended.set()
+                return
+            except Exception as exc:
+                self._all_off()
+                with self._lock:
+                    self._state = FAULT
+                    self._error = str(exc)
+                command.extended.set()
+
+
+_controller: ActuatorController | None = None
+_controller_lock = threading.Lock()
+
+
+def get_controller() -> ActuatorController | None:
+    global _controller
+    with _controller_lock:
+        if _controller is None:
+            if sim_gpio.enabled():
+                _controller, _ = sim_gpio.build_controller(
+                    MotorControllerSettings.from_env(), sim_gpio.speedup_from_env()
+                )
+            elif PWMOutputDevice is None:
+                return None
+            else:
+                _controller = ActuatorController(MotorControllerSettings.from_env())
+            _controller.start()
+        return _controller
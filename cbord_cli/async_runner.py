@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import List
+
+from cbord_cli import metrics, sessions
+from cbord_cli.config import AppConfig, StepConfig
+from cbord_cli.runner import (
+    build_stages,
+    build_steps,
+    deny_access,
+    finish_group,
+    grant_access,
+    group_outcome,
+    run_step,
+)
+from cbord_cli.steps.base import PipelineContext, StepResult, StepScope
+
+# How long a cancelled step gets to release its camera, subprocess or threads.
+TEARDOWN_GRACE = 5.0
+
+# Steps whose run outlived TEARDOWN_GRACE, by id, with the call still inside
+# them. A step instance is not safe to enter twice, so later runs of it fail
+# until that call returns.
+_orphans: dict[int, tuple[object, Future]] = {}
+_orphans_lock = threading.Lock()
+
+
+def _step_deadline(step_config: StepConfig, pipeline_deadline: float | None, now: float) -> float | None:
+    deadlines = [pipeline_deadline]
+    if step_config.timeout is not None:
+        deadlines.append(now + step_config.timeout)
+    deadlines = [d for d in deadlines if d is not None]
+    return min(deadlines) if deadlines else None
+
+
+def _orphan(step, work: Future) -> None:
+    with _orphans_lock:
+        _orphans[id(step)] = (step, work)
+
+    def release(_work: Future) -> None:
+        with _orphans_lock:
+            if _orphans.get(id(step), (None, None))[1] is work:
+                del _orphans[id(step)]
+
+    work.add_done_callback(release)
+
+
+def _busy(step) -> bool:
+    with _orphans_lock:
+        return id(step) in _orphans
+
+
+async def _teardown(step, work: Future, future: asyncio.Future, name: str) -> StepResult | None:
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), TEARDOWN_GRACE)
+    except asyncio.TimeoutError:
+        print(f"  [{name}] Did not stop within {TEARDOWN_GRACE:.0f}s of cancellation.")
+        _orphan(step, work)
+        return None
+
+
+async def run_step_async(
+    step,
+    step_config: StepConfig,
+    context: PipelineContext,
+    retries: int,
+    deadline: float | None,
+    executor: ThreadPoolExecutor,
+) -> StepResult:
+    """Awaitable run of a blocking step, with all its retries, in ``executor``.
+
+    Passing ``deadline`` (loop time) or cancelling the task cancels the
+    step's scope and waits for the step to clean up before returning.
+    """
+    loop = asyncio.get_running_loop()
+    scope = StepScope(context)
+    start = time.monotonic()
+    if _busy(step):
+        print(f"  [{step_config.name}] Still inside a cancelled earlier run; not starting it again.")
+        metrics.inc("cbord_step_busy_total", step=step_config.name)
+        return StepResult(step_config.name, False, "still busy from a cancelled run", 0, 0.0)
+    work = executor.submit(run_step, step, step_config, scope, retries)
+    future = asyncio.wrap_future(work, loop=loop)
+    timeout = None if deadline is None else max(0.0, deadline - loop.time())
+    try:
+        return await asyncio.wait_for(asyncio.shield(future), timeout)
+    except asyncio.TimeoutError:
+        scope.cancel.set()
+        result = await _teardown(step, work, future, step_config.name)
+        print(f"  [{step_config.name}] Deadline reached.")
+        metrics.inc("cbord_step_timeouts_total", step=step_config.name)
+        attempts = result.attempts if result is not None else 0
+        return StepResult(step_config.name, False, "timed out", attempts, time.monotonic() - start)
+    except asyncio.CancelledError:
+        scope.cancel.set()
+        await _teardown(step, work, future, step_config.name)
+        raise
+
+
+async def _cancel_all(tasks) -> None:
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+
+
+async def _run_group(
+    group: str,
+    mode: str,
+    members: List[tuple[object, StepConfig]],
+    context: PipelineContext,
+    retries: int,
+    deadline: float | None,
+    executor: ThreadPoolExecutor,
+) -> bool:
+    names = [step_config.name for _, step_config in members]
+    print(f"- Running group '{group}' ({mode} of: {', '.join(names)})")
+
+    loop = asyncio.get_running_loop()
+    start = time.monotonic()
+    tasks = {}
+    for step, step_config in members:
+        step_deadline = _step_deadline(step_config, deadline, loop.time())
+        task = asyncio.ensure_future(run_step_async(step, step_config, context, retries, step_deadline, executor))
+        tasks[task] = step_config.name
+    decided: bool | None = None
+    pending = set(tasks)
+    try:
+        while pending and decided is None:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                result = task.result()
+                context.results[result.name] = result
+                if decided is None:
+                    decided = group_outcome(mode, result)
+    finally:
+        # Outcome known (or we were cancelled): stop the siblings still running.
+        await _cancel_all(pending)
+    for task in pending:
+        name = tasks[task]
+        context.results[name] = StepResult(name, False, "cancelled", 0, time.monotonic() - start)
+    return finish_group(names, mode, decided, context)
+
+
+async def run_pipeline_async(
+    config: AppConfig, steps: dict[str, object] | None = None, context: PipelineContext | None = None
+) -> List[str]:
+    steps = steps if steps is not None else build_steps()
+    context = context if context is not None else PipelineContext()
+    session = sessions.SessionCheck(config.session_ttl)
+    errors: List[str] = []
+    loop = asyncio.get_running_loop()
+    deadline = None if config.timeout is None else loop.time() + config.timeout
+
+    print("\nStarting authentication pipeline...")
+    stages = build_stages(config)
+    unknown = [step_config.name for stage in stages for step_config in stage if step_config.name not in steps]
+    if unknown:
+        errors.append(f"Unknown step '{unknown[0]}'")
+        print(errors[-1])
+        return errors
+    workers = max((len(stage) for stage in stages), default=1)
+    executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="step")
+    try:
+        for stage in stages:
+            if session.covers(stage, steps):
+                continue
+
+            if deadline is not None and loop.time() >= deadline:
+                deny_access(errors, f"Pipeline deadline of {config.timeout}s reached.")
+                return errors
+
+            members = [(steps[step_config.name], step_config) for step_config in stage]
+            group = stage[0].group
+            if group is not None and len(stage) > 1:
+                mode = config.group_mode(group)
+                success = await _run_group(group, mode, members, context, config.retries, deadline, executor)
+                failure = f"Group '{group}' ({mode}) failed."
+            else:
+                step, step_config = members[0]
+                print(f"- Running {step_config.name}")
+                step_deadline = _step_deadline(step_config, deadline, loop.time())
+                result = await run_step_async(step, step_config, context, config.retries, step_deadline, executor)
+                context.results[result.name] = result
+                success = result.success
+                failure = f"Step '{step_config.name}' {result.message}."
+
+            if not success:
+                deny_access(errors, failure)
+                return errors
+            session.after_stage(context)
+
+        grant_access(context)
+        session.finish(context)
+        return errors
+    finally:
+        # Steps have been torn down above; one that ignored its cancel event
+        # is left to finish on its own rather than blocking the next visitor,
+        # and runs of it fail fast until it does.
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def run_pipeline(
+    config: AppConfig, steps: dict[str, object] | None = None, context: PipelineContext | None = None
+) -> List[str]:
+    return asyncio.run(run_pipeline_async(config, steps, context))
@@ -0,0 +1,249 @@
+from __future__ import annotations
+
+import importlib
+import importlib.util
+import os
+import shutil
+import subprocess
+import threading
+import wave
+from collections import deque
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+
+SINK_RATE = int(os.getenv("CBORD_AUDIO_RATE", "22050"))
+BLOCK_FRAMES = 1024
+
+
+def _resample(x: np.ndarray, in_rate: int, out_rate: int) -> np.ndarray:
+    if in_rate == out_rate or x.size == 0:
+        return x
+    n_out = int(round(x.size * out_rate / in_rate))
+    positions = np.linspace(0.0, x.size - 1, num=n_out)
+    return np.interp(positions, np.arange(x.size), x.astype(np.float32)).astype(np.int16)
+
+
+def _to_mono_int16(pcm: bytes | np.ndarray, channels: int = 1) -> np.ndarray:
+    x = np.frombuffer(pcm, dtype=np.int16) if isinstance(pcm, (bytes, bytearray)) else np.asarray(pcm)
+    if x.dtype != np.int16:
+        x = (np.clip(x.astype(np.float32), -1.0, 1.0) * 32767.0).astype(np.int16)
+    if channels > 1:
+        x = x.reshape(-1, channels).mean(axis=1).astype(np.int16)
+    return x
+
+
+@lru_cache(maxsize=64)
+def _load_wav(path: Path, mtime_ns: int, out_rate: int) -> np.ndarray:
+    # Decoded and resampled once per file version; replays reuse the array.
+    with wave.open(str(path), "rb") as wf:
+        if wf.getsampwidth() != 2:
+            raise ValueError(f"{path}: only 16-bit PCM WAV files are supported.")
+        pcm = wf.readframes(wf.getnframes())
+        samples = _to_mono_int16(pcm, wf.getnchannels())
+        return _resample(samples, wf.getframerate(), out_rate)
+
+
+class Playback:
+    """One sound in the sink: a fixed buffer or a stream still being fed."""
+
+    def __init__(self, sample_rate: int, sink_rate: int) -> None:
+        self.sample_rate = sample_rate
+        self._sink_rate = sink_rate
+        self._pending: deque[np.ndarray] = deque()
+        self._current = np.empty(0, dtype=np.int16)
+        self._pos = 0
+        self._input_closed = False
+        self._lock = threading.Lock()
+        self.done = threading.Event()
+
+    def feed(self, pcm: bytes | np.ndarray) -> None:
+        samples = _resample(_to_mono_int16(pcm), self.sample_rate, self._sink_rate)
+        with self._lock:
+            self._pending.append(samples)
+
+    def close(self) -> None:
+        with self._lock:
+            self._input_closed = True
+
+    def stop(self) -> None:
+        with self._lock:
+            self._pending.clear()
+            self._current = np.empty(0, dtype=np.int16)
+            self._pos = 0
+            self._input_closed = True
+        self.done.set()
+
+    def wait(self, stop: threading.Event | None = None, timeout: float | None = None) -> bool:
+        if stop is None:
+            return self.done.wait(timeout)
+        waited = 0.0
+        while not self.done.wait(0.02):
+            waited += 0.02
+            if stop.is_set() or (timeout is not None and waited >= timeout):
+                self.stop()
+                return False
+        return True
+
+    def _read(self, frames: int) -> tuple[np.ndarray, bool]:
+        """Returns up to ``frames`` samples and whether the sound is finished."""
+        parts = []
+        with self._lock:
+            while frames > 0:
+                if self._pos >= self._current.size:
+                    if not self._pending:
+                        break
+                    self._current = self._pending.popleft()
+                    self._pos = 0
+                    continue
+                take = self._current[self._pos : self._pos + frames]
+                self._pos += take.size
+                frames -= take.size
+                parts.append(take)
+            finished = self._input_closed and not self._pending and self._pos >= self._current.size
+        samples = np.concatenate(parts) if parts else np.empty(0, dtype=np.int16)
+        return samples, finished
+
+
+class AudioSink:
+    """A single output stream kept open for the life of the process.
+
+    Sounds are queued back to back by default; ``mix=True`` overlays a sound
+    on whatever is playing. Output goes through ``sounddevice`` when it is
+    installed, otherwise through one long-running ``aplay`` reading raw PCM
+    from a pipe.
+    """
+
+    def __init__(self, sample_rate: int = SINK_RATE, blocksize: int = BLOCK_FRAMES) -> None:
+        self.sample_rate = sample_rate
+        self.blocksize = blocksize
+        self._queue: deque[Playback] = deque()
+        self._mixed: list[Playback] = []
+        self._lock = threading.Lock()
+        self._stream = None
+        self._proc: subprocess.Popen | None = None
+        self._writer: threading.Thread | None = None
+        self._closed = threading.Event()
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("sounddevice") is not None or shutil.which("aplay") is not None
+
+    def start(self) -> None:
+        if importlib.util.find_spec("sounddevice") is not None:
+            sounddevice = importlib.import_module("sounddevice")
+            self._stream = sounddevice.OutputStream(
+                samplerate=self.sample_rate,
+                channels=1,
+                dtype="int16",
+                blocksize=self.blocksize,
+                callback=self._callback,
+            )
+            self._stream.start()
+            return
+
+        self._proc = subprocess.Popen(
+            ["aplay", "-q", "-t", "raw", "-f", "S16_LE", "-c", "1", "-r", str(self.sample_rate)],
+            stdin=subprocess.PIPE,
+        )
+        self._writer = threading.Thread(target=self._pipe_writer, name="audio-sink", daemon=True)
+        self._writer.start()
+
+    def close(self) -> None:
+        self._closed.set()
+        with self._lock:
+            for playback in [*self._queue, *self._mixed]:
+                playback.stop()
+            self._queue.clear()
+            self._mixed.clear()
+        if self._stream is not None:
+            self._stream.stop()
+            self._stream.close()
+        if self._proc is not None:
+            try:
+                self._proc.stdin.close()
+                self._proc.wait(timeout=2)
+            except Exception:
+                self._proc.kill()
+
+    def _submit(self, playback: Playback, mix: bool) -> Playback:
+        with self._lock:
+            (self._mixed.append if mix else self._queue.append)(playback)
+        return playback
+
+    def open_stream(self, sample_rate: int, mix: bool = False) -> Playback:
+        return self._submit(Playback(sample_rate, self.sample_rate), mix)
+
+    def play(self, pcm: bytes | np.ndarray, sample_rate: int, mix: bool = False) -> Playback:
+        playback = Playback(sample_rate, self.sample_rate)
+        playback.feed(pcm)
+        playback.close()
+        return self._submit(playback, mix)
+
+    def play_wav(self, path: Path, mix: bool = False) -> Playback:
+        samples = _load_wav(Path(path), Path(path).stat().st_mtime_ns, self.sample_rate)
+        return self.play(samples, self.sample_rate, mix)
+
+    def render(self, frames: int) -> np.ndarray:
+        out = np.zeros(frames, dtype=np.int32)
+        with self._lock:
+            filled = 0
+            while filled < frames and self._queue:
+                head = self._queue[0]
+                part, finished = head._read(frames - filled)
+                out[filled : filled + part.size] += part
+                filled += part.size
+                if finished or head.done.is_set():
+                    head.done.set()
+                    self._queue.popleft()
+                elif part.size == 0:
+                    break  # streaming source has not produced more audio yet
+
+            for playback in list(self._mixed):
+                part, finished = playback._read(frames)
+                out[: part.size] += part
+                if finished or playback.done.is_set():
+                    playback.done.set()
+                    self._mixed.remove(playback)
+        return np.clip(out, -32768, 32767).astype(np.int16)
+
+    def _callback(self, outdata, frames, _time, _status) -> None:
+        outdata[:, 0] = self.render(frames)
+
+    def _pipe_writer(self) -> None:
+        assert self._proc is not None and self._proc.stdin is not None
+        try:
+            while not self._closed.is_set():
+                # Blocks once aplay's buffer is full, which paces the mixer.
+                self._proc.stdin.write(self.render(self.blocksize).tobytes())
+        except (BrokenPipeError, ValueError):
+            pass
+
+
+_sink: AudioSink | None = None
+_sink_failed = False
+_sink_lock = threading.Lock()
+
+
+def get_sink() -> AudioSink | None:
+    global _sink, _sink_failed
+    with _sink_lock:
+        if _sink is None and not _sink_failed and AudioSink.available():
+            sink = AudioSink()
+            try:
+                sink.start()
+            except Exception as exc:
+                print(f"Audio output unavailable ({exc}).")
+                _sink_failed = True
+                return None
+            _sink = sink
+        return _sink
+
+
+def close_sink() -> None:
+    global _sink
+    with _sink_lock:
+        sink, _sink = _sink, None
+    if sink is not None:
+        sink.close()
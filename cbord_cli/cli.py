@@ -1,13 +1,16 @@
 from __future__ import annotations
 
+import argparse
 import sys
 from pathlib import Path
 
 if __package__ in {None, ""}:
     sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-from cbord_cli.config import AppConfig, load_config, save_config
-from cbord_cli.runner import run_continuous, run_pipeline
+from cbord_cli import access_log, daemon, fingerprint_admin, knock, metrics, profiling, sim_gpio, tracing, tts
+from cbord_cli.config import CONFIG_PATH, AppConfig, config_from_dict, config_to_dict, load_config, save_config
+from cbord_cli.plan import PipelinePlan, PlanError, compile_plan
+from cbord_cli.runner import close_steps, run_continuous, run_pipeline
 
 MENU = """
 CBORD CLI
@@ -22,13 +25,46 @@ CBORD CLI
 8) Exit without saving
 """
 
+DAEMON_MENU = """
+CBORD CLI (daemon at {socket})
+---------
+1) View pipeline and daemon status
+2) Toggle step
+3) Reorder steps
+4) Set retries
+5) Run pipeline once
+6) Pause/resume continuous runs
+7) Save & exit
+8) Exit (changes stay live in the daemon until it restarts)
+"""
+
 
 def _print_pipeline(config: AppConfig) -> None:
     print("\nCurrent pipeline:")
     for idx, step in enumerate(config.steps, start=1):
         status = "enabled" if step.enabled else "disabled"
-        print(f"  {idx}. {step.name} ({status})")
+        group = f" [group {step.group}: {config.group_mode(step.group)}]" if step.group else ""
+        worker = " [worker process]" if step.worker else ""
+        print(f"  {idx}. {step.name} ({status}){group}{worker}")
     print(f"Retries per step: {config.retries}")
+    if config.session_ttl:
+        print(f"Sessions: one identifying factor is enough for {config.session_ttl:g}s after a full pass")
+    if config.triggers.sources:
+        triggers = config.triggers
+        print(
+            f"Continuous runs triggered by: {', '.join(triggers.sources)} "
+            f"(debounce {triggers.debounce:g}s, cooldown {triggers.cooldown:g}s)"
+        )
+
+
+def _compile(config: AppConfig) -> PipelinePlan | None:
+    try:
+        return compile_plan(config)
+    except PlanError as exc:
+        print("The pipeline config is not valid:")
+        for problem in exc.problems:
+            print(f"  - {problem}")
+        return None
 
 
 def _toggle_step(config: AppConfig) -> None:
@@ -77,7 +113,92 @@ def _set_retries(config: AppConfig) -> None:
     print(f"Retries set to {config.retries}.")
 
 
-def main() -> None:
+def _daemon_menu(client: daemon.DaemonClient) -> None:
+    """The same menu as a thin client: edits and runs happen in the daemon."""
+
+    def fetch() -> AppConfig:
+        return config_from_dict(client.call("config")["config"])
+
+    def push(config: AppConfig) -> None:
+        client.call("set_config", config=config_to_dict(config))
+
+    while True:
+        print(DAEMON_MENU.format(socket=client.path))
+        choice = input("Choose an option: ").strip()
+        try:
+            if choice == "1":
+                _print_pipeline(fetch())
+                daemon.print_status(client.call("status"))
+            elif choice in ("2", "3", "4"):
+                config = fetch()
+                {"2": _toggle_step, "3": _reorder_steps, "4": _set_retries}[choice](config)
+                push(config)
+            elif choice == "5":
+                print("Running pipeline in the daemon...")
+                last = client.call("trigger", wait=True, wait_forever=True).get("last_run")
+                if last:
+                    outcome = "granted" if last["granted"] else "denied: " + "; ".join(last["errors"])
+                    print(f"Access {outcome} ({last['seconds']:.1f}s).")
+            elif choice == "6":
+                paused = client.call("status")["paused"]
+                status = client.call("resume" if paused else "pause")
+                print(f"Continuous runs {'resumed' if paused else 'paused'}.")
+                daemon.print_status(status)
+            elif choice == "7":
+                print(f"Configuration saved to {client.call('save')['saved']}. Goodbye.")
+                break
+            elif choice == "8":
+                print("Exiting; the daemon keeps running.")
+                break
+            else:
+                print("Invalid option.")
+        except (OSError, daemon.DaemonError) as exc:
+            print(f"Daemon request failed: {exc}")
+
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Door authentication CLI. Run without a command for the interactive menu."
+    )
+    parser.add_argument(
+        "--trace", action="store_true", help="Write a Chrome trace JSON for each pipeline run."
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Profile each pipeline run (cProfile per step plus an all-thread sampler).",
+    )
+    parser.add_argument(
+        "--profile-top", type=int, default=15, metavar="N", help="Functions listed in the profile summary."
+    )
+    parser.add_argument(
+        "--local", action="store_true", help="Use the local menu even if a daemon is running."
+    )
+    subparsers = parser.add_subparsers(dest="command")
+    daemon.add_subcommand(subparsers)
+    fingerprint_admin.add_subcommand(subparsers)
+    tts.add_subcommand(subparsers)
+    sim_gpio.add_subcommand(subparsers)
+    knock.add_subcommand(subparsers)
+    metrics.add_subcommand(subparsers)
+    access_log.add_subcommand(subparsers)
+    return parser
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = _build_parser().parse_args(argv)
+    if args.trace:
+        tracing.enable()
+    if args.profile:
+        profiling.enable(top=args.profile_top)
+    if args.command is not None:
+        raise SystemExit(args.handler(args))
+
+    client = daemon.DaemonClient()
+    if not args.local and client.available():
+        _daemon_menu(client)
+        return
+
     config = load_config()
 
     while True:
@@ -94,10 +215,20 @@ def main() -> None:
             _set_retries(config)
         elif choice == "5":
             _print_pipeline(config)
-            run_pipeline(config)
+            plan = _compile(config)
+            if plan is not None:
+                try:
+                    run_pipeline(plan.config, plan.steps)
+                finally:
+                    # Releases the camera and UART, and stops any worker processes.
+                    close_steps(plan.steps)
         elif choice == "6":
             _print_pipeline(config)
-            run_continuous(config)
+            plan = _compile(config)
+            if plan is not None:
+                close_steps(plan.steps)  # only compiled to validate; continuous mode builds its own
+                # Edits to the saved config file apply between runs.
+                run_continuous(config, watch=CONFIG_PATH)
         elif choice == "7":
             save_config(config)
             print("Configuration saved. Goodbye.")
@@ -1,37 +1,127 @@
 from __future__ import annotations
 
 import json
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass, field
 from pathlib import Path
 from typing import Any
 
 CONFIG_PATH = Path(__file__).parent / "config" / "default.json"
+GROUP_MODES = ("all", "any")
+RUNNERS = ("threads", "async")
+TRIGGER_SOURCES = ("wake_word", "finger", "motion", "knock")
 
 
 @dataclass
 class StepConfig:
     name: str
     enabled: bool
+    group: str | None = None
+    timeout: float | None = None
+    # Overrides the top-level retry count for this step.
+    retries: int | None = None
+    # Step settings, e.g. {"tolerance": 0.5, "camera_size": [320, 240]};
+    # checked against the step's fields when the plan is compiled.
+    params: dict[str, Any] = field(default_factory=dict)
+    # Run the step in its own long-lived process, pinned to ``cpus`` if set.
+    worker: bool = False
+    cpus: list[int] | None = None
+
+
+@dataclass
+class TriggerConfig:
+    # Events that start a continuous-mode run; none means run back to back.
+    sources: list[str] = field(default_factory=list)
+    # Repeats from one source within this many seconds are ignored.
+    debounce: float = 2.0
+    # Triggers are ignored this long after a run ends.
+    cooldown: float = 5.0
+    # Touch output of the fingerprint sensor; without it the sensor is polled.
+    finger_pin: int | None = None
 
 
 @dataclass
 class AppConfig:
     retries: int
     steps: list[StepConfig]
+    # Group name -> "all" (every member must pass) or "any" (one is enough).
+    groups: dict[str, str] = field(default_factory=dict)
+    runner: str = "threads"
+    # Overall budget for one visitor, in seconds (async runner only).
+    timeout: float | None = None
+    # Seconds after a full authentication during which the first factor that
+    # names the same person is enough; unset or 0 disables sessions.
+    session_ttl: float | None = None
+    triggers: TriggerConfig = field(default_factory=TriggerConfig)
+
+    def group_mode(self, group: str) -> str:
+        return self.groups.get(group, "all")
 
 
 def load_config(path: Path = CONFIG_PATH) -> AppConfig:
-    data = json.loads(path.read_text())
+    return config_from_dict(json.loads(path.read_text()))
+
+
+def config_from_dict(data: dict[str, Any]) -> AppConfig:
     steps = [StepConfig(**step) for step in data.get("steps", [])]
-    return AppConfig(retries=int(data.get("retries", 5)), steps=steps)
+    groups = {str(name): str(mode) for name, mode in data.get("groups", {}).items()}
+    for name, mode in groups.items():
+        if mode not in GROUP_MODES:
+            raise ValueError(f"Group '{name}' has unknown mode '{mode}'; use one of {GROUP_MODES}.")
+    runner = str(data.get("runner", "threads"))
+    if runner not in RUNNERS:
+        raise ValueError(f"Unknown runner '{runner}'; use one of {RUNNERS}.")
+    timeout = data.get("timeout")
+    session_ttl = data.get("session_ttl")
+    triggers = TriggerConfig(**data.get("triggers", {}))
+    for source in triggers.sources:
+        if source not in TRIGGER_SOURCES:
+            raise ValueError(f"Unknown trigger source '{source}'; use any of {TRIGGER_SOURCES}.")
+    return AppConfig(
+        retries=int(data.get("retries", 5)),
+        steps=steps,
+        groups=groups,
+        runner=runner,
+        timeout=float(timeout) if timeout is not None else None,
+        session_ttl=float(session_ttl) if session_ttl is not None else None,
+        triggers=triggers,
+    )
+
+
+def _step_payload(step: StepConfig) -> dict[str, Any]:
+    payload: dict[str, Any] = {"name": step.name, "enabled": step.enabled}
+    if step.group is not None:
+        payload["group"] = step.group
+    if step.timeout is not None:
+        payload["timeout"] = step.timeout
+    if step.retries is not None:
+        payload["retries"] = step.retries
+    if step.params:
+        payload["params"] = dict(step.params)
+    if step.worker:
+        payload["worker"] = True
+    if step.cpus is not None:
+        payload["cpus"] = list(step.cpus)
+    return payload
 
 
 def save_config(config: AppConfig, path: Path = CONFIG_PATH) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(config_to_dict(config), indent=2) + "\n")
+
+
+def config_to_dict(config: AppConfig) -> dict[str, Any]:
     payload: dict[str, Any] = {
         "retries": config.retries,
-        "steps": [
-            {"name": step.name, "enabled": step.enabled} for step in config.steps
-        ],
+        "steps": [_step_payload(step) for step in config.steps],
     }
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(json.dumps(payload, indent=2) + "\n")
+    if config.groups:
+        payload["groups"] = dict(config.groups)
+    if config.runner != "threads":
+        payload["runner"] = config.runner
+    if config.timeout is not None:
+        payload["timeout"] = config.timeout
+    if config.session_ttl is not None:
+        payload["session_ttl"] = config.session_ttl
+    if config.triggers != TriggerConfig():
+        payload["triggers"] = asdict(config.triggers)
+    return payload
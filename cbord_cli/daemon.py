@@ -0,0 +1,441 @@
+from __future__ import annotations
+
+import argparse
+import copy
+import json
+import os
+import signal
+import socket
+import socketserver
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+from cbord_cli import metrics, sessions, triggers, tts
+from cbord_cli.config import CONFIG_PATH, AppConfig, config_from_dict, config_to_dict, save_config
+from cbord_cli.plan import ConfigWatcher, PipelinePlan, compile_plan, load_plan
+from cbord_cli.runner import close_steps, run_pipeline, warm_steps
+from cbord_cli.workers import WorkerStep
+
+
+def _default_socket() -> Path:
+    runtime = os.getenv("XDG_RUNTIME_DIR")
+    return Path(runtime) / "cbord.sock" if runtime else Path("/tmp/cbord.sock")
+
+
+SOCKET_PATH = Path(os.getenv("CBORD_SOCKET", _default_socket()))
+
+
+class DaemonError(RuntimeError):
+    pass
+
+
+class Daemon:
+    """Runs the pipeline loop with warm steps and answers control requests.
+
+    While not paused the pipeline runs back to back with ``delay`` seconds
+    between runs, like continuous mode, or, when the config names trigger
+    sources, once per trigger event with the cooldown in between. A control
+    trigger runs it once right away, paused or not.
+
+    Config changes (file edits, ``reload``, ``set_config``, ``toggle``) are
+    compiled into a new plan first and swapped in between runs; steps whose
+    parameters did not change keep their warm instances.
+    """
+
+    def __init__(self, config_path: Path = CONFIG_PATH, delay: float = 1.0, paused: bool = False) -> None:
+        self.config_path = config_path
+        self.plan = load_plan(config_path)
+        self.config = self.plan.config
+        self.steps = self.plan.steps
+        self.delay = delay
+        self.paused = paused
+        self.watcher = ConfigWatcher(config_path)
+        self.hub = triggers.build_hub(self.config.triggers, self.steps, self._notify)
+        self.warm_errors: dict[str, str] = {}
+        self.started = time.time()
+        self.running = False
+        self.runs = 0
+        self.last_run: dict[str, Any] | None = None
+        self._trigger = False
+        self._retired: dict[str, object] = {}
+        self._apply_lock = threading.Lock()
+        self._lock = threading.Lock()
+        # Serializes hub arm/park, which join source threads for seconds;
+        # kept apart from _lock so control requests are not held up.
+        self._hub_lock = threading.Lock()
+        self._finished = threading.Condition(self._lock)
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+
+    def _enabled_names(self) -> list[str]:
+        return [step.name for step in self.config.steps if step.enabled]
+
+    def warm(self) -> None:
+        print("Warming steps...")
+        self.warm_errors = warm_steps(self.steps, self._enabled_names())
+
+    # Pipeline loop -----------------------------------------------------
+
+    def _notify(self) -> None:
+        self._wake.set()
+
+    def run_loop(self) -> None:
+        while not self._stop.is_set():
+            with self._lock:
+                hub = self.hub
+                event = hub.take() if hub is not None and not self.paused else None
+                due = self._trigger or event is not None or (hub is None and not self.paused)
+                self._trigger = False
+                config = copy.deepcopy(self.config)
+                steps = self.steps
+                # Marked running together with the snapshot, so a swap in
+                # between cannot close these instances before the run starts.
+                self.running = due
+                # Armed only while idle and listening; parked for runs and pauses.
+                listen = not (due or self.paused)
+            if hub is not None:
+                self._set_hub_armed(hub, listen)
+            if due:
+                if event is not None:
+                    print(f"\nTriggered by {event.source}.")
+                    metrics.observe(
+                        "cbord_trigger_latency_seconds", time.monotonic() - event.monotonic, source=event.source
+                    )
+                self._run_once(config, steps, event)
+                pause = self.delay if hub is None else hub.cooldown
+                self._wake.wait(0 if self._trigger else pause)
+            else:
+                self._wake.wait()
+            self._wake.clear()
+
+    def _set_hub_armed(self, hub: triggers.TriggerHub, armed: bool) -> None:
+        with self._hub_lock:
+            # A hub swapped out since run_loop looked is only ever parked.
+            if armed and hub is self.hub:
+                hub.arm()
+            else:
+                hub.park()
+
+    def _run_once(
+        self, config: AppConfig, steps: dict[str, object], event: triggers.TriggerEvent | None = None
+    ) -> None:
+        """Runs the pipeline once; the caller has already set ``running``."""
+        start = time.time()
+        try:
+            errors = run_pipeline(config, steps, event)
+        except Exception as exc:
+            errors = [f"Pipeline crashed: {exc}"]
+            print(errors[0])
+        with self._lock:
+            self.running = False
+            self.runs += 1
+            self.last_run = {
+                "started": start,
+                "seconds": round(time.time() - start, 3),
+                "granted": not errors,
+                "errors": errors,
+            }
+            retired, self._retired = self._retired, {}
+            self._finished.notify_all()
+        close_steps(retired)
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._wake.set()
+        with self._lock:
+            self._finished.notify_all()
+
+    # Control commands --------------------------------------------------
+
+    def status(self) -> dict[str, Any]:
+        with self._lock:
+            state = "running" if self.running else ("paused" if self.paused else "idle")
+            return {
+                "state": state,
+                "paused": self.paused,
+                "uptime": round(time.time() - self.started, 1),
+                "runs": self.runs,
+                "last_run": self.last_run,
+                "delay": self.delay,
+                "enabled_steps": self._enabled_names(),
+                "warm_errors": self.warm_errors,
+                "triggers": self.hub.status() if self.hub is not None else None,
+                "sessions": sessions.cache.active(self.config.session_ttl) if self.config.session_ttl else {},
+                "workers": {name: step.status() for name, step in self.steps.items() if isinstance(step, WorkerStep)},
+            }
+
+    def trigger(self, wait: bool = False, timeout: float | None = None) -> dict[str, Any]:
+        with self._lock:
+            # A run already in progress started before this request.
+            target = self.runs + (2 if self.running else 1)
+            self._trigger = True
+            self._wake.set()
+            if not wait:
+                return {"queued": True}
+            self._finished.wait_for(lambda: self.runs >= target or self._stop.is_set(), timeout)
+            return {"queued": True, "last_run": self.last_run if self.runs >= target else None}
+
+    def set_paused(self, paused: bool) -> dict[str, Any]:
+        with self._lock:
+            self.paused = paused
+        self._wake.set()
+        return self.status()
+
+    def _apply_config(self, config: AppConfig) -> dict[str, Any]:
+        with self._apply_lock:
+            return self._swap(compile_plan(config, self.plan))
+
+    def _swap(self, plan: PipelinePlan) -> dict[str, Any]:
+        # Callers hold _apply_lock, so the config cannot change under us here.
+        # New and newly enabled instances are warmed before they are
+        # published, so run_loop never runs a step that is still opening
+        # its camera or UART.
+        with self._lock:
+            before = set(self._enabled_names())
+        warm = [
+            step.name
+            for step in plan.config.steps
+            if step.enabled and (step.name not in before or step.name in plan.replaced)
+        ]
+        if warm:
+            self.warm_errors.update(warm_steps(plan.steps, warm))
+        old_hub = None
+        with self._lock:
+            if plan.replaced or plan.config.triggers != self.config.triggers:
+                old_hub = self.hub
+                self.hub = triggers.build_hub(plan.config.triggers, plan.steps, self._notify)
+                self._wake.set()
+            self.plan, self.config, self.steps = plan, plan.config, plan.steps
+            # A run in progress still holds the old instances; close them after it.
+            retired = {}
+            if self.running:
+                self._retired.update(plan.retired)
+            else:
+                retired = plan.retired
+        if old_hub is not None:
+            self._set_hub_armed(old_hub, False)
+        close_steps(retired)
+        return {"config": config_to_dict(plan.config), "rebuilt": plan.replaced}
+
+    def reload(self) -> dict[str, Any]:
+        with self._apply_lock:
+            return self._swap(load_plan(self.config_path, self.plan))
+
+    def watch(self) -> None:
+        """Reloads the config file whenever it changes on disk."""
+        self.watcher.start(self._config_changed)
+
+    def _config_changed(self) -> None:
+        try:
+            result = self.reload()
+        except ValueError as exc:
+            print(f"Config change not applied: {exc}")
+            return
+        print(f"Config reloaded; rebuilt steps: {', '.join(result['rebuilt']) or 'none'}.")
+
+    def toggle(self, step: str) -> dict[str, Any]:
+        config = copy.deepcopy(self.config)
+        for step_config in config.steps:
+            if step_config.name == step:
+                step_config.enabled = not step_config.enabled
+                return self._apply_config(config)
+        raise DaemonError(f"Unknown step '{step}'.")
+
+    def handle(self, request: dict[str, Any]) -> dict[str, Any]:
+        cmd = request.get("cmd")
+        if cmd == "status":
+            return self.status()
+        if cmd == "metrics":
+            return {"prometheus": metrics.to_prometheus(metrics.registry.snapshot())}
+        if cmd == "trigger":
+            return self.trigger(bool(request.get("wait")), request.get("timeout"))
+        if cmd == "pause":
+            return self.set_paused(True)
+        if cmd == "resume":
+            return self.set_paused(False)
+        if cmd == "reload":
+            return self.reload()
+        if cmd == "toggle":
+            return self.toggle(str(request.get("step")))
+        if cmd == "config":
+            with self._lock:
+                return {"config": config_to_dict(self.config)}
+        if cmd == "set_config":
+            return self._apply_config(config_from_dict(request["config"]))
+        if cmd == "save":
+            with self._lock:
+                save_config(self.config, self.config_path)
+                self.watcher.mark()
+            return {"saved": str(self.config_path)}
+        if cmd == "shutdown":
+            self.stop()
+            return {"stopping": True}
+        raise DaemonError(f"Unknown command '{cmd}'.")
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self) -> None:
+        daemon: Daemon = self.server.app  # type: ignore[attr-defined]
+        for line in self.rfile:
+            try:
+                reply = {"ok": True, **daemon.handle(json.loads(line))}
+            except Exception as exc:
+                reply = {"ok": False, "error": str(exc)}
+            self.wfile.write((json.dumps(reply) + "\n").encode())
+
+
+class _Server(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+
+def _claim_socket(path: Path) -> None:
+    if not path.exists():
+        return
+    if DaemonClient(path).available():
+        raise DaemonError(f"A daemon is already listening on {path}.")
+    path.unlink()  # left behind by a daemon that did not shut down cleanly
+
+
+def serve(daemon: Daemon, path: Path = SOCKET_PATH) -> None:
+    _claim_socket(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    server = _Server(str(path), _Handler)
+    server.app = daemon  # type: ignore[attr-defined]
+    os.chmod(path, 0o660)
+    threading.Thread(target=server.serve_forever, name="control-socket", daemon=True).start()
+
+    for signum in (signal.SIGTERM, signal.SIGINT):
+        signal.signal(signum, lambda *_: daemon.stop())
+
+    print(f"Daemon listening on {path} ({'paused' if daemon.paused else 'running'}).")
+    try:
+        daemon.warm()
+        daemon.watch()
+        daemon.run_loop()
+    finally:
+        daemon.watcher.stop()
+        if daemon.hub is not None:
+            daemon.hub.park()
+        server.shutdown()
+        server.server_close()
+        path.unlink(missing_ok=True)
+        close_steps(daemon.steps)
+        tts.shutdown()
+        print("Daemon stopped.")
+
+
+class DaemonClient:
+    def __init__(self, path: Path = SOCKET_PATH, timeout: float | None = 5.0) -> None:
+        self.path = path
+        self.timeout = timeout
+
+    def available(self) -> bool:
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+                sock.settimeout(1.0)
+                sock.connect(str(self.path))
+            return True
+        except OSError:
+            return False
+
+    def call(self, cmd: str, wait_forever: bool = False, **args: Any) -> dict[str, Any]:
+        """Sends one request; ``wait_forever`` drops the socket timeout (blocking trigger)."""
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+            sock.settimeout(None if wait_forever else self.timeout)
+            sock.connect(str(self.path))
+            sock.sendall((json.dumps({"cmd": cmd, **args}) + "\n").encode())
+            reply = sock.makefile("rb").readline()
+        if not reply:
+            raise DaemonError("Daemon closed the connection.")
+        data = json.loads(reply)
+        if not data.pop("ok", False):
+            raise DaemonError(data.get("error", "request failed"))
+        return data
+
+
+def _cmd_daemon(args: argparse.Namespace) -> int:
+    try:
+        daemon = Daemon(Path(args.config), delay=args.delay, paused=args.paused)
+        serve(daemon, Path(args.socket))
+    except (DaemonError, ValueError) as exc:
+        print(exc)
+        return 1
+    return 0
+
+
+def print_status(status: dict[str, Any]) -> None:
+    print(f"State: {status['state']}, {status['runs']} runs, up {status['uptime']:.0f}s.")
+    print(f"Enabled steps: {', '.join(status['enabled_steps']) or 'none'}")
+    last = status.get("last_run")
+    if last:
+        outcome = "granted" if last["granted"] else "denied: " + "; ".join(last["errors"])
+        print(f"Last run: {outcome} ({last['seconds']:.1f}s, {time.ctime(last['started'])}).")
+    for name, error in status.get("warm_errors", {}).items():
+        print(f"Not warm: {name} ({error})")
+    for name, left in status.get("sessions", {}).items():
+        print(f"Session: {name} ({left:.0f}s left)")
+    for name, worker in status.get("workers", {}).items():
+        state = f"pid {worker['pid']}" if worker["alive"] else "down"
+        cpus = ",".join(map(str, worker["cpus"])) if worker["cpus"] else "any"
+        print(f"Worker: {name} ({state}, cpus {cpus}, {worker['restarts']} restarts)")
+    hub = status.get("triggers")
+    if hub:
+        state = "armed" if hub["armed"] else "parked"
+        print(f"Triggers ({state}): {', '.join(hub['sources'])}")
+        if hub["last"]:
+            print(f"Last trigger: {hub['last']['source']} at {time.ctime(hub['last']['at'])}.")
+        for name, error in hub["errors"].items():
+            print(f"Trigger not armed: {name} ({error})")
+
+
+def _cmd_ctl(args: argparse.Namespace) -> int:
+    client = DaemonClient(Path(args.socket))
+    request: dict[str, Any] = {}
+    if args.ctl_command == "toggle":
+        request["step"] = args.step
+    if args.ctl_command == "trigger":
+        request.update(wait=args.wait, wait_forever=args.wait)
+    try:
+        reply = client.call(args.ctl_command, **request)
+    except (OSError, DaemonError) as exc:
+        print(f"Daemon request failed: {exc}")
+        return 1
+
+    if args.ctl_command in ("status", "pause", "resume"):
+        print_status(reply)
+    elif args.ctl_command == "metrics":
+        print(reply["prometheus"], end="")
+    else:
+        print(json.dumps(reply, indent=2))
+    last = reply.get("last_run")
+    return 1 if args.ctl_command == "trigger" and args.wait and last and not last["granted"] else 0
+
+
+def add_subcommand(subparsers) -> None:
+    parser = subparsers.add_parser("daemon", help="Run headless with warm steps and a control socket.")
+    parser.add_argument("--socket", default=str(SOCKET_PATH), help="Unix socket path.")
+    parser.add_argument("--config", default=str(CONFIG_PATH), help="Pipeline config file.")
+    parser.add_argument("--delay", type=float, default=1.0, help="Seconds between continuous runs.")
+    parser.add_argument("--paused", action="store_true", help="Start paused; run only when triggered.")
+    parser.set_defaults(handler=_cmd_daemon)
+
+    ctl = subparsers.add_parser("ctl", help="Send a command to a running daemon.")
+    ctl.add_argument("--socket", default=str(SOCKET_PATH), help="Unix socket path.")
+    commands = ctl.add_subparsers(dest="ctl_command", required=True)
+    for name, text in (
+        ("status", "Show daemon state and the last run."),
+        ("metrics", "Print live metrics in Prometheus text format."),
+        ("pause", "Stop continuous runs (triggers still work)."),
+        ("resume", "Resume continuous runs."),
+        ("reload", "Reload the config file."),
+        ("save", "Write the live config to the config file."),
+        ("shutdown", "Stop the daemon."),
+    ):
+        commands.add_parser(name, help=text)
+    trigger = commands.add_parser("trigger", help="Run the pipeline now.")
+    trigger.add_argument("--wait", action="store_true", help="Wait for the run and exit non-zero if denied.")
+    toggle = commands.add_parser("toggle", help="Enable or disable a step.")
+    toggle.add_argument("step")
+    ctl.set_defaults(handler=_cmd_ctl)
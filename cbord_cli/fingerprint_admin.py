@@ -0,0 +1,275 @@
+from __future__ import annotations
+
+import argparse
+import gzip
+import struct
+import time
+from pathlib import Path
+from typing import Any
+
+import adafruit_fingerprint
+
+from cbord_cli.fingerprint_index import TemplateIndex
+from cbord_cli.fingerprint_link import DEFAULT_DEVICE, SUPPORTED_BAUDRATES, FingerprintLink, benchmark
+from cbord_cli.identities import load_identities, save_identities
+
+ARCHIVE_MAGIC = b"CBFP1"
+_HEADER = struct.Struct(">5sHH")
+_RECORD = struct.Struct(">HH")
+
+
+def _report_progress(label: str, done: int, total: int, started: float, nbytes: int) -> None:
+    elapsed = max(time.monotonic() - started, 1e-6)
+    print(
+        f"  [{done}/{total}] {label}  "
+        f"{done / elapsed:.1f} templates/s  {nbytes / 1024 / elapsed:.1f} KiB/s"
+    )
+
+
+def _capture(finger: Any, buffer: int) -> bool:
+    while True:
+        result = finger.get_image()
+        if result == adafruit_fingerprint.OK:
+            break
+        if result != adafruit_fingerprint.NOFINGER:
+            return False
+        time.sleep(0.1)
+    return finger.image_2_tz(buffer) == adafruit_fingerprint.OK
+
+
+def enroll_one(finger: Any, index: TemplateIndex, slot: int) -> bool:
+    print(f"Enrolling into ID #{slot}. Place finger...")
+    if not _capture(finger, 1):
+        print("Error templating first image.")
+        return False
+
+    print("Remove finger.")
+    time.sleep(1)
+    while finger.get_image() != adafruit_fingerprint.NOFINGER:
+        time.sleep(0.05)
+
+    print("Place same finger again...")
+    if not _capture(finger, 2):
+        print("Error templating second image.")
+        return False
+
+    if finger.create_model() != adafruit_fingerprint.OK:
+        print("Prints did not match.")
+        return False
+    return index.store(slot)
+
+
+def enroll_queue(finger: Any, index: TemplateIndex, names: list[str], attempts: int = 3) -> dict[str, int]:
+    enrolled: dict[str, int] = {}
+    slots = index.free_slots(limit=len(names))
+    if len(slots) < len(names):
+        print(f"Only {len(slots)} free slots for {len(names)} users; enrolling the first {len(slots)}.")
+
+    started = time.monotonic()
+    for position, (name, slot) in enumerate(zip(names, slots), start=1):
+        print(f"\n[{position}/{len(names)}] {name}")
+        for attempt in range(1, attempts + 1):
+            if enroll_one(finger, index, slot):
+                enrolled[name] = slot
+                print(f"{name} stored in slot {slot}.")
+                break
+            if attempt < attempts:
+                print(f"Retrying ({attempt}/{attempts})...")
+        else:
+            print(f"Giving up on {name}.")
+
+    elapsed = time.monotonic() - started
+    print(f"\nEnrolled {len(enrolled)}/{len(names)} users in {elapsed:.1f}s.")
+    return enrolled
+
+
+def export_templates(finger: Any, index: TemplateIndex, path: Path) -> int:
+    index.refresh()
+    slots = index.occupied()
+    started = time.monotonic()
+    nbytes = 0
+    exported = 0
+
+    # Templates are read first and the archive written afterwards, so the
+    # header counts the records actually exported, not the occupied slots.
+    records = []
+    for position, slot in enumerate(slots, start=1):
+        if finger.load_model(slot, 1) != adafruit_fingerprint.OK:
+            print(f"  Slot {slot}: failed to load, skipping.")
+            continue
+        data = bytes(finger.get_fpdata("char", 1))
+        records.append((slot, data))
+        nbytes += len(data)
+        exported += 1
+        _report_progress(f"slot {slot}", position, len(slots), started, nbytes)
+
+    with gzip.open(path, "wb") as archive:
+        archive.write(_HEADER.pack(ARCHIVE_MAGIC, index.capacity(), len(records)))
+        for slot, data in records:
+            archive.write(_RECORD.pack(slot, len(data)))
+            archive.write(data)
+
+    print(f"Exported {exported} templates to {path} ({path.stat().st_size} bytes).")
+    return exported
+
+
+def read_archive(path: Path) -> list[tuple[int, bytes]]:
+    """Every record in the archive; raises ValueError if it is not one or is truncated."""
+    with gzip.open(path, "rb") as archive:
+        header = archive.read(_HEADER.size)
+        if len(header) < _HEADER.size:
+            raise ValueError(f"{path} is not a fingerprint template archive.")
+        magic, _capacity, count = _HEADER.unpack(header)
+        if magic != ARCHIVE_MAGIC:
+            raise ValueError(f"{path} is not a fingerprint template archive.")
+        records = []
+        for number in range(1, count + 1):
+            header = archive.read(_RECORD.size)
+            if len(header) < _RECORD.size:
+                raise ValueError(f"{path} is truncated: record {number} of {count} is missing.")
+            slot, length = _RECORD.unpack(header)
+            data = archive.read(length)
+            if len(data) < length:
+                raise ValueError(
+                    f"{path} is truncated: slot {slot} has {len(data)} of {length} template bytes."
+                )
+            records.append((slot, data))
+    return records
+
+
+def restore_templates(finger: Any, index: TemplateIndex, path: Path, overwrite: bool = False) -> int:
+    records = read_archive(path)
+    started = time.monotonic()
+    nbytes = 0
+    restored = 0
+
+    for position, (slot, data) in enumerate(records, start=1):
+        if slot >= index.capacity():
+            print(f"  Slot {slot}: beyond sensor capacity {index.capacity()}, skipping.")
+            continue
+        if index.is_occupied(slot) and not overwrite:
+            print(f"  Slot {slot}: occupied, skipping (use --overwrite).")
+            continue
+        if not finger.send_fpdata(list(data), "char", 1) or not index.store(slot):
+            print(f"  Slot {slot}: upload failed.")
+            continue
+        nbytes += len(data)
+        restored += 1
+        _report_progress(f"slot {slot}", position, len(records), started, nbytes)
+
+    print(f"Restored {restored}/{len(records)} templates from {path}.")
+    return restored
+
+
+def _cmd_enroll(finger: Any, index: TemplateIndex, args: argparse.Namespace) -> int:
+    names = list(args.names) or [f"user {n}" for n in range(1, args.count + 1)]
+    enrolled = enroll_queue(finger, index, names)
+    if args.names and enrolled:
+        # Named enrollments become fingerprint -> face gallery identities.
+        identities = load_identities()
+        for name, slot in enrolled.items():
+            identities.fingerprints[slot] = name
+        save_identities(identities)
+    return 0 if len(enrolled) == len(names) else 1
+
+
+def _cmd_list(finger: Any, index: TemplateIndex, args: argparse.Namespace) -> int:
+    slots = index.occupied()
+    identities = load_identities()
+    print(f"{len(slots)}/{index.capacity()} slots used.")
+    for slot in slots:
+        print(f"  #{slot}: {identities.for_finger(slot) or '(unnamed)'}")
+    return 0
+
+
+def _cmd_delete(finger: Any, index: TemplateIndex, args: argparse.Namespace) -> int:
+    failed = 0
+    identities = load_identities()
+    for slot in args.slots:
+        if index.delete(slot):
+            identities.fingerprints.pop(slot, None)
+            print(f"Deleted ID #{slot}.")
+        else:
+            print(f"Failed to delete ID #{slot}; it might already be empty.")
+            failed += 1
+    save_identities(identities)
+    return 1 if failed else 0
+
+
+def _cmd_export(finger: Any, index: TemplateIndex, args: argparse.Namespace) -> int:
+    export_templates(finger, index, Path(args.archive).expanduser())
+    return 0
+
+
+def _cmd_restore(finger: Any, index: TemplateIndex, args: argparse.Namespace) -> int:
+    try:
+        records = restore_templates(finger, index, Path(args.archive).expanduser(), args.overwrite)
+    except (OSError, EOFError, ValueError) as exc:
+        # Nothing is written to the sensor unless the whole archive reads cleanly.
+        print(f"Not restoring: {exc}")
+        return 1
+    return 0 if records else 1
+
+
+def _cmd_link(finger: Any, index: TemplateIndex, args: argparse.Namespace) -> int:
+    link = args.link
+    if args.link_action == "set":
+        finger = link.negotiate(finger, args.rate)
+    elif args.link_action == "bench":
+        finger = benchmark(link, finger, args.slot, args.iterations)
+    rate = link.current_rate(finger)
+    print(f"Sensor on {link.device} at {rate} baud.")
+    return 0 if args.link_action != "set" or rate == args.rate else 1
+
+
+def _run(args: argparse.Namespace) -> int:
+    args.link = FingerprintLink(args.device)
+    finger = args.link.open(args.baudrate)
+    index = TemplateIndex(finger)
+    return args.action(finger, index, args)
+
+
+def _at_least_one(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def add_subcommand(subparsers) -> None:
+    parser = subparsers.add_parser("fingerprint", help="Manage templates stored on the fingerprint sensor.")
+    parser.add_argument("--device", default=DEFAULT_DEVICE)
+    parser.add_argument("--baudrate", type=int, default=None, help="Skip auto-detection and use this rate.")
+    parser.set_defaults(handler=_run)
+    actions = parser.add_subparsers(dest="action_name", required=True)
+
+    enroll = actions.add_parser("enroll", help="Enroll a queue of users in one session.")
+    enroll.add_argument("names", nargs="*", help="Names to enroll, in order.")
+    enroll.add_argument("--count", type=int, default=1, help="Number of users when no names are given.")
+    enroll.set_defaults(action=_cmd_enroll)
+
+    listing = actions.add_parser("list", help="List occupied template slots.")
+    listing.set_defaults(action=_cmd_list)
+
+    delete = actions.add_parser("delete", help="Delete templates by slot.")
+    delete.add_argument("slots", nargs="+", type=int)
+    delete.set_defaults(action=_cmd_delete)
+
+    export = actions.add_parser("export", help="Back up every stored template to an archive.")
+    export.add_argument("archive")
+    export.set_defaults(action=_cmd_export)
+
+    restore = actions.add_parser("restore", help="Restore templates from an archive.")
+    restore.add_argument("archive")
+    restore.add_argument("--overwrite", action="store_true", help="Replace templates in occupied slots.")
+    restore.set_defaults(action=_cmd_restore)
+
+    link = actions.add_parser("link", help="Detect, change or benchmark the sensor UART rate.")
+    link_actions = link.add_subparsers(dest="link_action", required=True)
+    link_actions.add_parser("detect", help="Probe and persist the current rate.")
+    set_rate = link_actions.add_parser("set", help="Switch the sensor to a new rate.")
+    set_rate.add_argument("rate", type=int, choices=SUPPORTED_BAUDRATES)
+    bench = link_actions.add_parser("bench", help="Time match cycles and template transfers at each rate.")
+    bench.add_argument("--slot", type=int, default=None, help="Stored template to use for transfer timing.")
+    bench.add_argument("--iterations", type=_at_least_one, default=5)
+    link.set_defaults(action=_cmd_link)
@@ -0,0 +1,91 @@
+from __future__ import annotations
+
+from dataclasses import dataclass, field
+from typing import Any
+
+import adafruit_fingerprint
+
+
+class TemplateIndexError(RuntimeError):
+    pass
+
+
+@dataclass
+class TemplateIndex:
+    """Cached view of the sensor's template occupancy table.
+
+    The table is read in bulk with ``read_templates`` (one index page per 256
+    slots) instead of probing slots one at a time with ``load_model``. Stores
+    and deletes made through the index keep the cache current; anything that
+    changes the library behind its back should call ``invalidate``.
+    """
+
+    finger: Any
+    first_slot: int = 1
+    _occupied: set[int] | None = field(default=None, init=False, repr=False)
+    _capacity: int | None = field(default=None, init=False, repr=False)
+
+    def refresh(self) -> None:
+        if self.finger.read_templates() != adafruit_fingerprint.OK:
+            raise TemplateIndexError("Failed to read the sensor template index.")
+        self._occupied = set(self.finger.templates)
+        self._capacity = int(self.finger.library_size)
+
+    def invalidate(self) -> None:
+        self._occupied = None
+        self._capacity = None
+
+    def _ensure(self) -> set[int]:
+        if self._occupied is None:
+            self.refresh()
+        assert self._occupied is not None
+        return self._occupied
+
+    def capacity(self) -> int:
+        self._ensure()
+        assert self._capacity is not None
+        return self._capacity
+
+    def count(self) -> int:
+        return len(self._ensure())
+
+    def occupied(self) -> list[int]:
+        return sorted(self._ensure())
+
+    def is_occupied(self, slot: int) -> bool:
+        return slot in self._ensure()
+
+    def free_slots(self, limit: int | None = None) -> list[int]:
+        occupied = self._ensure()
+        slots: list[int] = []
+        for slot in range(self.first_slot, self.capacity()):
+            if slot in occupied:
+                continue
+            slots.append(slot)
+            if limit is not None and len(slots) >= limit:
+                break
+        return slots
+
+    def next_free_slot(self) -> int | None:
+        slots = self.free_slots(limit=1)
+        return slots[0] if slots else None
+
+    def store(self, slot: int, buffer: int = 1) -> bool:
+        if self.finger.store_model(slot, buffer) != adafruit_fingerprint.OK:
+            return False
+        self.mark_enrolled(slot)
+        return True
+
+    def delete(self, slot: int) -> bool:
+        if self.finger.delete_model(slot) != adafruit_fingerprint.OK:
+            return False
+        self.mark_deleted(slot)
+        return True
+
+    def mark_enrolled(self, slot: int) -> None:
+        if self._occupied is not None:
+            self._occupied.add(slot)
+
+    def mark_deleted(self, slot: int) -> None:
+        if self._occupied is not None:
+            self._occupied.discard(slot)
@@ -0,0 +1,186 @@
+from __future__ import annotations
+
+import json
+import os
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Callable
+
+import adafruit_fingerprint
+import serial
+
+DEFAULT_DEVICE = "/dev/ttyAMA0"
+DEFAULT_BAUDRATE = 57600
+# The sensor encodes its UART rate as a multiple of 9600 (system parameter 4).
+SUPPORTED_BAUDRATES = (9600, 19200, 38400, 57600, 115200)
+_BAUD_PARAM = 4
+
+LINK_STATE_FILE = Path(__file__).resolve().parent / ".fingerprint_link.json"
+
+
+class LinkError(RuntimeError):
+    pass
+
+
+def _load_state(path: Path) -> dict[str, int]:
+    if not path.exists():
+        return {}
+    try:
+        return {str(k): int(v) for k, v in json.loads(path.read_text()).items()}
+    except (json.JSONDecodeError, AttributeError, TypeError, ValueError):
+        return {}
+
+
+def _save_state(path: Path, state: dict[str, int]) -> None:
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    tmp.write_text(json.dumps(state))
+    os.replace(tmp, path)
+
+
+@dataclass
+class FingerprintLink:
+    device: str = DEFAULT_DEVICE
+    timeout: float = 1.0
+    probe_timeout: float = 0.25
+    state_file: Path = LINK_STATE_FILE
+
+    def persisted_rate(self) -> int | None:
+        return _load_state(self.state_file).get(self.device)
+
+    def persist_rate(self, baudrate: int) -> None:
+        state = _load_state(self.state_file)
+        if state.get(self.device) == baudrate:
+            return
+        state[self.device] = baudrate
+        _save_state(self.state_file, state)
+
+    def _probe_order(self) -> list[int]:
+        order = [self.persisted_rate(), DEFAULT_BAUDRATE, *reversed(SUPPORTED_BAUDRATES)]
+        seen: list[int] = []
+        for rate in order:
+            if rate is not None and rate not in seen:
+                seen.append(rate)
+        return seen
+
+    def _try_open(self, baudrate: int) -> Any | None:
+        uart = serial.Serial(self.device, baudrate=baudrate, timeout=self.probe_timeout)
+        try:
+            finger = adafruit_fingerprint.Adafruit_Fingerprint(uart)
+        except Exception:
+            uart.close()
+            return None
+        uart.timeout = self.timeout
+        return finger
+
+    def open(self, baudrate: int | None = None) -> Any:
+        if baudrate is not None:
+            finger = self._try_open(baudrate)
+            if finger is None:
+                raise LinkError(f"No fingerprint sensor answering on {self.device} at {baudrate} baud.")
+            return finger
+
+        for rate in self._probe_order():
+            finger = self._try_open(rate)
+            if finger is not None:
+                self.persist_rate(rate)
+                return finger
+        raise LinkError(f"No fingerprint sensor answering on {self.device} at any supported rate.")
+
+    @staticmethod
+    def current_rate(finger: Any) -> int:
+        return int(finger._uart.baudrate)
+
+    @staticmethod
+    def _verify(finger: Any) -> bool:
+        try:
+            return finger.verify_password() == adafruit_fingerprint.OK
+        except Exception:
+            return False
+
+    def negotiate(self, finger: Any, baudrate: int) -> Any:
+        if baudrate not in SUPPORTED_BAUDRATES:
+            raise LinkError(f"Unsupported baud rate {baudrate}; choose one of {SUPPORTED_BAUDRATES}.")
+        previous = self.current_rate(finger)
+        if previous == baudrate:
+            return finger
+
+        try:
+            finger.set_sysparam(_BAUD_PARAM, baudrate // 9600)
+        except Exception as exc:
+            print(f"Sensor rejected {baudrate} baud ({exc}); staying at {previous}.")
+            return finger
+
+        # The sensor acknowledges at the old rate and then switches.
+        time.sleep(0.1)
+        finger._uart.baudrate = baudrate
+        finger._uart.reset_input_buffer()
+        if self._verify(finger):
+            self.persist_rate(baudrate)
+            return finger
+
+        print(f"No answer at {baudrate} baud; falling back.")
+        finger._uart.baudrate = previous
+        finger._uart.reset_input_buffer()
+        if self._verify(finger):
+            return finger
+        finger._uart.close()
+        return self.open()
+
+
+def _time_call(fn: Callable[[], bool], iterations: int) -> float | None:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        if not fn():
+            return None
+        samples.append(time.perf_counter() - start)
+    return sum(samples) / len(samples)
+
+
+def _match_cycle(finger: Any) -> bool:
+    return (
+        finger.get_image() == adafruit_fingerprint.OK
+        and finger.image_2_tz(1) == adafruit_fingerprint.OK
+        and finger.finger_search() == adafruit_fingerprint.OK
+    )
+
+
+def _template_download(finger: Any, slot: int) -> bool:
+    if finger.load_model(slot, 1) != adafruit_fingerprint.OK:
+        return False
+    return bool(finger.get_fpdata("char", 1))
+
+
+def benchmark(link: FingerprintLink, finger: Any, slot: int | None, iterations: int = 5) -> Any:
+    """Times a match cycle and a template round trip at every supported rate.
+
+    Match cycles need a finger resting on the sensor; they are reported as
+    n/a otherwise. The link is left at its starting rate afterwards.
+    """
+    start_rate = link.current_rate(finger)
+    rows = []
+    for rate in SUPPORTED_BAUDRATES:
+        finger = link.negotiate(finger, rate)
+        if link.current_rate(finger) != rate:
+            rows.append((rate, None, None, None))
+            continue
+
+        match = _time_call(lambda: _match_cycle(finger), iterations)
+        download = upload = None
+        if slot is not None:
+            download = _time_call(lambda: _template_download(finger, slot), iterations)
+            template = finger.get_fpdata("char", 1) if download is not None else None
+            if template:
+                upload = _time_call(lambda: bool(finger.send_fpdata(template, "char", 1)), iterations)
+        rows.append((rate, match, download, upload))
+
+    finger = link.negotiate(finger, start_rate)
+
+    def _fmt(value: float | None) -> str:
+        return f"{value * 1000:8.1f} ms" if value is not None else "     n/a   "
+
+    print(f"{'baud':>8}  {'match cycle':>11}  {'tpl download':>12}  {'tpl upload':>11}")
+    for rate, match, download, upload in rows:
+        print(f"{rate:>8}  {_fmt(match):>11}  {_fmt(download):>12}  {_fmt(upload):>11}")
+    return finger
@@ -0,0 +1,31 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from pathlib import Path
+
+IDENTITIES_PATH = Path(__file__).parent / "config" / "identities.json"
+
+
+@dataclass
+class IdentityMap:
+    fingerprints: dict[int, str] = field(default_factory=dict)
+
+    def for_finger(self, finger_id: int) -> str | None:
+        return self.fingerprints.get(finger_id)
+
+
+def load_identities(path: Path = IDENTITIES_PATH) -> IdentityMap:
+    if not path.exists():
+        return IdentityMap()
+    data = json.loads(path.read_text())
+    fingerprints = {int(slot): str(name) for slot, name in data.get("fingerprints", {}).items()}
+    return IdentityMap(fingerprints=fingerprints)
+
+
+def save_identities(identities: IdentityMap, path: Path = IDENTITIES_PATH) -> None:
+    payload = {
+        "fingerprints": {str(slot): name for slot, name in sorted(identities.fingerprints.items())},
+    }
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(json.dumps(payload, indent=2) + "\n")
@@ -0,0 +1,256 @@
+from __future__ import annotations
+
+import argparse
+import importlib
+import importlib.util
+import os
+import random
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from cbord_cli import sim_gpio, tracing
+
+
+def _load_digital_input_device():
+    spec = importlib.util.find_spec("gpiozero")
+    if spec is None:
+        return None
+    gpiozero = importlib.import_module("gpiozero")
+    return getattr(gpiozero, "DigitalInputDevice", None)
+
+
+DigitalInputDevice = _load_digital_input_device()
+
+
+def open_input(pin: int, pull_up: bool = True):
+    """A GPIO input, simulated when ``CBORD_GPIO_BACKEND=sim``."""
+    if sim_gpio.enabled():
+        return sim_gpio.SimDigitalInputDevice(pin, pull_up=pull_up)
+    if DigitalInputDevice is None:
+        raise RuntimeError("gpiozero is not installed")
+    return DigitalInputDevice(pin, pull_up=pull_up)
+
+
+@dataclass
+class KnockSettings:
+    # LM393 OUT idles high and pulls low on a knock; uses the Pi's pull-up.
+    pin: int = 17
+    # Seconds between successive knocks of the secret rhythm.
+    pattern: tuple[float, ...] = (0.25, 0.25, 0.5, 0.25)
+    # Allowed error per gap once both rhythms are scaled to their longest gap.
+    tolerance: float = 0.25
+    # Edges this soon after a knock are the same knock ringing on.
+    refractory: float = 0.15
+    # Silence that ends a group of knocks.
+    group_gap: float = 1.2
+
+    @classmethod
+    def from_env(cls) -> "KnockSettings":
+        def _get_float(name: str, default: float) -> float:
+            raw = os.getenv(name)
+            return float(raw) if raw is not None else default
+
+        pattern = os.getenv("KNOCK_PATTERN")
+        return cls(
+            pin=int(os.getenv("KNOCK_PIN", cls.pin)),
+            pattern=tuple(float(p) for p in pattern.split(",") if p.strip()) if pattern else cls.pattern,
+            tolerance=_get_float("KNOCK_TOLERANCE", cls.tolerance),
+            refractory=_get_float("KNOCK_REFRACTORY", cls.refractory),
+            group_gap=_get_float("KNOCK_GROUP_GAP", cls.group_gap),
+        )
+
+
+def rhythm_error(intervals: list[float], pattern: tuple[float, ...]) -> float | None:
+    """Largest per-gap error between two rhythms, or None if the knock count differs.
+
+    Both are scaled so their longest gap is 1.0, so a secret knocked
+    faster or slower than it was recorded still matches.
+    """
+    if len(intervals) != len(pattern):
+        return None
+    if not pattern:
+        return 0.0
+    longest, secret = max(intervals), max(pattern)
+    if longest <= 0 or secret <= 0:
+        return None
+    return max(abs(a / longest - b / secret) for a, b in zip(intervals, pattern))
+
+
+@dataclass
+class KnockGroup:
+    times: list[float]
+    ended: float
+    error: float | None = None
+    matched: bool = False
+
+    @classmethod
+    def from_gaps(cls, gaps: list[float], ended: float) -> "KnockGroup":
+        times = [0.0]
+        for gap in gaps:
+            times.append(times[-1] + gap)
+        return cls(times, ended)
+
+    @property
+    def intervals(self) -> list[float]:
+        return [b - a for a, b in zip(self.times, self.times[1:])]
+
+    def describe(self) -> str:
+        gaps = ", ".join(f"{gap:.2f}" for gap in self.intervals) or "-"
+        error = "wrong count" if self.error is None else f"error {self.error:.2f}"
+        return f"{len(self.times)} knocks, gaps {gaps}s ({error})"
+
+
+class KnockDetector:
+    """Groups knock edges and checks each group against the secret rhythm.
+
+    ``edge()`` runs in the GPIO interrupt thread and only timestamps the
+    knock. A group closes once no knock arrived for ``group_gap`` seconds
+    and is returned by ``wait_group()``; nothing polls in between.
+    """
+
+    def __init__(self, settings: KnockSettings, clock: Callable[[], float] = time.monotonic) -> None:
+        self.settings = settings
+        self.clock = clock
+        self._knocks: list[float] = []
+        self._last_knock = float("-inf")
+        self._cond = threading.Condition()
+
+    def edge(self, *_: object) -> None:
+        now = self.clock()
+        with self._cond:
+            if now - self._last_knock < self.settings.refractory:
+                return
+            self._last_knock = now
+            self._knocks.append(now)
+            self._cond.notify_all()
+        tracing.instant("knock")
+
+    def reset(self) -> None:
+        with self._cond:
+            self._knocks = []
+
+    def interrupt(self) -> None:
+        """Wakes ``wait_group()`` callers so they re-check ``cancelled``."""
+        with self._cond:
+            self._cond.notify_all()
+
+    def wait_group(
+        self,
+        timeout: float | None = None,
+        cancelled: Callable[[], bool] | None = None,
+        check_every: float | None = None,
+    ) -> KnockGroup | None:
+        """Blocks until a knock group closes; None on timeout or cancellation.
+
+        The timeout only applies while nobody is knocking; a group in
+        progress is always allowed to finish.
+        """
+        deadline = None if timeout is None else self.clock() + timeout
+        with self._cond:
+            while True:
+                now = self.clock()
+                if self._knocks and now - self._knocks[-1] >= self.settings.group_gap:
+                    return self._close(now)
+                if cancelled is not None and cancelled():
+                    return None
+                waits = [check_every] if check_every is not None else []
+                if self._knocks:
+                    waits.append(self._knocks[-1] + self.settings.group_gap - now)
+                elif deadline is not None:
+                    if now >= deadline:
+                        return None
+                    waits.append(deadline - now)
+                self._cond.wait(min(waits) if waits else None)
+
+    def _close(self, now: float) -> KnockGroup:
+        group = KnockGroup(self._knocks, now)
+        self._knocks = []
+        return self.check(group)
+
+    def check(self, group: KnockGroup) -> KnockGroup:
+        group.error = rhythm_error(group.intervals, self.settings.pattern)
+        group.matched = group.error is not None and group.error <= self.settings.tolerance
+        return group
+
+
+def play(device, intervals: tuple[float, ...], jitter: float = 0.0, tempo: float = 1.0) -> None:
+    """Presses a simulated input in the given rhythm, each gap off by up to ``jitter``."""
+    device.press()
+    for gap in intervals:
+        time.sleep(max(0.0, gap * tempo * (1 + random.uniform(-jitter, jitter))))
+        device.press()
+
+
+def _listen(settings: KnockSettings) -> tuple[KnockDetector, object]:
+    detector = KnockDetector(settings)
+    device = open_input(settings.pin)
+    device.when_activated = detector.edge
+    return detector, device
+
+
+def _cmd_listen(args: argparse.Namespace) -> int:
+    settings = KnockSettings.from_env()
+    detector, device = _listen(settings)
+    print(f"Listening for knocks on GPIO{settings.pin}... (Ctrl+C to exit)")
+    try:
+        while True:
+            group = detector.wait_group()
+            print(f"{'MATCH' if group.matched else 'no match'}: {group.describe()}")
+            if args.once:
+                return 0 if group.matched else 1
+    except KeyboardInterrupt:
+        return 0
+    finally:
+        device.close()
+
+
+def _cmd_record(args: argparse.Namespace) -> int:
+    settings = KnockSettings.from_env()
+    detector, device = _listen(settings)
+    print(f"Knock your rhythm on GPIO{settings.pin}...")
+    try:
+        group = detector.wait_group(timeout=args.timeout)
+    finally:
+        device.close()
+    if group is None or len(group.times) < 2:
+        print("Need at least two knocks.")
+        return 1
+    print(f"Recorded {group.describe()}.")
+    print("KNOCK_PATTERN=" + ",".join(f"{gap:.2f}" for gap in group.intervals))
+    return 0
+
+
+def _cmd_simulate(args: argparse.Namespace) -> int:
+    settings = KnockSettings.from_env()
+    rhythm = tuple(float(p) for p in args.rhythm.split(",")) if args.rhythm else settings.pattern
+    detector = KnockDetector(settings)
+    device = sim_gpio.SimDigitalInputDevice(settings.pin)
+    device.when_activated = detector.edge
+    print(f"Playing {len(rhythm) + 1} simulated knocks (jitter {args.jitter:.0%}, tempo x{args.tempo:g})...")
+    player = threading.Thread(target=play, args=(device, rhythm, args.jitter, args.tempo), daemon=True)
+    player.start()
+    group = detector.wait_group(timeout=5)
+    player.join()
+    if group is None:
+        print("No knock group detected.")
+        return 1
+    print(f"{'MATCH' if group.matched else 'no match'}: {group.describe()}")
+    return 0 if group.matched else 1
+
+
+def add_subcommand(subparsers) -> None:
+    parser = subparsers.add_parser("knock", help="Knock sensor utilities.")
+    actions = parser.add_subparsers(dest="knock_action", required=True)
+    listen = actions.add_parser("listen", help="Print each knock group and whether it matches.")
+    listen.add_argument("--once", action="store_true", help="Exit after one group; non-zero if it did not match.")
+    listen.set_defaults(handler=_cmd_listen)
+    record = actions.add_parser("record", help="Measure a rhythm and print it as KNOCK_PATTERN.")
+    record.add_argument("--timeout", type=float, default=30.0, help="Seconds to wait for the first knock.")
+    record.set_defaults(handler=_cmd_record)
+    simulate = actions.add_parser("simulate", help="Play a rhythm on a simulated input and match it.")
+    simulate.add_argument("--rhythm", help="Comma-separated gaps to play (default: the secret pattern).")
+    simulate.add_argument("--jitter", type=float, default=0.1, help="Random error per gap, as a fraction.")
+    simulate.add_argument("--tempo", type=float, default=1.0, help="Scale all gaps (2 = twice as slow).")
+    simulate.set_defaults(handler=_cmd_simulate)
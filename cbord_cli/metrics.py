@@ -0,0 +1,301 @@
+from __future__ import annotations
+
+import argparse
+import atexit
+import bisect
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+METRICS_DIR = Path(os.getenv("CBORD_METRICS_DIR", Path(__file__).parent / ".metrics"))
+JSONL_NAME = "metrics.jsonl"
+PROM_NAME = "metrics.prom"
+JSONL_MAX_BYTES = 1_000_000
+JSONL_BACKUPS = 3
+# Runs finishing within this many seconds of each other share one export.
+EXPORT_DELAY = 1.0
+
+# Seconds; spans a single camera frame up to a full step timeout.
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+Labels = tuple[tuple[str, str], ...]
+
+
+def _labels(values: dict[str, object]) -> Labels:
+    return tuple(sorted((key, str(value)) for key, value in values.items()))
+
+
+class Histogram:
+    def __init__(self, buckets: tuple[float, ...] = DEFAULT_BUCKETS) -> None:
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def quantile(self, q: float) -> float | None:
+        """Upper bound of the bucket holding the ``q`` quantile."""
+        if self.count == 0:
+            return None
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip((*self.buckets, float("inf")), self.counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+    def to_dict(self) -> dict:
+        return {"buckets": list(self.buckets), "counts": list(self.counts), "sum": self.sum, "count": self.count}
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Histogram":
+        histogram = cls(tuple(data["buckets"]))
+        histogram.counts = list(data["counts"])
+        histogram.sum = data["sum"]
+        histogram.count = data["count"]
+        return histogram
+
+
+class Registry:
+    """In-memory counters and latency histograms, keyed by name and labels."""
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self._counters: dict[tuple[str, Labels], float] = {}
+        self._histograms: dict[tuple[str, Labels], Histogram] = {}
+        self._lock = threading.Lock()
+
+    def inc(self, name: str, value: float = 1.0, **labels: object) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0.0) + value
+
+    def observe(self, name: str, seconds: float, **labels: object) -> None:
+        key = (name, _labels(labels))
+        with self._lock:
+            histogram = self._histograms.get(key)
+            if histogram is None:
+                histogram = self._histograms[key] = Histogram()
+            histogram.observe(seconds)
+
+    @contextmanager
+    def timer(self, name: str, **labels: object) -> Iterator[dict[str, object]]:
+        """Times the block; labels added to the yielded dict are recorded too."""
+        extra: dict[str, object] = {}
+        start = time.perf_counter()
+        try:
+            yield extra
+        finally:
+            self.observe(name, time.perf_counter() - start, **labels, **extra)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "ts": time.time(),
+                "pid": os.getpid(),
+                "started": self.started,
+                "counters": [
+                    {"name": name, "labels": dict(labels), "value": value}
+                    for (name, labels), value in sorted(self._counters.items())
+                ],
+                "histograms": [
+                    {"name": name, "labels": dict(labels), **histogram.to_dict()}
+                    for (name, labels), histogram in sorted(self._histograms.items())
+                ],
+            }
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counters.clear()
+            self._histograms.clear()
+
+
+def _format_labels(labels: dict[str, str], extra: tuple[str, str] | None = None) -> str:
+    items = list(labels.items()) + ([extra] if extra else [])
+    if not items:
+        return ""
+    body = ",".join(f'{key}="{value}"' for key, value in items)
+    return "{" + body + "}"
+
+
+def to_prometheus(snapshot: dict) -> str:
+    lines: list[str] = []
+    typed: set[str] = set()
+    for counter in snapshot["counters"]:
+        if counter["name"] not in typed:
+            lines.append(f"# TYPE {counter['name']} counter")
+            typed.add(counter["name"])
+        lines.append(f"{counter['name']}{_format_labels(counter['labels'])} {counter['value']:g}")
+    for item in snapshot["histograms"]:
+        name, labels = item["name"], item["labels"]
+        if name not in typed:
+            lines.append(f"# TYPE {name} histogram")
+            typed.add(name)
+        cumulative = 0
+        for bound, count in zip((*item["buckets"], "+Inf"), item["counts"]):
+            cumulative += count
+            le = bound if isinstance(bound, str) else f"{bound:g}"
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', le))} {cumulative}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {item['sum']:.6f}")
+        lines.append(f"{name}_count{_format_labels(labels)} {item['count']}")
+    return "\n".join(lines) + "\n"
+
+
+def _rotate(path: Path, max_bytes: int, backups: int) -> None:
+    if not path.exists() or path.stat().st_size < max_bytes:
+        return
+    for index in range(backups - 1, 0, -1):
+        older = path.with_name(f"{path.name}.{index}")
+        if older.exists():
+            os.replace(older, path.with_name(f"{path.name}.{index + 1}"))
+    os.replace(path, path.with_name(f"{path.name}.1"))
+
+
+def export(directory: Path = METRICS_DIR) -> None:
+    """Appends a snapshot to the rotating JSONL file and rewrites the .prom file."""
+    snapshot = registry.snapshot()
+    directory.mkdir(parents=True, exist_ok=True)
+
+    jsonl = directory / JSONL_NAME
+    _rotate(jsonl, JSONL_MAX_BYTES, JSONL_BACKUPS)
+    with jsonl.open("a") as f:
+        f.write(json.dumps(snapshot, separators=(",", ":")) + "\n")
+
+    # Atomic so a node_exporter textfile collector never reads a partial file.
+    fd, tmp = tempfile.mkstemp(dir=directory, prefix=".metrics-", suffix=".prom")
+    with os.fdopen(fd, "w") as f:
+        f.write(to_prometheus(snapshot))
+    os.replace(tmp, directory / PROM_NAME)
+
+
+class Exporter:
+    """Runs ``export()`` on a background thread so a run never waits on the SD card.
+
+    ``request()`` only sets a flag; requests made while one is pending are
+    covered by the same export. A pending export is written at exit.
+    """
+
+    def __init__(self, directory: Path = METRICS_DIR, delay: float = EXPORT_DELAY) -> None:
+        self.directory = directory
+        self.delay = delay
+        self._pending = False
+        self._wake = threading.Event()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._registered = False
+        self._failing = False
+
+    def request(self) -> None:
+        self._pending = True
+        self._wake.set()
+        thread = self._thread
+        if thread is None or not thread.is_alive():
+            self._start()
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="metrics-export", daemon=True)
+            self._thread.start()
+            if not self._registered:
+                atexit.register(self.close)
+                self._registered = True
+
+    def _run(self) -> None:
+        while True:
+            self._wake.wait()
+            stopping = self._stop.wait(self.delay)
+            self._wake.clear()
+            if self._pending:
+                self._pending = False
+                self._export()
+            if stopping:
+                return
+
+    def _export(self) -> None:
+        try:
+            export(self.directory)
+        except (OSError, ValueError) as exc:
+            if not self._failing:
+                print(f"Could not export metrics ({exc}).")
+            self._failing = True
+            return
+        self._failing = False
+
+    def close(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is not None:
+            self._stop.set()
+            self._wake.set()
+            thread.join(timeout=5)
+
+
+registry = Registry()
+inc = registry.inc
+observe = registry.observe
+timer = registry.timer
+exporter = Exporter()
+
+
+def _last_snapshot(directory: Path) -> dict | None:
+    path = directory / JSONL_NAME
+    if not path.exists():
+        return None
+    lines = path.read_text().splitlines()
+    return json.loads(lines[-1]) if lines else None
+
+
+def _cmd_summary(args: argparse.Namespace) -> int:
+    snapshot = _last_snapshot(Path(args.dir))
+    if snapshot is None:
+        print(f"No metrics exported to {args.dir} yet.")
+        return 1
+
+    print(f"Metrics from pid {snapshot['pid']} at {time.ctime(snapshot['ts'])}:")
+    print(f"  {'metric':<34} {'labels':<38} {'count':>6} {'mean':>8} {'p50<=':>7} {'p95<=':>7}")
+    rows = []
+    for item in snapshot["histograms"]:
+        histogram = Histogram.from_dict(item)
+        mean = histogram.sum / histogram.count if histogram.count else 0.0
+        rows.append((histogram.sum, item, histogram, mean))
+    # Largest total time first: that is where unlock time goes.
+    for _, item, histogram, mean in sorted(rows, key=lambda row: row[0], reverse=True):
+        labels = ",".join(f"{k}={v}" for k, v in item["labels"].items())
+        print(
+            f"  {item['name']:<34} {labels:<38} {histogram.count:>6} {mean:>7.3f}s "
+            f"{histogram.quantile(0.5):>6g}s {histogram.quantile(0.95):>6g}s"
+        )
+    for counter in snapshot["counters"]:
+        labels = ",".join(f"{k}={v}" for k, v in counter["labels"].items())
+        print(f"  {counter['name']:<34} {labels:<38} {counter['value']:>6g}")
+    return 0
+
+
+def _cmd_prometheus(args: argparse.Namespace) -> int:
+    path = Path(args.dir) / PROM_NAME
+    if not path.exists():
+        print(f"No metrics exported to {args.dir} yet.")
+        return 1
+    print(path.read_text(), end="")
+    return 0
+
+
+def add_subcommand(subparsers) -> None:
+    parser = subparsers.add_parser("metrics", help="Show exported latency metrics.")
+    parser.add_argument("--dir", default=str(METRICS_DIR), help="Metrics directory.")
+    actions = parser.add_subparsers(dest="metrics_action", required=True)
+    actions.add_parser("summary", help="Latency table from the latest snapshot.").set_defaults(handler=_cmd_summary)
+    actions.add_parser("prometheus", help="Print the Prometheus text file.").set_defaults(handler=_cmd_prometheus)
@@ -0,0 +1,140 @@
+from __future__ import annotations
+
+import math
+import threading
+import time
+from dataclasses import dataclass, field
+
+TRAPEZOID = "trapezoid"
+S_CURVE = "s-curve"
+PROFILES = (TRAPEZOID, S_CURVE)
+
+
+class SystemClock:
+    def now(self) -> float:
+        return time.monotonic()
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds)
+
+    def wait(self, event: threading.Event, seconds: float | None) -> bool:
+        return event.wait(None if seconds is None else max(0.0, seconds))
+
+
+def _shape(x: float, profile: str) -> float:
+    if profile == S_CURVE:
+        # Raised cosine: zero slope at both ends, so no jerk at start or top speed.
+        return 0.5 - 0.5 * math.cos(math.pi * x)
+    return x
+
+
+def duty_table(target: float, ramp_seconds: float, interval: float, profile: str = TRAPEZOID) -> tuple[float, ...]:
+    """Duty cycles for a ramp from 0 to ``target``, one per ``interval``."""
+    if profile not in PROFILES:
+        raise ValueError(f"Unknown motion profile '{profile}'; choose one of {PROFILES}.")
+    steps = max(1, round(ramp_seconds / interval))
+    return tuple(round(target * _shape(i / steps, profile), 4) for i in range(steps + 1))
+
+
+@dataclass(frozen=True)
+class MotionProfile:
+    speed: float
+    ramp_seconds: float
+    interval: float = 0.02
+    profile: str = TRAPEZOID
+    ramp_up: tuple[float, ...] = field(init=False, repr=False)
+    ramp_down: tuple[float, ...] = field(init=False, repr=False)
+
+    def __post_init__(self) -> None:
+        table = duty_table(self.speed, self.ramp_seconds, self.interval, self.profile)
+        object.__setattr__(self, "ramp_up", table)
+        object.__setattr__(self, "ramp_down", tuple(reversed(table)))
+
+    @property
+    def ramp_duration(self) -> float:
+        return (len(self.ramp_up) - 1) * self.interval
+
+
+@dataclass
+class TimingReport:
+    planned: float
+    actual: float
+    updates: int
+    max_late: float
+    mean_late: float
+
+    @property
+    def drift(self) -> float:
+        return self.actual - self.planned
+
+    def summary(self) -> str:
+        return (
+            f"planned {self.planned:.3f}s, actual {self.actual:.3f}s "
+            f"(drift {self.drift * 1000:+.1f} ms), {self.updates} duty updates, "
+            f"late max {self.max_late * 1000:.1f} ms / mean {self.mean_late * 1000:.1f} ms"
+        )
+
+
+class MotionRun:
+    """Plays one move (ramp up, cruise, ramp down) against monotonic deadlines.
+
+    Every duty update is scheduled from the move's start time rather than
+    from the previous sleep, so scheduler jitter delays single updates but
+    never accumulates into the total move time.
+    """
+
+    def __init__(self, pin, profile: MotionProfile, clock) -> None:
+        self.pin = pin
+        self.profile = profile
+        self.clock = clock
+        self.start = clock.now()
+        self.cursor = self.start
+        self._lateness: list[float] = []
+
+    def _play(self, table: tuple[float, ...]) -> None:
+        interval = self.profile.interval
+        start = self.cursor
+        for i, duty in enumerate(table):
+            deadline = start + i * interval
+            delay = deadline - self.clock.now()
+            if delay > 0:
+                self.clock.sleep(delay)
+            self.pin.value = duty
+            self._lateness.append(max(0.0, self.clock.now() - deadline))
+        self.cursor = start + (len(table) - 1) * interval
+
+    def ramp_up(self) -> None:
+        self._play(self.profile.ramp_up)
+
+    def cruise_until(self, seconds: float) -> float:
+        """Advances the schedule by ``seconds`` and returns the cruise deadline."""
+        self.cursor += seconds
+        return self.cursor
+
+    def ramp_down(self, now: bool = False) -> None:
+        if now:
+            self.cursor = self.clock.now()
+        self._play(self.profile.ramp_down)
+        self.pin.off()
+
+    def report(self) -> TimingReport:
+        lateness = self._lateness or [0.0]
+        return TimingReport(
+            planned=self.cursor - self.start,
+            actual=self.clock.now() - self.start,
+            updates=len(self._lateness),
+            max_late=max(lateness),
+            mean_late=sum(lateness) / len(lateness),
+        )
+
+
+def run_move(pin, profile: MotionProfile, cruise_seconds: float, clock) -> TimingReport:
+    run = MotionRun(pin, profile, clock)
+    run.ramp_up()
+    deadline = run.cruise_until(cruise_seconds)
+    delay = deadline - clock.now()
+    if delay > 0:
+        clock.sleep(delay)
+    run.ramp_down()
+    return run.report()
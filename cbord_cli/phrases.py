@@ -0,0 +1,87 @@
+from __future__ import annotations
+
+import atexit
+import json
+import os
+import random
+import tempfile
+import threading
+from pathlib import Path
+
+_rng = random.SystemRandom()
+
+
+class PhraseRotation:
+    """Shuffle-bag phrase picker whose state lives in memory.
+
+    Each bag is drawn without replacement and refilled (reshuffled) when
+    empty, never starting a new round with the previous phrase. State is
+    written back with an atomic rename at most once per ``debounce`` seconds
+    and again at interpreter exit, so picking a phrase never touches disk.
+    """
+
+    def __init__(self, state_file: Path, debounce: float = 30.0) -> None:
+        self.state_file = Path(state_file)
+        self.debounce = debounce
+        self._state: dict[str, object] | None = None
+        self._dirty = False
+        self._timer: threading.Timer | None = None
+        self._lock = threading.Lock()  # taken by next() on the speaking path
+        self._write_lock = threading.Lock()  # keeps writes in snapshot order
+        atexit.register(self.flush)
+
+    def _load(self) -> dict[str, object]:
+        if self._state is None:
+            try:
+                self._state = json.loads(self.state_file.read_text())
+            except (OSError, json.JSONDecodeError):  # first run, or a torn file: fresh bags
+                self._state = {}
+            if not isinstance(self._state, dict):
+                self._state = {}
+        return self._state
+
+    def next(self, phrases: list[str], bag_key: str) -> str:
+        with self._lock:
+            state = self._load()
+            bag = [phrase for phrase in state.get(bag_key, []) if phrase in phrases]
+            last = state.get("last")
+
+            if not bag:
+                bag = phrases.copy()
+                _rng.shuffle(bag)
+                if last and len(bag) > 1 and bag[0] == last:
+                    bag[0], bag[1] = bag[1], bag[0]
+
+            phrase = bag.pop(0)
+            state[bag_key] = bag
+            state["last"] = phrase
+            self._mark_dirty()
+            return phrase
+
+    def _mark_dirty(self) -> None:
+        self._dirty = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.debounce, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def flush(self) -> None:
+        with self._write_lock:
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if not self._dirty or self._state is None:
+                    return
+                self._dirty = False
+                data = json.dumps(self._state)
+            # File I/O happens outside _lock so a slow SD card never stalls next().
+            self.state_file.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_name = tempfile.mkstemp(prefix=self.state_file.name, dir=self.state_file.parent)
+            try:
+                with os.fdopen(fd, "w") as fh:
+                    fh.write(data)
+                os.replace(tmp_name, self.state_file)
+            finally:
+                if os.path.exists(tmp_name):
+                    os.remove(tmp_name)
@@ -0,0 +1,244 @@
+from __future__ import annotations
+
+import dataclasses
+import json
+import os
+import threading
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List
+
+from cbord_cli.config import CONFIG_PATH, AppConfig, load_config
+from cbord_cli.runner import STEP_TYPES
+from cbord_cli.workers import WorkerStep
+
+# Trigger sources that drive a step's device from this process, so that
+# step cannot also run in a worker.
+_SOURCE_STEPS = {"knock": "knock", "finger": "fingerprint", "motion": "face_recognition", "wake_word": "word_detection"}
+
+
+class PlanError(ValueError):
+    def __init__(self, problems: List[str]) -> None:
+        super().__init__("; ".join(problems))
+        self.problems = problems
+
+
+@dataclass
+class PipelinePlan:
+    """A validated config together with the step instances that run it.
+
+    ``replaced`` names the steps whose instances are new compared with the
+    plan this one was compiled against; ``retired`` holds the old instances
+    the caller should close once no run is using them.
+    """
+
+    config: AppConfig
+    steps: Dict[str, object]
+    params: Dict[str, str]
+    replaced: List[str] = field(default_factory=list)
+    retired: Dict[str, object] = field(default_factory=dict)
+
+
+def _coerce(default: Any, value: Any) -> Any:
+    """``value`` from JSON converted to the type of the field's default."""
+    if dataclasses.is_dataclass(default):
+        if not isinstance(value, dict):
+            raise TypeError("expected an object")
+        known = {f.name for f in dataclasses.fields(default)}
+        unknown = sorted(set(value) - known)
+        if unknown:
+            raise TypeError(f"unknown key '{unknown[0]}'")
+        return dataclasses.replace(default, **{k: _coerce(getattr(default, k), v) for k, v in value.items()})
+    if default is None:
+        return value
+    if isinstance(default, bool):
+        if not isinstance(value, bool):
+            raise TypeError("expected true or false")
+        return value
+    if isinstance(default, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise TypeError("expected a number")
+        if isinstance(default, int) and value != int(value):
+            raise TypeError("expected a whole number")
+        return type(default)(value)
+    if isinstance(default, Path):
+        if not isinstance(value, str):
+            raise TypeError("expected a path")
+        return Path(value)
+    if isinstance(default, str):
+        if not isinstance(value, str):
+            raise TypeError("expected a string")
+        return value
+    if isinstance(default, tuple):
+        if not isinstance(value, list):
+            raise TypeError("expected a list")
+        if default and len(set(map(type, default))) == 1:
+            return tuple(_coerce(default[0], item) for item in value)
+        return tuple(value)
+    return value
+
+
+def _step_kwargs(name: str, step_type: type, params: Dict[str, Any], problems: List[str]) -> Dict[str, Any]:
+    fields = {
+        f.name: f for f in dataclasses.fields(step_type) if f.init and f.name != "name" and not f.name.startswith("_")
+    }
+    kwargs = {}
+    for key, value in params.items():
+        if key not in fields:
+            problems.append(f"{name}: unknown parameter '{key}' (known: {', '.join(sorted(fields))})")
+            continue
+        spec = fields[key]
+        default = spec.default if spec.default is not dataclasses.MISSING else spec.default_factory()
+        try:
+            kwargs[key] = _coerce(default, value)
+        except (TypeError, ValueError) as exc:
+            problems.append(f"{name}.{key}: {exc}")
+    return kwargs
+
+
+def _usable_cpus() -> set:
+    if hasattr(os, "sched_getaffinity"):
+        return set(os.sched_getaffinity(0))
+    return set(range(os.cpu_count() or 1))
+
+
+def _worker_cpus(index: int) -> List[int] | None:
+    """Default pinning: one core per worker, leaving the lowest to the runner."""
+    cores = sorted(_usable_cpus())
+    if len(cores) < 2:
+        return None
+    return [cores[1 + index % (len(cores) - 1)]]
+
+
+def validate(config: AppConfig, step_types: Dict[str, type] = STEP_TYPES) -> List[str]:
+    """Problems that would stop ``config`` from running; empty if it is fine."""
+    problems: List[str] = []
+    seen = set()
+    groups = set()
+    if config.retries < 1:
+        problems.append("retries must be at least 1")
+    if config.timeout is not None and config.timeout <= 0:
+        problems.append("timeout must be positive")
+    for step in config.steps:
+        if step.name not in step_types:
+            problems.append(f"unknown step '{step.name}' (known: {', '.join(step_types)})")
+        if step.name in seen:
+            problems.append(f"step '{step.name}' is listed twice")
+        seen.add(step.name)
+        if step.retries is not None and step.retries < 1:
+            problems.append(f"{step.name}: retries must be at least 1")
+        if step.timeout is not None and step.timeout <= 0:
+            problems.append(f"{step.name}: timeout must be positive")
+        if step.group is not None:
+            groups.add(step.group)
+        if step.cpus is not None:
+            if not step.worker:
+                problems.append(f"{step.name}: cpus only applies with \"worker\": true")
+            unknown = sorted(set(step.cpus) - _usable_cpus())
+            if not step.cpus or unknown:
+                problems.append(f"{step.name}: cpus must be a non-empty subset of {sorted(_usable_cpus())}")
+    workers = {step.name for step in config.steps if step.worker}
+    for source in config.triggers.sources:
+        name = _SOURCE_STEPS[source]
+        if name in workers and not (source == "finger" and config.triggers.finger_pin is not None):
+            problems.append(f"trigger '{source}' uses the {name} device here, so {name} cannot run in a worker")
+    for group in config.groups:
+        if group not in groups:
+            problems.append(f"group '{group}' has a mode but no steps")
+    return problems
+
+
+def compile_plan(
+    config: AppConfig, previous: PipelinePlan | None = None, step_types: Dict[str, type] = STEP_TYPES
+) -> PipelinePlan:
+    """Validates ``config`` and builds its steps, reusing ``previous`` instances whose parameters match.
+
+    Every known step gets an instance, enabled or not, since trigger
+    sources use the steps' devices; steps marked ``worker`` get a
+    ``WorkerStep`` instead. Raises ``PlanError`` listing every problem found.
+    """
+    problems = validate(config, step_types)
+    configured = {step.name: step.params for step in config.steps}
+    kwargs = {
+        name: _step_kwargs(name, step_type, configured.get(name, {}), problems)
+        for name, step_type in step_types.items()
+    }
+    if problems:
+        raise PlanError(problems)
+
+    steps: Dict[str, object] = {}
+    params: Dict[str, str] = {}
+    replaced: List[str] = []
+    workers = {step.name: step for step in config.steps if step.worker}
+    for name, step_type in step_types.items():
+        cpus = None
+        if name in workers:
+            cpus = workers[name].cpus or _worker_cpus(list(workers).index(name))
+        params[name] = json.dumps([configured.get(name, {}), name in workers, cpus], sort_keys=True)
+        if previous is not None and previous.params.get(name) == params[name] and name in previous.steps:
+            steps[name] = previous.steps[name]
+        elif name in workers:
+            steps[name] = WorkerStep(name, kwargs[name], cpus, factor=getattr(step_type, "factor", True))
+            replaced.append(name)
+        else:
+            steps[name] = step_type(**kwargs[name])
+            replaced.append(name)
+    retired = {}
+    if previous is not None:
+        retired = {name: step for name, step in previous.steps.items() if steps.get(name) is not step}
+    return PipelinePlan(config, steps, params, replaced if previous is not None else [], retired)
+
+
+def load_plan(path: Path = CONFIG_PATH, previous: PipelinePlan | None = None) -> PipelinePlan:
+    try:
+        config = load_config(path)
+    except (OSError, TypeError, ValueError) as exc:
+        raise PlanError([f"{path}: {exc}"]) from exc
+    return compile_plan(config, previous)
+
+
+class ConfigWatcher:
+    """Notices changes to the config file by its modification time and size.
+
+    A stat every ``interval`` seconds costs nothing measurable, and needs no
+    inotify support from the SD card's filesystem or extra packages.
+    """
+
+    def __init__(self, path: Path = CONFIG_PATH, interval: float = 1.0) -> None:
+        self.path = path
+        self.interval = interval
+        self._seen = self._stamp()
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _stamp(self) -> tuple[int, int] | None:
+        try:
+            stat = self.path.stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def mark(self) -> None:
+        """Accepts the file as it is now, e.g. after writing it ourselves."""
+        self._seen = self._stamp()
+
+    def changed(self) -> bool:
+        stamp = self._stamp()
+        if stamp is None or stamp == self._seen:
+            return False
+        self._seen = stamp
+        return True
+
+    def start(self, on_change: Callable[[], None]) -> None:
+        def loop() -> None:
+            while not self._stop.wait(self.interval):
+                if self.changed():
+                    on_change()
+
+        self._thread = threading.Thread(target=loop, name="config-watcher", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2)
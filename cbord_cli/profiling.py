@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator
+
+PROFILE_DIR = Path(os.getenv("CBORD_PROFILE_DIR", Path(__file__).parent / ".profiles"))
+SAMPLE_INTERVAL = 0.005
+KEEP_RUNS = 20
+
+_enabled = os.getenv("CBORD_PROFILE", "0") == "1"
+_top = int(os.getenv("CBORD_PROFILE_TOP", "15"))
+
+
+def enable(on: bool = True, top: int | None = None) -> None:
+    global _enabled, _top
+    _enabled = on
+    if top is not None:
+        _top = top
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+# Leaf frames of threads that are blocked rather than running; only used
+# where per-thread CPU clocks are not available.
+_IDLE_LEAVES = {("threading.py", "wait"), ("queue.py", "get"), ("selectors.py", "select")}
+
+# A thread counts as running if it used at least this share of the wall
+# time since the previous sample; below it, it was blocked in a C call
+# (sleep, serial or pipe read) for most of the interval.
+BUSY_SHARE = 0.25
+
+
+def _is_idle(frame) -> bool:
+    return (Path(frame.f_code.co_filename).name, frame.f_code.co_name) in _IDLE_LEAVES
+
+
+def _thread_cpu(ident: int) -> float | None:
+    """CPU seconds used by thread ``ident`` so far; None if it cannot be read."""
+    try:
+        return time.clock_gettime(time.pthread_getcpuclockid(ident))
+    except (AttributeError, OSError):
+        return None  # not on this platform, or the thread has just exited
+
+
+def _frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{Path(code.co_filename).name}:{code.co_firstlineno}({code.co_name})"
+
+
+class Sampler:
+    """Samples the stacks of every thread with ``sys._current_frames``.
+
+    Unlike cProfile it adds no per-call overhead and sees threads the
+    profiled code did not start itself (recognizer, speech, actuator).
+    Each thread's CPU clock decides whether it was running since the last
+    sample, so threads blocked in C calls are not counted as busy.
+    """
+
+    def __init__(self, interval: float = SAMPLE_INTERVAL) -> None:
+        self.interval = interval
+        self.samples = 0
+        self.thread_samples = 0  # stacks seen while a thread was not blocked
+        # False where threads' CPU clocks cannot be read; "own" then counts
+        # wall-clock samples of threads not waiting on a lock or queue.
+        self.cpu_clocks = True
+        self.own: Counter[str] = Counter()  # leaf function: where the CPU actually was
+        self.total: Counter[str] = Counter()  # anywhere on the stack
+        self.stacks: Counter[str] = Counter()  # "thread;outer;...;leaf" for flame graphs
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._thread = threading.Thread(target=self._run, name="profile-sampler", daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+
+    def _busy(self, ident: int, frame, cpu: dict[int, float], elapsed: float) -> bool:
+        if self.cpu_clocks:
+            used = _thread_cpu(ident)
+            if used is not None:
+                before, cpu[ident] = cpu.get(ident), used
+                return before is not None and used - before >= BUSY_SHARE * elapsed
+            if ident == threading.main_thread().ident:
+                self.cpu_clocks = False  # no clocks at all, not just an exited thread
+        return not self.cpu_clocks and not _is_idle(frame)
+
+    def _run(self) -> None:
+        me = threading.get_ident()
+        cpu: dict[int, float] = {}
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            elapsed, last = now - last, now
+            names = {thread.ident: thread.name for thread in threading.enumerate()}
+            for ident, frame in sys._current_frames().items():
+                if ident == me or not self._busy(ident, frame, cpu, elapsed):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(_frame_name(frame))
+                    frame = frame.f_back
+                if not stack:
+                    continue
+                self.thread_samples += 1
+                self.own[stack[0]] += 1
+                self.total.update(set(stack))
+                self.stacks[";".join([names.get(ident, str(ident)), *reversed(stack)])] += 1
+            self.samples += 1
+
+
+class RunProfile:
+    """cProfile per step plus an all-thread sampling profile for one run."""
+
+    def __init__(self) -> None:
+        self.started = time.time()
+        self.steps: dict[str, cProfile.Profile] = {}
+        self.sampler = Sampler()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def step(self, name: str) -> Iterator[None]:
+        with self._lock:
+            profile = self.steps.setdefault(name, cProfile.Profile())
+        try:
+            profile.enable()
+            active = True
+        except ValueError:
+            # Only one deterministic profiler can be active at a time on some
+            # Pythons; concurrent group members are covered by the sampler.
+            active = False
+        try:
+            yield
+        finally:
+            if active:
+                profile.disable()
+
+    def write(self, directory: Path) -> Path:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        run_dir = directory / f"run-{stamp}-{int(self.started * 1000) % 1000:03d}"
+        run_dir.mkdir(parents=True, exist_ok=True)
+        for name, profile in self.steps.items():
+            profile.dump_stats(str(run_dir / f"{name}.prof"))
+        with (run_dir / "samples.folded").open("w") as f:
+            for stack, count in self.sampler.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+        (run_dir / "summary.txt").write_text(self.summary(_top))
+        for old in sorted(directory.glob("run-*"))[:-KEEP_RUNS]:
+            for path in old.iterdir():
+                path.unlink()
+            old.rmdir()
+        return run_dir
+
+    def summary(self, top: int) -> str:
+        out = io.StringIO()
+        sampler = self.sampler
+        samples = max(1, sampler.thread_samples)
+        if sampler.cpu_clocks:
+            kept = "threads that were using the CPU"
+        else:
+            kept = "wall-clock samples; only lock and queue waits excluded, not sleeps or I/O"
+        out.write(
+            f"Sampled all threads {sampler.samples} times every {sampler.interval * 1000:.0f} ms; "
+            f"{sampler.thread_samples} thread stacks ({kept}).\n"
+        )
+        out.write(f"{'own %':>7} {'total %':>8}  function\n")
+        for name, count in sampler.own.most_common(top):
+            out.write(f"{100 * count / samples:>6.1f}% {100 * sampler.total[name] / samples:>7.1f}%  {name}\n")
+        for name, profile in self.steps.items():
+            stream = io.StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            if not stats.stats:
+                continue
+            stats.sort_stats(pstats.SortKey.TIME).print_stats(top)
+            # Drop pstats' preamble down to the column header.
+            text = stream.getvalue()
+            table = text[text.find("   ncalls") :] if "   ncalls" in text else text
+            out.write(f"\n[{name}] cProfile, top {top} by own time:\n{table.rstrip()}\n")
+        return out.getvalue()
+
+
+_current: RunProfile | None = None
+
+
+def start() -> RunProfile | None:
+    global _current
+    if not _enabled:
+        _current = None
+        return None
+    _current = RunProfile()
+    _current.sampler.start()
+    return _current
+
+
+def finish() -> Path | None:
+    global _current
+    run, _current = _current, None
+    if run is None:
+        return None
+    run.sampler.stop()
+    print("\n" + run.summary(_top))
+    try:
+        path = run.write(PROFILE_DIR)
+    except OSError as exc:
+        print(f"Could not write profile ({exc}).")
+        return None
+    print(f"Profile written to {path}")
+    return path
+
+
+@contextmanager
+def step(name: str) -> Iterator[None]:
+    run = _current
+    if run is None:
+        yield
+        return
+    with run.step(name):
+        yield
@@ -1,68 +1,323 @@
 from __future__ import annotations
 
 import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from pathlib import Path
 from typing import Dict, List
 
-from cbord_cli.config import AppConfig
+from cbord_cli.config import AppConfig, StepConfig
+from cbord_cli.steps.base import PipelineContext, StepResult, StepScope
 from cbord_cli.steps.face_recognition import FaceRecognitionStep
 from cbord_cli.steps.fingerprint import FingerprintStep
+from cbord_cli.steps.knock import KnockStep
 from cbord_cli.steps.motor_controller import MotorControllerStep
 from cbord_cli.steps.word_detection import WordDetectionStep
-from cbord_cli import tts
+from cbord_cli import access_log, metrics, profiling, sessions, tracing, triggers, tts
+
+
+STEP_TYPES = {
+    "knock": KnockStep,
+    "word_detection": WordDetectionStep,
+    "fingerprint": FingerprintStep,
+    "face_recognition": FaceRecognitionStep,
+    "motor_controller": MotorControllerStep,
+}
 
 
 def build_steps() -> Dict[str, object]:
-    return {
-        "word_detection": WordDetectionStep(),
-        "fingerprint": FingerprintStep(),
-        "face_recognition": FaceRecognitionStep(),
-        "motor_controller": MotorControllerStep(),
-    }
+    return {name: step_type() for name, step_type in STEP_TYPES.items()}
 
 
-def run_pipeline(config: AppConfig) -> List[str]:
-    steps = build_steps()
-    errors: List[str] = []
+def warm_steps(steps: Dict[str, object], names: List[str] | None = None) -> Dict[str, str]:
+    """Calls ``warm()`` on steps that have it; returns errors by step name."""
+    errors: Dict[str, str] = {}
+    for name, step in steps.items():
+        # Worker processes load their models side by side while we wait on each.
+        start = getattr(step, "start", None)
+        if start is not None and (names is None or name in names):
+            start()
+    for name, step in steps.items():
+        warm = getattr(step, "warm", None)
+        if warm is None or (names is not None and name not in names):
+            continue
+        try:
+            with metrics.timer("cbord_step_phase_seconds", step=name, phase="warm"):
+                warm()
+        except Exception as exc:
+            # The step still works cold; it loads what it needs on its next run.
+            errors[name] = str(exc)
+            print(f"Could not warm {name} ({exc}).")
+    return errors
 
-    print("\nStarting authentication pipeline...")
+
+def close_steps(steps: Dict[str, object]) -> None:
+    for step in steps.values():
+        close = getattr(step, "close", None)
+        if close is not None:
+            close()
+
+
+def build_stages(config: AppConfig) -> List[List[StepConfig]]:
+    """Enabled steps in run order; steps sharing a group form one stage.
+
+    A group runs at the position of its first member.
+    """
+    stages: List[List[StepConfig]] = []
+    by_group: Dict[str, List[StepConfig]] = {}
     for step_config in config.steps:
         if not step_config.enabled:
             print(f"- Skipping {step_config.name} (disabled)")
             continue
+        if step_config.group is None:
+            stages.append([step_config])
+        elif step_config.group in by_group:
+            by_group[step_config.group].append(step_config)
+        else:
+            by_group[step_config.group] = [step_config]
+            stages.append(by_group[step_config.group])
+    return stages
 
-        step = steps.get(step_config.name)
-        if step is None:
-            errors.append(f"Unknown step '{step_config.name}'")
-            print(errors[-1])
-            return errors
 
-        print(f"- Running {step_config.name}")
-        success = False
-        for attempt in range(1, config.retries + 1):
-            print(f"  Attempt {attempt}/{config.retries}")
-            if step.run():
-                success = True
-                tts.speak_step_success(step_config.name)
-                break
-            if attempt < config.retries:
-                print("  Retrying...")
+def run_step(
+    step, step_config: StepConfig, context: PipelineContext | StepScope, retries: int
+) -> StepResult:
+    result = _attempt_step(step, step_config, context, step_config.retries or retries)
+    metrics.observe("cbord_step_seconds", result.elapsed, step=result.name, outcome=_outcome(result))
+    return result
+
+
+def _outcome(result: StepResult) -> str:
+    if result.success:
+        return "pass"
+    return "cancelled" if result.message == "cancelled" else "fail"
+
+
+def _attempt_step(
+    step, step_config: StepConfig, context: PipelineContext | StepScope, retries: int
+) -> StepResult:
+    name = step_config.name
+    start = time.monotonic()
+    for attempt in range(1, retries + 1):
+        if context.cancelled:
+            return StepResult(name, False, "cancelled", attempt - 1, time.monotonic() - start)
+        print(f"  [{name}] Attempt {attempt}/{retries}")
+        with metrics.timer("cbord_step_attempt_seconds", step=name) as labels:
+            with tracing.span(f"{name} attempt {attempt}", "runner") as span_args, profiling.step(name):
+                passed = step.run(context)
+                span_args["passed"] = passed
+            labels["result"] = "pass" if passed else "fail"
+        metrics.inc("cbord_step_attempts_total", step=name, result=labels["result"])
+        if passed:
+            tts.speak_step_success(name)
+            return StepResult(name, True, "passed", attempt, time.monotonic() - start)
+        if attempt < retries and not context.cancelled:
+            print(f"  [{name}] Retrying...")
+    if context.cancelled:
+        return StepResult(name, False, "cancelled", retries, time.monotonic() - start)
+    return StepResult(name, False, f"failed after {retries} retries", retries, time.monotonic() - start)
+
+
+def group_outcome(mode: str, result: StepResult) -> bool | None:
+    """The group's outcome if ``result`` decides it, otherwise None."""
+    if mode == "any" and result.success:
+        return True
+    if mode == "all" and not result.success:
+        return False
+    return None
+
+
+def _run_group(
+    group: str, mode: str, members: List[tuple[object, StepConfig]], context: PipelineContext, retries: int
+) -> bool:
+    """Runs the members concurrently; siblings are cancelled once the outcome is known."""
+    names = ", ".join(step_config.name for _, step_config in members)
+    print(f"- Running group '{group}' ({mode} of: {names})")
+
+    decided: bool | None = None
+    with ThreadPoolExecutor(max_workers=len(members), thread_name_prefix=f"group-{group}") as pool:
+        pending = {pool.submit(run_step, step, step_config, context, retries) for step, step_config in members}
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                result = future.result()
+                context.results[result.name] = result
+                if decided is None:
+                    decided = group_outcome(mode, result)
+            if decided is not None and pending:
+                context.cancel.set()
+    context.cancel.clear()
+    return finish_group([step_config.name for _, step_config in members], mode, decided, context)
+
+
+def finish_group(names: List[str], mode: str, decided: bool | None, context: PipelineContext) -> bool:
+    """Prints the members' results and applies the group's identity check."""
+    for name in names:
+        result = context.results[name]
+        state = "ok" if result.success else result.message
+        print(f"  {name}: {state} ({result.elapsed:.1f}s, {result.attempts} attempts)")
+
+    if decided is None:
+        decided = mode == "all"
+    if decided and mode == "all":
+        identities = {context.outputs.get(name, {}).get("identity") for name in names} - {None}
+        if len(identities) > 1:
+            print(f"  Factors disagree on identity: {', '.join(sorted(identities))}.")
+            return False
+        if identities:
+            context.identity = identities.pop()
+    return decided
+
+
+def run_pipeline(
+    config: AppConfig, steps: Dict[str, object] | None = None, trigger: triggers.TriggerEvent | None = None
+) -> List[str]:
+    """Runs the pipeline once; pass ``steps`` to reuse warm step instances.
+
+    ``trigger`` is the event that started the run; its details are visible
+    to the steps of this run only, as the ``trigger`` output.
+    """
+    start = time.perf_counter()
+    started = time.time()
+    context = PipelineContext()
+    if trigger is not None:
+        context.record("trigger", source=trigger.source, monotonic=trigger.monotonic, **trigger.detail)
+    tracing.start("run")
+    profiling.start()
+    try:
+        with tracing.span("pipeline", "runner", runner=config.runner) as span_args:
+            if config.runner == "async":
+                from cbord_cli import async_runner
+
+                errors = async_runner.run_pipeline(config, steps, context)
+            else:
+                errors = _run_pipeline(config, steps, context)
+            span_args["outcome"] = "denied" if errors else "granted"
+    except Exception as exc:
+        _record_run(config, context, "error", [str(exc)], start, started)
+        raise
+    finally:
+        if tracing.enabled():
+            tts.wait(timeout=10)  # so the final phrase lands in this run's trace
+        tracing.finish()
+        profiling.finish()
+    _record_run(config, context, "denied" if errors else "granted", errors, start, started)
+    return errors
+
+
+def _record_run(
+    config: AppConfig, context: PipelineContext, outcome: str, errors: List[str], start: float, started: float
+) -> None:
+    seconds = time.perf_counter() - start
+    # Only queued here; the access log's writer thread does the disk I/O.
+    access_log.log(access_log.run_event(config, context, outcome, errors, started, seconds))
+    metrics.observe("cbord_pipeline_seconds", seconds, outcome=outcome)
+    metrics.inc("cbord_pipeline_runs_total", outcome=outcome)
+    metrics.exporter.request()  # written by the exporter thread, off the unlock path
+
+
+def _run_pipeline(
+    config: AppConfig, steps: Dict[str, object] | None, context: PipelineContext | None = None
+) -> List[str]:
+    steps = steps if steps is not None else build_steps()
+    context = context if context is not None else PipelineContext()
+    session = sessions.SessionCheck(config.session_ttl)
+    errors: List[str] = []
+
+    print("\nStarting authentication pipeline...")
+    stages = build_stages(config)
+    unknown = [step_config.name for stage in stages for step_config in stage if step_config.name not in steps]
+    if unknown:
+        errors.append(f"Unknown step '{unknown[0]}'")
+        print(errors[-1])
+        return errors
+    for stage in stages:
+        if session.covers(stage, steps):
+            continue
+
+        members = [(steps[step_config.name], step_config) for step_config in stage]
+        group = stage[0].group
+        if group is not None and len(stage) > 1:
+            mode = config.group_mode(group)
+            success = _run_group(group, mode, members, context, config.retries)
+            failure = f"Group '{group}' ({mode}) failed."
+        else:
+            step, step_config = members[0]
+            print(f"- Running {step_config.name}")
+            result = run_step(step, step_config, context, config.retries)
+            context.results[result.name] = result
+            success = result.success
+            failure = f"Step '{step_config.name}' {result.message}."
 
         if not success:
-            print("Authentication failed. Access denied.")
-            tts.speak_failure()
-            errors.append(f"Step '{step_config.name}' failed after {config.retries} retries.")
+            deny_access(errors, failure)
             return errors
+        session.after_stage(context)
 
-    print("Authentication succeeded. Access granted.")
-    tts.speak_success()
+    grant_access(context)
+    session.finish(context)
     return errors
 
 
-def run_continuous(config: AppConfig, delay_seconds: float = 1.0) -> None:
-    print("\nRunning in continuous mode. Press Ctrl+C to stop.")
+def deny_access(errors: List[str], reason: str) -> None:
+    print("Authentication failed. Access denied.")
+    tts.speak_failure()
+    errors.append(reason)
+
+
+def grant_access(context: PipelineContext) -> None:
+    if context.identity is not None:
+        print(f"Authentication succeeded for {context.identity}. Access granted.")
+    else:
+        print("Authentication succeeded. Access granted.")
+    tts.speak_success()
+
+
+def run_continuous(config: AppConfig, delay_seconds: float = 1.0, watch: Path | None = None) -> None:
+    """Runs back to back, or on trigger events when ``config.triggers`` names sources.
+
+    With ``watch``, changes to that config file are compiled and swapped in
+    between runs; steps whose parameters did not change stay warm.
+    """
+    from cbord_cli import plan as plans
+    from cbord_cli.workers import worker_names
+
+    current = plans.compile_plan(config)
+    warm_steps(current.steps, worker_names(config))
+    watcher = plans.ConfigWatcher(watch) if watch is not None else None
+    hub = triggers.build_hub(config.triggers, current.steps)
+    if hub is None:
+        print("\nRunning in continuous mode. Press Ctrl+C to stop.")
+    else:
+        print(f"\nWaiting for triggers ({', '.join(config.triggers.sources)}). Press Ctrl+C to stop.")
     try:
         while True:
-            run_pipeline(config)
-            time.sleep(delay_seconds)
+            if watcher is not None and watcher.changed():
+                try:
+                    new = plans.load_plan(watch, current)
+                except plans.PlanError as exc:
+                    print(f"Config change not applied: {exc}")
+                else:
+                    print(f"Config reloaded; rebuilt steps: {', '.join(new.replaced) or 'none'}.")
+                    if new.replaced or new.config.triggers != current.config.triggers:
+                        if hub is not None:
+                            hub.park()
+                        hub = triggers.build_hub(new.config.triggers, new.steps)
+                    close_steps(new.retired)
+                    warm_steps(new.steps, [name for name in worker_names(new.config) if name in new.replaced])
+                    current = new
+            event = None
+            if hub is not None:
+                event = hub.wait(timeout=None if watcher is None else watcher.interval)
+                if event is None:
+                    continue
+                print(f"\nTriggered by {event.source}.")
+                metrics.observe("cbord_trigger_latency_seconds", time.monotonic() - event.monotonic, source=event.source)
+            run_pipeline(current.config, current.steps, event)
+            time.sleep(delay_seconds if hub is None else hub.cooldown)
     except KeyboardInterrupt:
+        tts.flush()
         print("\nContinuous mode stopped.")
+    finally:
+        if hub is not None:
+            hub.park()
+        close_steps(current.steps)
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+import threading
+import time
+from dataclasses import dataclass
+from typing import Callable, Dict, List
+
+from cbord_cli import metrics, tracing
+from cbord_cli.config import StepConfig
+from cbord_cli.steps.base import PipelineContext
+
+
+class SessionCache:
+    """Identities that recently passed the full chain, keyed by name.
+
+    Sessions are not extended by runs they shortened, so one full
+    authentication buys at most ``ttl`` seconds of single-factor entry.
+    """
+
+    def __init__(self, clock: Callable[[], float] = time.monotonic) -> None:
+        self.clock = clock
+        self._granted: Dict[str, float] = {}
+        self._lock = threading.Lock()
+
+    def grant(self, identity: str) -> None:
+        with self._lock:
+            self._granted[identity] = self.clock()
+
+    def remaining(self, identity: str, ttl: float) -> float | None:
+        """Seconds left on ``identity``'s session, or None if it has none."""
+        with self._lock:
+            granted = self._granted.get(identity)
+            if granted is None:
+                return None
+            left = granted + ttl - self.clock()
+            if left <= 0:
+                del self._granted[identity]
+                return None
+            return left
+
+    def lookup(self, identity: str, ttl: float) -> float | None:
+        left = self.remaining(identity, ttl)
+        metrics.inc("cbord_session_lookups_total", result="miss" if left is None else "hit")
+        return left
+
+    def active(self, ttl: float) -> Dict[str, float]:
+        with self._lock:
+            names = list(self._granted)
+        sessions = {name: self.remaining(name, ttl) for name in names}
+        return {name: round(left, 1) for name, left in sessions.items() if left is not None}
+
+    def revoke(self, identity: str | None = None) -> None:
+        with self._lock:
+            if identity is None:
+                self._granted.clear()
+            else:
+                self._granted.pop(identity, None)
+
+
+cache = SessionCache()
+
+
+@dataclass
+class SessionCheck:
+    """One run's use of the session cache.
+
+    The cache is consulted once, as soon as a step names the visitor. On a
+    hit the remaining authentication stages are skipped; steps that act
+    rather than authenticate (``factor = False``) still run.
+    """
+
+    ttl: float | None
+    identity: str | None = None
+    looked_up: bool = False
+
+    def after_stage(self, context: PipelineContext) -> None:
+        if not self.ttl or self.looked_up or context.identity is None:
+            return
+        self.looked_up = True
+        left = cache.lookup(context.identity, self.ttl)
+        if left is None:
+            return
+        self.identity = context.identity
+        print(f"  Session for {self.identity} is still valid ({left:.0f}s left); skipping remaining factors.")
+        context.record("session", identity=self.identity, remaining=round(left, 1))
+        tracing.instant("session hit", identity=self.identity)
+
+    def covers(self, stage: List[StepConfig], steps: Dict[str, object]) -> bool:
+        """True if every step in ``stage`` is a factor the session makes unnecessary."""
+        if self.identity is None:
+            return False
+        if not all(getattr(steps[step_config.name], "factor", True) for step_config in stage):
+            return False
+        names = ", ".join(step_config.name for step_config in stage)
+        print(f"- Skipping {names} (session for {self.identity})")
+        return True
+
+    def finish(self, context: PipelineContext) -> None:
+        """Starts a session after a granted run that went through every factor."""
+        if self.ttl and self.identity is None and context.identity is not None:
+            cache.grant(context.identity)
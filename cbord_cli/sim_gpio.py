@@ -0,0 +1,232 @@
+from __future__ import annotations
+
+import argparse
+import os
+import threading
+import time
+from dataclasses import dataclass
+
+
+class VirtualClock:
+    """Monotonic clock that runs ``speedup`` times faster than real time."""
+
+    def __init__(self, speedup: float = 1.0) -> None:
+        self.speedup = max(speedup, 1e-6)
+        self._origin = time.monotonic()
+
+    def now(self) -> float:
+        return (time.monotonic() - self._origin) * self.speedup
+
+    def sleep(self, seconds: float) -> None:
+        if seconds > 0:
+            time.sleep(seconds / self.speedup)
+
+    def wait(self, event: threading.Event, seconds: float | None) -> bool:
+        return event.wait(None if seconds is None else max(0.0, seconds) / self.speedup)
+
+
+@dataclass(frozen=True)
+class PinEvent:
+    t: float
+    pin: int
+    value: float
+
+
+class SimRecorder:
+    """Shared timeline of every duty-cycle change across simulated pins."""
+
+    def __init__(self, clock) -> None:
+        self.clock = clock
+        self.events: list[PinEvent] = []
+        self._values: dict[int, float] = {}
+        self._lock = threading.Lock()
+
+    def record(self, pin: int, value: float) -> None:
+        with self._lock:
+            if self._values.get(pin) == value:
+                return
+            self._values[pin] = value
+            self.events.append(PinEvent(self.clock.now(), pin, value))
+
+    def series(self, pin: int) -> list[PinEvent]:
+        with self._lock:
+            return [event for event in self.events if event.pin == pin]
+
+    def interlock_violations(self) -> list[PinEvent]:
+        """Events at which more than one pin was driven at the same time."""
+        violations = []
+        driven: dict[int, float] = {}
+        with self._lock:
+            for event in self.events:
+                driven[event.pin] = event.value
+                if sum(1 for value in driven.values() if value > 0) > 1:
+                    violations.append(event)
+        return violations
+
+    def active_spans(self, pin: int) -> list[tuple[float, float]]:
+        """(start, end) times during which ``pin`` had a non-zero duty cycle."""
+        spans = []
+        start = None
+        for event in self.series(pin):
+            if event.value > 0 and start is None:
+                start = event.t
+            elif event.value == 0 and start is not None:
+                spans.append((start, event.t))
+                start = None
+        return spans
+
+
+class SimPWMOutputDevice:
+    """Stand-in for ``gpiozero.PWMOutputDevice`` that records duty changes."""
+
+    def __init__(self, pin: int, frequency: int = 100, *, recorder: SimRecorder) -> None:
+        self.pin = pin
+        self.frequency = frequency
+        self._recorder = recorder
+        self._value = 0.0
+        recorder.record(pin, 0.0)
+
+    @property
+    def value(self) -> float:
+        return self._value
+
+    @value.setter
+    def value(self, value: float) -> None:
+        if not 0.0 <= value <= 1.0:
+            raise ValueError(f"PWM value must be between 0 and 1, got {value}")
+        self._value = float(value)
+        self._recorder.record(self.pin, self._value)
+
+    def on(self) -> None:
+        self.value = 1.0
+
+    def off(self) -> None:
+        self.value = 0.0
+
+    def close(self) -> None:
+        self.off()
+
+
+class SimDigitalInputDevice:
+    """Stand-in for ``gpiozero.DigitalInputDevice``; ``press()`` plays an edge."""
+
+    def __init__(self, pin: int, pull_up: bool = True) -> None:
+        self.pin = pin
+        self.pull_up = pull_up
+        self.when_activated = None
+        self.closed = False
+
+    def press(self) -> None:
+        callback = self.when_activated
+        if callback is not None and not self.closed:
+            callback()
+
+    def close(self) -> None:
+        self.closed = True
+        self.when_activated = None
+
+
+def device_factory(recorder: SimRecorder):
+    def _factory(pin: int, frequency: int = 100) -> SimPWMOutputDevice:
+        return SimPWMOutputDevice(pin, frequency, recorder=recorder)
+
+    return _factory
+
+
+def enabled() -> bool:
+    return os.getenv("CBORD_GPIO_BACKEND", "").lower() == "sim"
+
+
+def speedup_from_env() -> float:
+    return float(os.getenv("CBORD_SIM_SPEEDUP", "1"))
+
+
+def _monotonic(values: list[float], rising: bool) -> bool:
+    pairs = zip(values, values[1:])
+    return all(b >= a for a, b in pairs) if rising else all(b <= a for a, b in pairs)
+
+
+def check_cycle(recorder: SimRecorder, settings, tolerance: float = 0.05) -> list[str]:
+    """Checks a recorded open cycle; returns a list of problems (empty if fine)."""
+    problems = []
+    violations = recorder.interlock_violations()
+    if violations:
+        problems.append(f"both pins driven at t={violations[0].t:.3f}s")
+
+    profile = settings.motion_profile()
+    for phase, pin, cruise in (
+        ("extend", settings.rpwm_pin, settings.extend_seconds),
+        ("retract", settings.lpwm_pin, settings.retract_seconds),
+    ):
+        spans = recorder.active_spans(pin)
+        if len(spans) != 1:
+            problems.append(f"{phase}: expected one drive span, saw {len(spans)}")
+            continue
+        start, end = spans[0]
+        values = [event.value for event in recorder.series(pin) if start <= event.t <= end]
+        peak = values.index(max(values))
+        if not _monotonic(values[: peak + 1], rising=True) or not _monotonic(values[peak:], rising=False):
+            problems.append(f"{phase}: ramp is not monotonic")
+        if abs(max(values) - settings.speed) > 1e-6:
+            problems.append(f"{phase}: peak duty {max(values)} != speed {settings.speed}")
+        expected = 2 * profile.ramp_duration + cruise - profile.interval
+        if abs((end - start) - expected) > tolerance * max(expected, 1.0):
+            problems.append(f"{phase}: drive time {end - start:.3f}s, expected about {expected:.3f}s")
+    return problems
+
+
+def build_controller(settings, speedup: float = 1.0):
+    """An unstarted ActuatorController wired to simulated pins, plus its recorder."""
+    from cbord_cli.actuator import ActuatorController
+
+    clock = VirtualClock(speedup)
+    recorder = SimRecorder(clock)
+    return ActuatorController(settings, device_factory(recorder), clock), recorder
+
+
+def simulate_cycle(settings, speedup: float = 100.0):
+    """Runs one open cycle on simulated pins; returns (recorder, controller, wall seconds)."""
+    from cbord_cli.actuator import FAULT, IDLE
+
+    controller, recorder = build_controller(settings, speedup)
+    controller.start()
+    started = time.monotonic()
+    try:
+        controller.open(wait=True)
+        while controller.status().state not in (IDLE, FAULT):
+            time.sleep(0.005)
+    finally:
+        controller.stop(timeout=5)
+    return recorder, controller, time.monotonic() - started
+
+
+def _cmd_simulate(args: argparse.Namespace) -> int:
+    from cbord_cli.actuator import MotorControllerSettings
+
+    settings = MotorControllerSettings.from_env()
+    if args.profile:
+        settings.profile = args.profile
+    recorder, controller, wall = simulate_cycle(settings, args.speedup)
+    status = controller.status()
+    cycle = recorder.events[-1].t - recorder.events[0].t if recorder.events else 0.0
+
+    print(f"Simulated cycle: {cycle:.3f}s virtual, {wall:.3f}s wall (x{args.speedup:g}).")
+    for phase, summary in status.timing.items():
+        print(f"  {phase}: {summary}")
+    print(f"  duty changes recorded: {len(recorder.events)}")
+
+    problems = check_cycle(recorder, settings)
+    for problem in problems:
+        print(f"  FAIL {problem}")
+    if not problems:
+        print("  OK ramps monotonic, timings within tolerance, pins never driven together.")
+    return 1 if problems else 0
+
+
+def add_subcommand(subparsers) -> None:
+    parser = subparsers.add_parser("motor", help="Actuator utilities.")
+    actions = parser.add_subparsers(dest="motor_action", required=True)
+    simulate = actions.add_parser("simulate", help="Run one open cycle on simulated GPIO and check its timing.")
+    simulate.add_argument("--speedup", type=float, default=100.0, help="Virtual time acceleration factor.")
+    simulate.add_argument("--profile", choices=("trapezoid", "s-curve"), default=None)
+    simulate.set_defaults(handler=_cmd_simulate)
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import heapq
+import itertools
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+PRIORITY_RESULT = 0
+PRIORITY_STEP = 1
+
+
+@dataclass(order=True)
+class _Utterance:
+    priority: int
+    seq: int
+    text: str = field(compare=False)
+    channel: str | None = field(compare=False)
+    enqueued: float = field(compare=False)
+
+
+class SpeechWorker:
+    """Plays utterances on a background thread so callers never wait on audio.
+
+    Lower ``priority`` values win. A queued utterance is replaced by a newer
+    one on the same ``channel`` (or on a channel it ``supersedes``),
+    utterances older than ``max_age`` are dropped, and a higher-priority
+    arrival interrupts the one playing.
+    """
+
+    def __init__(
+        self,
+        speak_fn: Callable[[str, threading.Event], None],
+        maxsize: int = 8,
+        max_age: float = 5.0,
+    ) -> None:
+        self._speak_fn = speak_fn
+        self._maxsize = max(1, maxsize)
+        self._max_age = max_age
+        self._heap: list[_Utterance] = []
+        self._seq = itertools.count()
+        self._cond = threading.Condition()
+        self._current: _Utterance | None = None
+        self._interrupt = threading.Event()
+        self._closed = False
+        self._thread = threading.Thread(target=self._run, name="speech-worker", daemon=True)
+        self._thread.start()
+
+    def say(
+        self,
+        text: str,
+        priority: int = PRIORITY_STEP,
+        channel: str | None = None,
+        supersedes: tuple[str, ...] = (),
+    ) -> None:
+        item = _Utterance(priority, next(self._seq), text, channel, time.monotonic())
+        stale = {channel, *supersedes} - {None}
+        with self._cond:
+            if self._closed:
+                return
+            if stale:
+                self._heap = [queued for queued in self._heap if queued.channel not in stale]
+                heapq.heapify(self._heap)
+            if len(self._heap) >= self._maxsize:
+                # Full: evict the oldest entry of the lowest priority present.
+                lowest = max(queued.priority for queued in self._heap)
+                if priority > lowest:
+                    return
+                oldest = min(queued for queued in self._heap if queued.priority == lowest)
+                self._heap.remove(oldest)
+                heapq.heapify(self._heap)
+            heapq.heappush(self._heap, item)
+
+            if self._current is not None and priority < self._current.priority:
+                self._interrupt.set()
+            self._cond.notify_all()
+
+    def flush(self) -> None:
+        with self._cond:
+            self._heap.clear()
+            if self._current is not None:
+                self._interrupt.set()
+            self._cond.notify_all()
+
+    def wait(self, timeout: float | None = None) -> bool:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        with self._cond:
+            while self._heap or self._current is not None:
+                remaining = None if deadline is None else deadline - time.monotonic()
+                if remaining is not None and remaining <= 0:
+                    return False
+                self._cond.wait(remaining)
+        return True
+
+    def close(self, timeout: float | None = None) -> bool:
+        drained = self.wait(timeout)
+        with self._cond:
+            self._closed = True
+            if not drained:
+                self._heap.clear()
+                self._interrupt.set()
+            self._cond.notify_all()
+        self._thread.join(timeout=1.0)
+        return drained
+
+    def _next(self) -> _Utterance | None:
+        with self._cond:
+            while True:
+                while not self._heap and not self._closed:
+                    self._cond.wait()
+                if not self._heap:
+                    return None
+                item = heapq.heappop(self._heap)
+                if time.monotonic() - item.enqueued <= self._max_age:
+                    self._interrupt.clear()
+                    self._current = item
+                    return item
+                self._cond.notify_all()
+
+    def _run(self) -> None:
+        while True:
+            item = self._next()
+            if item is None:
+                return
+            try:
+                self._speak_fn(item.text, self._interrupt)
+            except Exception as exc:
+                print(f"Speech output failed: {exc}")
+            finally:
+                with self._cond:
+                    self._current = None
+                    self._cond.notify_all()
@@ -1,14 +1,8 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
-from typing import Protocol
-
-
-class Step(Protocol):
-    name: str
-
-    def run(self) -> bool:
-        ...
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Protocol
 
 
 @dataclass
@@ -16,3 +10,70 @@ class StepResult:
     name: str
     success: bool
     message: str
+    attempts: int = 0
+    elapsed: float = 0.0
+
+
+@dataclass
+class PipelineContext:
+    outputs: dict[str, dict[str, Any]] = field(default_factory=dict)
+    identity: str | None = None
+    results: dict[str, StepResult] = field(default_factory=dict)
+    # Set by the runner once a parallel group's outcome is decided; steps
+    # still running should give up at their next loop iteration.
+    cancel: threading.Event = field(default_factory=threading.Event, repr=False)
+    _lock: threading.Lock = field(default_factory=threading.Lock, repr=False)
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel.is_set()
+
+    def record(self, step_name: str, **values: Any) -> None:
+        with self._lock:
+            self.outputs.setdefault(step_name, {}).update(values)
+
+
+class StepScope:
+    """A step's view of the shared context with its own cancel event.
+
+    Cancelling the scope (deadline, lost race) stops only that step;
+    cancelling the parent context stops every scope.
+    """
+
+    def __init__(self, context: PipelineContext) -> None:
+        self.context = context
+        self.cancel = threading.Event()
+
+    @property
+    def cancelled(self) -> bool:
+        return self.cancel.is_set() or self.context.cancelled
+
+    @property
+    def outputs(self) -> dict[str, dict[str, Any]]:
+        return self.context.outputs
+
+    @property
+    def identity(self) -> str | None:
+        return self.context.identity
+
+    @identity.setter
+    def identity(self, value: str | None) -> None:
+        self.context.identity = value
+
+    def record(self, step_name: str, **values: Any) -> None:
+        self.context.record(step_name, **values)
+
+
+class Step(Protocol):
+    """A pipeline step.
+
+    Steps may also define ``warm()`` (load models, open devices ahead of the
+    first run) and ``close()`` (release them); long-running hosts such as the
+    daemon call these when present. Steps that act instead of authenticating
+    set ``factor = False`` so a session hit never skips them.
+    """
+
+    name: str
+
+    def run(self, context: PipelineContext | None = None) -> bool:
+        ...
@@ -1,7 +1,7 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
 
 import cv2
@@ -9,6 +9,9 @@ import face_recognition
 import pickle
 from picamera2 import Picamera2
 
+from cbord_cli import metrics, tracing
+from cbord_cli.steps.base import PipelineContext
+
 
 @dataclass
 class FaceRecognitionStep:
@@ -16,43 +19,111 @@ class FaceRecognitionStep:
     encodings_path: Path = Path(__file__).resolve().parents[2] / "FaceRecognition" / "encodings.pickle"
     cascade_path: Path = Path(__file__).resolve().parents[2] / "FaceRecognition" / "haarcascade_frontalface_default.xml"
     max_wait_seconds: int = 15
+    verify_identity: bool = True
+    tolerance: float = 0.6
+    camera_size: tuple[int, int] = (640, 480)
+    _gallery: tuple | None = field(default=None, init=False, repr=False)
+    _camera: object | None = field(default=None, init=False, repr=False)
 
-    def run(self) -> bool:
-        print("\n[Face Recognition]")
-        print("Searching for a known face...")
+    def warm(self) -> None:
+        """Loads the gallery and configures the camera once; it is only started per run."""
+        self._load()
+        self.camera()
+
+    def camera(self):
+        """The warm camera, configured but stopped; callers start and stop it."""
+        if self._camera is None:
+            self._camera = self._configure_camera()
+        return self._camera
+
+    def close(self) -> None:
+        camera, self._camera = self._camera, None
+        close = getattr(camera, "close", None)
+        if callable(close):
+            close()
 
-        data = pickle.loads(self.encodings_path.read_bytes())
-        detector = cv2.CascadeClassifier(str(self.cascade_path))
+    def _load(self):
+        # Reloaded only when the encodings file changes (e.g. after enrolling).
+        mtime_ns = self.encodings_path.stat().st_mtime_ns
+        if self._gallery is None or self._gallery[0] != mtime_ns:
+            with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="load"), tracing.span("load gallery"):
+                data = pickle.loads(self.encodings_path.read_bytes())
+                detector = cv2.CascadeClassifier(str(self.cascade_path))
+            self._gallery = (mtime_ns, data, detector)
+        return self._gallery[1], self._gallery[2]
 
+    def _configure_camera(self):
         picam2 = Picamera2()
         picam2.configure(
-            picam2.create_preview_configuration(main={"format": "XRGB8888", "size": (640, 480)})
+            picam2.create_preview_configuration(main={"format": "XRGB8888", "size": tuple(self.camera_size)})
         )
-        picam2.start()
-        time.sleep(1.0)
+        return picam2
+
+    def run(self, context: PipelineContext | None = None) -> bool:
+        print("\n[Face Recognition]")
+
+        data, detector = self._load()
+
+        # A previous factor (fingerprint) may already have named the visitor;
+        # then only that person's encodings need to be compared (1:1).
+        claimed = context.identity if context is not None and self.verify_identity else None
+        if claimed is not None:
+            gallery = [enc for enc, name in zip(data["encodings"], data["names"]) if name == claimed]
+            if not gallery:
+                print(f"No face encodings enrolled for {claimed}; cannot verify.")
+                return False
+            print(f"Verifying face of {claimed} against {len(gallery)} encodings...")
+        else:
+            gallery = data["encodings"]
+            print("Searching for a known face...")
+
+        with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="warmup"), tracing.span("camera warmup"):
+            picam2 = self._camera or self._configure_camera()
+            picam2.start()
+            time.sleep(1.0)
+        tracing.instant("camera started")
 
         start = time.monotonic()
+        frames = 0
         try:
             while time.monotonic() - start < self.max_wait_seconds:
-                frame = picam2.capture_array()
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-                rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-
-                rects = detector.detectMultiScale(
-                    gray,
-                    scaleFactor=1.1,
-                    minNeighbors=5,
-                    minSize=(30, 30),
-                    flags=cv2.CASCADE_SCALE_IMAGE,
-                )
+                if context is not None and context.cancelled:
+                    print("Face recognition cancelled.")
+                    return False
+                timer = metrics.timer("cbord_step_phase_seconds", step=self.name, phase="frame")
+                with timer, tracing.span("frame") as span_args:
+                    frame = picam2.capture_array()
+                    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                    rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+
+                    rects = detector.detectMultiScale(
+                        gray,
+                        scaleFactor=1.1,
+                        minNeighbors=5,
+                        minSize=(30, 30),
+                        flags=cv2.CASCADE_SCALE_IMAGE,
+                    )
+                    span_args["faces"] = len(rects)
+                metrics.inc("cbord_step_frames_total", step=self.name)
+                frames += 1
+                tracing.counter("face frames", frames=frames)
 
                 boxes = [(y, x + w, y + h, x) for (x, y, w, h) in rects]
                 if not boxes:
                     continue
 
-                encodings = face_recognition.face_encodings(rgb, boxes)
+                with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="encode"), tracing.span("encode"):
+                    encodings = face_recognition.face_encodings(rgb, boxes)
                 for encoding in encodings:
-                    matches = face_recognition.compare_faces(data["encodings"], encoding)
+                    if claimed is not None:
+                        distance = float(min(face_recognition.face_distance(gallery, encoding)))
+                        if distance <= self.tolerance:
+                            print(f"Face verified: {claimed} (distance {distance:.2f}).")
+                            self._record(context, claimed, distance)
+                            return True
+                        continue
+
+                    matches = face_recognition.compare_faces(gallery, encoding, self.tolerance)
                     if True not in matches:
                         continue
 
@@ -65,14 +136,24 @@ class FaceRecognitionStep:
                     name = max(counts, key=counts.get)
                     if name:
                         print(f"Face recognized: {name}.")
+                        self._record(context, name, None)
                         return True
         finally:
             try:
                 picam2.stop()
             finally:
                 close = getattr(picam2, "close", None)
-                if callable(close):
+                if picam2 is not self._camera and callable(close):
                     close()
 
         print("Face recognition timed out.")
         return False
+
+    def _record(self, context: PipelineContext | None, name: str, distance: float | None) -> None:
+        metrics.inc("cbord_step_decisions_total", step=self.name, result="match")
+        tracing.instant("face matched", identity=name, distance=distance)
+        if context is None:
+            return
+        context.record(self.name, identity=name, distance=distance, verified=distance is not None)
+        if context.identity is None:
+            context.identity = name
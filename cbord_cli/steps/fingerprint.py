@@ -1,40 +1,111 @@
 from __future__ import annotations
 
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 
 import adafruit_fingerprint
-import serial
+
+from cbord_cli import metrics, tracing
+from cbord_cli.fingerprint_link import FingerprintLink
+from cbord_cli.identities import IDENTITIES_PATH, IdentityMap, load_identities
+from cbord_cli.steps.base import PipelineContext
 
 
 @dataclass
 class FingerprintStep:
     name: str = "fingerprint"
     device: str = "/dev/ttyAMA0"
-    baudrate: int = 57600
+    baudrate: int | None = None
     timeout: float = 1.0
     max_wait_seconds: int = 15
+    _finger: object | None = field(default=None, init=False, repr=False)
+    _identities: IdentityMap | None = field(default=None, init=False, repr=False)
+    _identities_stamp: tuple[int, int] | None = field(default=None, init=False, repr=False)
+
+    def warm(self) -> None:
+        """Opens the sensor link now and keeps it open between runs."""
+        self.link()
+        self.identities()
+
+    def identities(self) -> IdentityMap:
+        """The slot-to-name map, parsed again only when identities.json changes."""
+        try:
+            stat = IDENTITIES_PATH.stat()
+            stamp = (stat.st_mtime_ns, stat.st_size)
+        except OSError:
+            stamp = None
+        if self._identities is None or stamp != self._identities_stamp:
+            self._identities, self._identities_stamp = load_identities(), stamp
+        return self._identities
+
+    def link(self):
+        if self._finger is None:
+            self._finger = self._open()
+        return self._finger
+
+    def touched(self) -> bool:
+        """One image capture attempt on the warm link; True if a finger is on the sensor."""
+        return self.link().get_image() == adafruit_fingerprint.OK
 
-    def run(self) -> bool:
+    def close(self) -> None:
+        finger, self._finger = self._finger, None
+        if finger is not None:
+            finger._uart.close()
+
+    def _open(self):
+        with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="open"), tracing.span("open link"):
+            return FingerprintLink(self.device, timeout=self.timeout).open(self.baudrate)
+
+    def run(self, context: PipelineContext | None = None) -> bool:
         print("\n[Fingerprint]")
         print("Waiting for fingerprint match...")
 
-        uart = serial.Serial(self.device, baudrate=self.baudrate, timeout=self.timeout)
-        finger = adafruit_fingerprint.Adafruit_Fingerprint(uart)
+        finger = self._finger or self._open()
+        try:
+            return self._wait_for_match(finger, context)
+        except Exception:
+            # A warm link that errors is reopened on the next run.
+            self._finger = None
+            raise
+        finally:
+            if finger is not self._finger and finger is not None:
+                finger._uart.close()
 
+    def _wait_for_match(self, finger, context: PipelineContext | None) -> bool:
         start = time.monotonic()
         while time.monotonic() - start < self.max_wait_seconds:
-            if finger.get_image() != adafruit_fingerprint.OK:
+            if context is not None and context.cancelled:
+                print("Fingerprint step cancelled.")
+                return False
+            with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="poll"):
+                image = finger.get_image()
+            if image != adafruit_fingerprint.OK:
                 time.sleep(0.05)
                 continue
 
-            if finger.image_2_tz(1) != adafruit_fingerprint.OK:
-                return False
-
-            if finger.finger_search() != adafruit_fingerprint.OK:
+            metrics.observe("cbord_step_phase_seconds", time.monotonic() - start, step=self.name, phase="touch")
+            tracing.instant("finger detected")
+            with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="match"), tracing.span("match"):
+                matched = (
+                    finger.image_2_tz(1) == adafruit_fingerprint.OK
+                    and finger.finger_search() == adafruit_fingerprint.OK
+                )
+            metrics.inc("cbord_step_decisions_total", step=self.name, result="match" if matched else "no_match")
+            tracing.instant("fingerprint decision", matched=matched)
+            if not matched:
                 return False
 
             print(f"Fingerprint match confirmed. ID #{finger.finger_id} confidence {finger.confidence}.")
+            if context is not None:
+                identity = self.identities().for_finger(finger.finger_id)
+                if identity is not None and context.identity not in (None, identity):
+                    # An earlier factor named someone else; same rule as an "all" group.
+                    print(f"Factors disagree on identity: {context.identity}, {identity}.")
+                    metrics.inc("cbord_step_decisions_total", step=self.name, result="identity_mismatch")
+                    return False
+                context.record(self.name, finger_id=finger.finger_id, confidence=finger.confidence, identity=identity)
+                if identity is not None:
+                    context.identity = identity
             return True
 
         print("Fingerprint match timed out.")
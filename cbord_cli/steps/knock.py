@@ -0,0 +1,84 @@
+from __future__ import annotations
+
+import time
+from dataclasses import dataclass, field
+
+from cbord_cli import metrics, tracing
+from cbord_cli.knock import KnockDetector, KnockGroup, KnockSettings, open_input
+from cbord_cli.steps.base import PipelineContext
+
+
+@dataclass
+class KnockStep:
+    name: str = "knock"
+    settings: KnockSettings = field(default_factory=KnockSettings.from_env)
+    max_wait_seconds: int = 15
+    # The group that fired the knock trigger for this run counts as its
+    # first attempt if it ended this recently, so the visitor does not have
+    # to knock twice.
+    reuse_seconds: float = 10.0
+    _detector: KnockDetector | None = field(default=None, init=False, repr=False)
+    _input: object | None = field(default=None, init=False, repr=False)
+
+    def warm(self) -> None:
+        """Claims the GPIO input; edges are timestamped from then on."""
+        self.listen()
+
+    def close(self) -> None:
+        device, self._input = self._input, None
+        if device is not None:
+            device.close()
+
+    def detector(self) -> KnockDetector:
+        if self._detector is None:
+            self._detector = KnockDetector(self.settings)
+        return self._detector
+
+    def listen(self) -> KnockDetector:
+        detector = self.detector()
+        if self._input is None:
+            self._input = open_input(self.settings.pin)
+            self._input.when_activated = detector.edge
+        return detector
+
+    def _triggering_group(self, context: PipelineContext | None) -> KnockGroup | None:
+        """The group that started this run via the knock trigger; used by one attempt only."""
+        trigger = context.outputs.get("trigger") if context is not None else None
+        if not trigger or trigger.get("source") != "knock" or trigger.get("claimed"):
+            return None
+        context.record("trigger", claimed=True)
+        if time.monotonic() - trigger["monotonic"] > self.reuse_seconds:
+            return None
+        return self.detector().check(KnockGroup.from_gaps(trigger["gaps"], trigger["monotonic"]))
+
+    def run(self, context: PipelineContext | None = None) -> bool:
+        print("\n[Knock]")
+
+        group = self._triggering_group(context)
+        if group is not None:
+            print("Checking the knock that woke the door...")
+        else:
+            was_open = self._input is not None
+            detector = self.listen()
+            try:
+                print("Knock the secret pattern...")
+                detector.reset()
+                with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="listen"):
+                    group = detector.wait_group(
+                        self.max_wait_seconds,
+                        cancelled=lambda: context is not None and context.cancelled,
+                        check_every=0.2,
+                    )
+            finally:
+                if not was_open:
+                    self.close()
+            if group is None:
+                print("Knock step cancelled." if context is not None and context.cancelled else "No knock heard.")
+                return False
+
+        metrics.inc("cbord_step_decisions_total", step=self.name, result="match" if group.matched else "no_match")
+        tracing.instant("knock decision", matched=group.matched, knocks=len(group.times))
+        print(f"Knock {'accepted' if group.matched else 'rejected'}: {group.describe()}.")
+        if group.matched and context is not None:
+            context.record(self.name, knocks=len(group.times), error=group.error)
+        return group.matched
@@ -5,7 +5,7 @@ import queue
 import subprocess
 import threading
 import time
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from math import gcd
 from pathlib import Path
 
@@ -13,6 +13,9 @@ import numpy as np
 from scipy.signal import resample_poly
 from vosk import Model, KaldiRecognizer
 
+from cbord_cli import metrics, tracing
+from cbord_cli.steps.base import PipelineContext
+
 
 @dataclass
 class WordDetectionStep:
@@ -30,15 +33,27 @@ class WordDetectionStep:
     min_avg_conf: float = 0.80
     min_utt_rms: float = 350.0
     debug_rejects: bool = True
+    _model: object | None = field(default=None, init=False, repr=False)
+
+    def warm(self) -> None:
+        """Loads the Vosk model now so later runs only build a recognizer."""
+        self._load_model()
+
+    def _load_model(self):
+        if self._model is None:
+            self._model = Model(str(self.model_path))
+        return self._model
 
-    def run(self) -> bool:
+    def run(self, context: PipelineContext | None = None) -> bool:
         print("\n[Word Detection]")
         print("Listening for wake phrase...")
 
-        model = Model(str(self.model_path))
-        grammar_json = json.dumps(list(self.wake_phrases))
-        recognizer = KaldiRecognizer(model, self.vosk_sample_rate, grammar_json)
-        recognizer.SetWords(True)
+        with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="load"), tracing.span("load model"):
+            model = self._load_model()
+            grammar_json = json.dumps(list(self.wake_phrases))
+            recognizer = KaldiRecognizer(model, self.vosk_sample_rate, grammar_json)
+            recognizer.SetWords(True)
+        listen_start = time.monotonic()
 
         audio_q: queue.Queue[bytes] = queue.Queue(maxsize=self.queue_max)
         stop_flag = threading.Event()
@@ -72,8 +87,11 @@ class WordDetectionStep:
                 if now < cooldown_until:
                     continue
 
-                if recognizer.AcceptWaveform(pcm.tobytes()):
+                with metrics.timer("cbord_step_phase_seconds", step=self.name, phase="chunk"):
+                    final = recognizer.AcceptWaveform(pcm.tobytes())
+                if final:
                     out = json.loads(recognizer.Result())
+                    tracing.instant("vosk result", text=out.get("text", ""))
                     text = out.get("text", "").strip()
 
                     this_utt_rms = utt_max_rms
@@ -112,21 +130,38 @@ class WordDetectionStep:
                         f"🟢 Wake word detected: '{text}'  min={min_c:.2f} "
                         f"avg={avg_c:.2f} rms={this_utt_rms:.0f}"
                     )
+                    metrics.observe(
+                        "cbord_step_phase_seconds", time.monotonic() - listen_start, step=self.name, phase="detect"
+                    )
+                    metrics.inc("cbord_step_decisions_total", step=self.name, result="match")
+                    tracing.instant("wake word", text=text)
                     cooldown_until = time.time() + self.cooldown_sec
                     recognizer.Reset()
                     success_flag.set()
                     stop_flag.set()
 
-        worker = threading.Thread(target=recognizer_worker, daemon=True)
+        def traced_worker() -> None:
+            with tracing.span("recognizer", "thread"):
+                recognizer_worker()
+
+        worker = threading.Thread(target=traced_worker, name="wake-word", daemon=True)
         worker.start()
 
-        return self._capture_loop(audio_q, stop_flag, success_flag)
+        try:
+            with tracing.span("capture", "thread"):
+                return self._capture_loop(audio_q, stop_flag, success_flag, context)
+        finally:
+            # Capture can also end on EOF or an error; never leave the
+            # recognizer polling an abandoned queue.
+            stop_flag.set()
+            worker.join(timeout=2)
 
     def _capture_loop(
         self,
         audio_q: queue.Queue[bytes],
         stop_flag: threading.Event,
         success_flag: threading.Event,
+        context: PipelineContext | None = None,
     ) -> bool:
         frames_per_chunk = max(256, int(self.mic_sample_rate * (self.chunk_ms / 1000.0)))
         chunk_bytes = frames_per_chunk * 2 * self.channels
@@ -163,10 +198,14 @@ class WordDetectionStep:
                 if s:
                     print("[arecord]", s)
 
-        threading.Thread(target=drain_stderr, daemon=True).start()
+        stderr_reader = threading.Thread(target=drain_stderr, name="arecord-stderr", daemon=True)
+        stderr_reader.start()
 
         try:
             while not stop_flag.is_set():
+                if context is not None and context.cancelled:
+                    stop_flag.set()
+                    break
                 data = proc.stdout.read(chunk_bytes)
                 if not data:
                     break
@@ -174,12 +213,15 @@ class WordDetectionStep:
                     audio_q.put_nowait(data)
                 except queue.Full:
                     pass
+                tracing.counter("audio queue", depth=audio_q.qsize())
         finally:
+            proc.terminate()
             try:
-                proc.terminate()
                 proc.wait(timeout=2)
-            except Exception:
-                pass
+            except subprocess.TimeoutExpired:
+                proc.kill()
+                proc.wait()
+            stderr_reader.join(timeout=1)
 
         return success_flag.is_set()
 
@@ -0,0 +1,133 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from pathlib import Path
+from typing import Iterator
+
+TRACE_DIR = Path(os.getenv("CBORD_TRACE_DIR", Path(__file__).parent / ".traces"))
+KEEP_TRACES = 50
+
+_enabled = os.getenv("CBORD_TRACE", "0") == "1"
+
+
+def enable(on: bool = True) -> None:
+    global _enabled
+    _enabled = on
+
+
+def enabled() -> bool:
+    return _enabled
+
+
+class Tracer:
+    """Collects events for one run in Chrome trace format (chrome://tracing, Perfetto).
+
+    Each thread gets its own track, named after the Python thread.
+    """
+
+    def __init__(self, label: str) -> None:
+        self.label = label
+        self.started = time.time()
+        self._t0 = time.perf_counter()
+        self._pid = os.getpid()
+        self._events: list[dict] = []
+        self._tracks: dict[tuple[int | None, str], int] = {}
+        self._lock = threading.Lock()
+
+    def _us(self, t: float) -> float:
+        return round((t - self._t0) * 1e6, 1)
+
+    def _add(self, event: dict) -> None:
+        thread = threading.current_thread()
+        # Thread idents are reused once a thread exits, so tracks are keyed
+        # by ident and name and numbered in order of first appearance.
+        key = (thread.ident, thread.name)
+        event["pid"] = self._pid
+        with self._lock:
+            event["tid"] = self._tracks.setdefault(key, len(self._tracks) + 1)
+            self._events.append(event)
+
+    @contextmanager
+    def span(self, name: str, cat: str, **args: object) -> Iterator[dict[str, object]]:
+        """Records a complete event; values added to the yielded dict land in its args."""
+        start = time.perf_counter()
+        try:
+            yield args
+        finally:
+            end = time.perf_counter()
+            ts = self._us(start)
+            self._add({"name": name, "cat": cat, "ph": "X", "ts": ts, "dur": self._us(end) - ts, "args": args})
+
+    def instant(self, name: str, cat: str, **args: object) -> None:
+        ts = self._us(time.perf_counter())
+        self._add({"name": name, "cat": cat, "ph": "i", "s": "t", "ts": ts, "args": args})
+
+    def counter(self, name: str, **values: float) -> None:
+        self._add({"name": name, "ph": "C", "ts": self._us(time.perf_counter()), "args": values})
+
+    def to_json(self) -> dict:
+        with self._lock:
+            events = list(self._events)
+            tracks = dict(self._tracks)
+        metadata = [{"name": "process_name", "ph": "M", "pid": self._pid, "args": {"name": f"cbord {self.label}"}}]
+        metadata += [
+            {"name": "thread_name", "ph": "M", "pid": self._pid, "tid": tid, "args": {"name": name}}
+            for (_, name), tid in tracks.items()
+        ]
+        return {"traceEvents": metadata + events, "displayTimeUnit": "ms", "otherData": {"started": self.started}}
+
+    def write(self, directory: Path = TRACE_DIR) -> Path:
+        directory.mkdir(parents=True, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        path = directory / f"{self.label}-{stamp}-{int(self.started * 1000) % 1000:03d}.json"
+        path.write_text(json.dumps(self.to_json(), separators=(",", ":")))
+        for old in sorted(directory.glob("*.json"))[:-KEEP_TRACES]:
+            old.unlink(missing_ok=True)
+        return path
+
+
+_current: Tracer | None = None
+
+
+def start(label: str = "run") -> Tracer | None:
+    """Starts collecting for one run if tracing is enabled."""
+    global _current
+    _current = Tracer(label) if _enabled else None
+    return _current
+
+
+def finish() -> Path | None:
+    global _current
+    tracer, _current = _current, None
+    if tracer is None:
+        return None
+    try:
+        path = tracer.write()
+    except OSError as exc:
+        print(f"Could not write trace ({exc}).")
+        return None
+    print(f"Trace written to {path}")
+    return path
+
+
+def span(name: str, cat: str = "step", **args: object):
+    tracer = _current
+    if tracer is None:
+        return nullcontext({})
+    return tracer.span(name, cat, **args)
+
+
+def instant(name: str, cat: str = "step", **args: object) -> None:
+    tracer = _current
+    if tracer is not None:
+        tracer.instant(name, cat, **args)
+
+
+def counter(name: str, **values: float) -> None:
+    tracer = _current
+    if tracer is not None:
+        tracer.counter(name, **values)
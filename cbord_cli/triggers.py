@@ -0,0 +1,360 @@
+from __future__ import annotations
+
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List
+
+import cv2
+
+from cbord_cli import knock, metrics
+from cbord_cli.config import TriggerConfig
+from cbord_cli.steps.base import PipelineContext
+
+Fire = Callable[..., None]
+
+
+@dataclass
+class TriggerEvent:
+    source: str
+    at: float
+    monotonic: float
+    detail: dict[str, Any] = field(default_factory=dict)
+
+
+class EdgeSource:
+    """Fires on a GPIO input going active (falling edge with the pull-up).
+
+    Interrupt driven: nothing runs between edges.
+    """
+
+    def __init__(self, name: str, pin: int, pull_up: bool = True) -> None:
+        self.name = name
+        self.pin = pin
+        self.pull_up = pull_up
+        self._device = None
+
+    def arm(self, fire: Fire) -> None:
+        if self._device is None:
+            self._device = knock.open_input(self.pin, pull_up=self.pull_up)
+            self._device.when_activated = lambda *_: fire(self.name, pin=self.pin)
+
+    def park(self) -> None:
+        device, self._device = self._device, None
+        if device is not None:
+            device.close()
+
+
+class PollingSource:
+    """Checks a sensor every ``interval`` seconds on its own thread until parked."""
+
+    name = ""
+    interval = 0.5
+
+    def __init__(self) -> None:
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def arm(self, fire: Fire) -> None:
+        if self._thread is not None:
+            return
+        self.open()
+        stop = self._stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.wait(self.interval):
+                try:
+                    detail = self.poll()
+                except Exception as exc:
+                    print(f"Trigger '{self.name}' stopped ({exc}).")
+                    return
+                if detail is not None:
+                    fire(self.name, **detail)
+
+        self._thread = threading.Thread(target=loop, name=f"trigger-{self.name}", daemon=True)
+        self._thread.start()
+
+    def park(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        thread.join(timeout=2)
+        self.release()
+
+    def open(self) -> None:
+        pass
+
+    def poll(self) -> dict[str, Any] | None:
+        raise NotImplementedError
+
+    def release(self) -> None:
+        pass
+
+
+class FingerTouchSource(PollingSource):
+    """Polls the fingerprint sensor over its warm link at a slow rate."""
+
+    name = "finger"
+    interval = 0.3
+
+    def __init__(self, step) -> None:
+        super().__init__()
+        self.step = step
+
+    def poll(self) -> dict[str, Any] | None:
+        return {} if self.step.touched() else None
+
+
+class MotionSource(PollingSource):
+    """Frame differencing on the face step's camera at a low frame rate.
+
+    Fires when more than ``threshold`` of a small grayscale frame changed
+    since the previous sample.
+    """
+
+    name = "motion"
+    interval = 0.5
+    idle_frame_rate = 2.0
+    full_frame_rate = 30.0
+
+    def __init__(self, step, threshold: float = 0.02, size: tuple[int, int] = (160, 120)) -> None:
+        super().__init__()
+        self.step = step
+        self.threshold = threshold
+        self.size = size
+        self._camera = None
+        self._previous = None
+
+    def open(self) -> None:
+        self._camera = self.step.camera()
+        self._camera.start()
+        self._set_frame_rate(self.idle_frame_rate)
+        self._previous = None
+
+    def poll(self) -> dict[str, Any] | None:
+        frame = self._camera.capture_array()
+        small = cv2.resize(frame, self.size, interpolation=cv2.INTER_AREA)
+        gray = cv2.GaussianBlur(cv2.cvtColor(small, cv2.COLOR_BGR2GRAY), (5, 5), 0)
+        previous, self._previous = self._previous, gray
+        if previous is None:
+            return None
+        _, mask = cv2.threshold(cv2.absdiff(gray, previous), 25, 255, cv2.THRESH_BINARY)
+        changed = cv2.countNonZero(mask) / (self.size[0] * self.size[1])
+        return {"changed": round(changed, 3)} if changed >= self.threshold else None
+
+    def release(self) -> None:
+        camera, self._camera = self._camera, None
+        camera.stop()
+        self._set_frame_rate(self.full_frame_rate, camera)
+
+    def _set_frame_rate(self, rate: float, camera=None) -> None:
+        try:
+            (camera or self._camera).set_controls({"FrameRate": rate})
+        except Exception:
+            pass  # older Picamera2 builds; the camera just keeps its default rate
+
+
+class KnockSource:
+    """Fires once per completed knock group; the knock step checks the rhythm.
+
+    The step's GPIO input stays claimed while parked (edges cost nothing);
+    only the thread waiting for groups stops.
+    """
+
+    name = "knock"
+
+    def __init__(self, step) -> None:
+        self.step = step
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def arm(self, fire: Fire) -> None:
+        if self._thread is not None:
+            return
+        detector = self.step.listen()
+        detector.reset()
+        stop = self._stop = threading.Event()
+
+        def loop() -> None:
+            while not stop.is_set():
+                group = detector.wait_group(cancelled=stop.is_set)
+                if group is not None:
+                    # The gaps travel with the event so the run it starts
+                    # can check this group instead of asking for another.
+                    gaps = [round(gap, 3) for gap in group.intervals]
+                    fire(self.name, knocks=len(group.times), matched=group.matched, gaps=gaps)
+
+        self._thread = threading.Thread(target=loop, name="trigger-knock", daemon=True)
+        self._thread.start()
+
+    def park(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._stop.set()
+        self.step.detector().interrupt()
+        thread.join(timeout=2)
+
+
+class WakeWordSource:
+    """Runs the word detection step as a listener until it is parked."""
+
+    name = "wake_word"
+
+    def __init__(self, step) -> None:
+        self.step = step
+        self._context: PipelineContext | None = None
+        self._thread: threading.Thread | None = None
+
+    def arm(self, fire: Fire) -> None:
+        if self._thread is not None:
+            return
+        context = self._context = PipelineContext()
+
+        def listen() -> None:
+            while not context.cancelled:
+                try:
+                    heard = self.step.run(context)
+                except Exception as exc:
+                    print(f"Trigger '{self.name}' failed ({exc}); retrying.")
+                    context.cancel.wait(5)
+                    continue
+                if heard:
+                    fire(self.name)
+
+        self._thread = threading.Thread(target=listen, name="trigger-wake_word", daemon=True)
+        self._thread.start()
+
+    def park(self) -> None:
+        thread, self._thread = self._thread, None
+        if thread is None:
+            return
+        self._context.cancel.set()
+        thread.join(timeout=3)
+
+
+class TriggerHub:
+    """Arms the trigger sources and hands out debounced events.
+
+    The sources are parked (listener stopped, camera stopped, GPIO released)
+    while the pipeline runs and during the cooldown after it, so the steps
+    have the devices to themselves. ``notify`` is called after every
+    accepted event, for hosts that wait on something other than the hub.
+    """
+
+    def __init__(
+        self,
+        sources: List[object],
+        debounce: float = 2.0,
+        cooldown: float = 5.0,
+        notify: Callable[[], None] | None = None,
+    ) -> None:
+        self.sources = sources
+        self.debounce = debounce
+        self.cooldown = cooldown
+        self.notify = notify
+        self.errors: Dict[str, str] = {}
+        self.last: TriggerEvent | None = None
+        self._armed = False
+        self._accepted: Dict[str, float] = {}
+        self._events: queue.Queue[TriggerEvent] = queue.Queue()
+        self._lock = threading.Lock()
+
+    @property
+    def armed(self) -> bool:
+        return self._armed
+
+    def _fire(self, source: str, **detail: Any) -> None:
+        now = time.monotonic()
+        with self._lock:
+            if not self._armed:
+                result = "parked"
+            elif now - self._accepted.get(source, float("-inf")) < self.debounce:
+                result = "debounced"
+            else:
+                result = "accepted"
+                self._accepted[source] = now
+                self._events.put(TriggerEvent(source, time.time(), now, detail))
+        metrics.inc("cbord_triggers_total", source=source, result=result)
+        if result == "accepted" and self.notify is not None:
+            self.notify()
+
+    def arm(self) -> None:
+        if self._armed:
+            return
+        self.errors = {}
+        for source in self.sources:
+            try:
+                source.arm(self._fire)
+            except Exception as exc:
+                self.errors[source.name] = str(exc)
+                print(f"Could not arm trigger '{source.name}' ({exc}).")
+        with self._lock:
+            self._armed = True
+
+    def park(self) -> None:
+        with self._lock:
+            self._armed = False
+        for source in self.sources:
+            try:
+                source.park()
+            except Exception as exc:
+                print(f"Could not park trigger '{source.name}' ({exc}).")
+        # Whatever else fired alongside the event being served is stale now.
+        while self.take() is not None:
+            pass
+
+    def take(self) -> TriggerEvent | None:
+        try:
+            event = self._events.get_nowait()
+        except queue.Empty:
+            return None
+        self.last = event
+        return event
+
+    def wait(self, timeout: float | None = None) -> TriggerEvent | None:
+        """Arms the sources, blocks until an event, then parks them again."""
+        self.arm()
+        try:
+            event = self._events.get(timeout=timeout)
+        except queue.Empty:
+            return None
+        self.last = event
+        self.park()
+        return event
+
+    def status(self) -> dict[str, Any]:
+        last = self.last
+        return {
+            "sources": [source.name for source in self.sources],
+            "armed": self._armed,
+            "errors": dict(self.errors),
+            "last": {"source": last.source, "at": last.at, **last.detail} if last is not None else None,
+        }
+
+
+def build_sources(config: TriggerConfig, steps: Dict[str, object]) -> List[object]:
+    """Trigger sources for ``config``, sharing devices with the step instances."""
+    sources: List[object] = []
+    for name in config.sources:
+        if name == "knock":
+            sources.append(KnockSource(steps["knock"]))
+        elif name == "finger" and config.finger_pin is not None:
+            sources.append(EdgeSource("finger", config.finger_pin))
+        elif name == "finger":
+            sources.append(FingerTouchSource(steps["fingerprint"]))
+        elif name == "motion":
+            sources.append(MotionSource(steps["face_recognition"]))
+        elif name == "wake_word":
+            sources.append(WakeWordSource(steps["word_detection"]))
+    return sources
+
+
+def build_hub(
+    config: TriggerConfig, steps: Dict[str, object], notify: Callable[[], None] | None = None
+) -> TriggerHub | None:
+    if not config.sources:
+        return None
+    return TriggerHub(build_sources(config, steps), config.debounce, config.cooldown, notify)
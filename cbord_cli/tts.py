@@ -1,15 +1,31 @@
 from __future__ import annotations
 
+import argparse
+import atexit
+import hashlib
+import importlib
+import importlib.util
 import json
 import os
-import random
 import shutil
 import subprocess
 import tempfile
+import threading
+import time
+import wave
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from pathlib import Path
+from typing import Iterable, Iterator
+
+from cbord_cli import metrics, tracing
+from cbord_cli.audio_sink import AudioSink, close_sink, get_sink
+from cbord_cli.phrases import PhraseRotation
+from cbord_cli.speech_queue import PRIORITY_RESULT, PRIORITY_STEP, SpeechWorker
 
 MODEL_PATH = Path(__file__).resolve().parents[1] / "piper_work" / "en_US-joe-medium.onnx"
 STATE_FILE = Path(__file__).resolve().parent / ".tts_state.json"
+CACHE_DIR = Path(__file__).resolve().parent / ".tts_cache"
 
 FAILURE_PHRASES = [
     "Get the fuck out of my room.",
@@ -43,79 +59,347 @@ SUCCESS_PHRASES = [
     "Epsteen, here I come"
 ]
 
-_rng = random.SystemRandom()
+_rotation = PhraseRotation(STATE_FILE)
 
 
 def _tts_enabled() -> bool:
     return os.getenv("CBORD_TTS_ENABLED", "1") not in {"0", "false", "no"}
 
 
-def _load_state() -> dict[str, object]:
-    if not STATE_FILE.exists():
-        return {"failure_bag": [], "success_bag": [], "last": None}
+def _next_phrase(phrases: list[str], bag_key: str) -> str:
+    return _rotation.next(phrases, bag_key)
+
+
+@lru_cache(maxsize=4)
+def _file_digest(path: Path, size: int, mtime_ns: int) -> str:
+    digest = hashlib.sha256()
+    with path.open("rb") as fh:
+        for block in iter(lambda: fh.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def _model_digest() -> str:
+    stat = MODEL_PATH.stat()
+    return _file_digest(MODEL_PATH, stat.st_size, stat.st_mtime_ns)
+
+
+def cache_path(text: str) -> Path:
+    # Content-addressed: a different voice model or wording gets a new entry.
+    key = hashlib.sha256(f"{_model_digest()}\0{text}".encode("utf-8")).hexdigest()
+    return CACHE_DIR / f"{key}.wav"
+
+
+def render(text: str) -> Path:
+    target = cache_path(text)
+    if target.exists():
+        return target
+
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(suffix=".wav", dir=CACHE_DIR)
+    os.close(fd)
     try:
-        return json.loads(STATE_FILE.read_text())
-    except json.JSONDecodeError:
-        return {"failure_bag": [], "success_bag": [], "last": None}
+        subprocess.run(
+            ["piper", "--model", str(MODEL_PATH), "--output_file", tmp_name],
+            input=text,
+            text=True,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        os.replace(tmp_name, target)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+    return target
 
 
-def _save_state(state: dict[str, object]) -> None:
-    STATE_FILE.write_text(json.dumps(state))
+def known_phrases() -> list[str]:
+    phrases = [*FAILURE_PHRASES, *SUCCESS_PHRASES]
+    for step_phrases in STEP_SUCCESS_PHRASES.values():
+        phrases.extend(step_phrases)
+    return list(dict.fromkeys(phrases))
 
 
-def _next_phrase(phrases: list[str], bag_key: str) -> str:
-    state = _load_state()
-    bag = list(state.get(bag_key, []))
-    last = state.get("last")
+def warm_cache(workers: int = 4) -> int:
+    if shutil.which("piper") is None or not MODEL_PATH.exists():
+        print("TTS unavailable; cannot warm the phrase cache.")
+        return 0
 
-    if not bag:
-        bag = phrases.copy()
-        _rng.shuffle(bag)
-        if last and len(bag) > 1 and bag[0] == last:
-            bag[0], bag[1] = bag[1], bag[0]
+    phrases = known_phrases()
+    missing = [text for text in phrases if not cache_path(text).exists()]
+    print(f"{len(phrases) - len(missing)}/{len(phrases)} phrases already cached.")
+    if not missing:
+        return 0
 
-    phrase = bag.pop(0)
-    state[bag_key] = bag
-    state["last"] = phrase
-    _save_state(state)
-    return phrase
+    start = time.monotonic()
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for text, _path in zip(missing, pool.map(render, missing)):
+            print(f"  rendered: {text}")
+    print(f"Rendered {len(missing)} phrases in {time.monotonic() - start:.1f}s.")
+    return len(missing)
 
 
-def speak(text: str) -> None:
-    if not _tts_enabled():
+def _write_cache(text: str, sample_rate: int, pcm: bytes) -> None:
+    target = cache_path(text)
+    CACHE_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(suffix=".wav", dir=CACHE_DIR)
+    os.close(fd)
+    try:
+        with wave.open(tmp_name, "wb") as wf:
+            wf.setnchannels(1)
+            wf.setsampwidth(2)
+            wf.setframerate(sample_rate)
+            wf.writeframes(pcm)
+        os.replace(tmp_name, target)
+    finally:
+        if os.path.exists(tmp_name):
+            os.remove(tmp_name)
+
+
+def _model_sample_rate() -> int:
+    config_path = MODEL_PATH.with_name(MODEL_PATH.name + ".json")
+    try:
+        return int(json.loads(config_path.read_text())["audio"]["sample_rate"])
+    except (OSError, KeyError, TypeError, ValueError):
+        return 22050
+
+
+class PiperEngine:
+    """Keeps one Piper voice resident and streams its audio to the sound card.
+
+    Playback of the first sentence starts while later sentences are still
+    being synthesized. The voice is loaded on first use and kept for the
+    lifetime of the process.
+    """
+
+    def __init__(self, model_path: Path = MODEL_PATH) -> None:
+        self.model_path = model_path
+        self._voice = None
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def available() -> bool:
+        return importlib.util.find_spec("piper") is not None
+
+    def voice(self):
+        with self._lock:
+            if self._voice is None:
+                piper_voice = importlib.import_module("piper.voice")
+                self._voice = piper_voice.PiperVoice.load(str(self.model_path))
+            return self._voice
+
+    def speak(self, text: str, cache: bool = True, stop: threading.Event | None = None) -> float | None:
+        sink = get_sink()
+        if sink is None:
+            raise RuntimeError("no audio output")
+        voice = self.voice()
+        return _stream_to_sink(
+            sink, text, voice.config.sample_rate, voice.synthesize_stream_raw(text), cache, stop
+        )
+
+
+def _stream_to_sink(
+    sink: AudioSink,
+    text: str,
+    sample_rate: int,
+    chunks: Iterable[bytes],
+    cache: bool,
+    stop: threading.Event | None,
+) -> float | None:
+    """Plays PCM chunks as they arrive and returns the time to the first one."""
+    playback = sink.open_stream(sample_rate)
+    collected: list[bytes] = []
+    first_sample = None
+    start = time.perf_counter()
+    try:
+        for audio_bytes in chunks:
+            if stop is not None and stop.is_set():
+                playback.stop()
+                return first_sample
+            if first_sample is None:
+                first_sample = time.perf_counter() - start
+            playback.feed(audio_bytes)
+            collected.append(audio_bytes)
+    finally:
+        playback.close()
+
+    if cache and collected:
+        _write_cache(text, sample_rate, b"".join(collected))
+    playback.wait(stop)
+    return first_sample
+
+
+def _piper_raw_chunks(text: str, chunk_bytes: int = 4096) -> Iterator[bytes]:
+    proc = subprocess.Popen(
+        ["piper", "--model", str(MODEL_PATH), "--output_raw"],
+        stdin=subprocess.PIPE,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.DEVNULL,
+    )
+    assert proc.stdin is not None and proc.stdout is not None
+    proc.stdin.write(text.encode("utf-8"))
+    proc.stdin.close()
+    remainder = b""
+    try:
+        while True:
+            data = proc.stdout.read(chunk_bytes)
+            if not data:
+                break
+            data = remainder + data
+            # Keep whole int16 samples; a pipe read can split one.
+            cut = len(data) - (len(data) % 2)
+            remainder = data[cut:]
+            if cut:
+                yield data[:cut]
+    finally:
+        if proc.poll() is None:
+            proc.terminate()
+        proc.wait()
+    if proc.returncode != 0:
+        raise subprocess.CalledProcessError(proc.returncode, "piper")
+
+
+_engine: PiperEngine | None = None
+# Set after the resident engine fails once; speech then stays on the CLI path.
+_engine_failed = False
+
+
+def _engine_mode() -> str:
+    return os.getenv("CBORD_TTS_ENGINE", "auto").lower()
+
+
+def get_engine() -> PiperEngine | None:
+    global _engine
+    if _engine_failed or _engine_mode() == "subprocess" or not PiperEngine.available():
+        return None
+    if _engine is None:
+        _engine = PiperEngine()
+    return _engine
+
+
+def _play_file_aplay(wav_path: Path, stop: threading.Event | None) -> None:
+    proc = subprocess.Popen(["aplay", "-q", str(wav_path)])
+    if stop is None:
+        proc.wait()
         return
-    if shutil.which("piper") is None or shutil.which("aplay") is None:
+    try:
+        while proc.poll() is None:
+            if stop.wait(0.02):
+                proc.terminate()
+                break
+    finally:
+        try:
+            proc.wait(timeout=1)
+        except subprocess.TimeoutExpired:
+            proc.kill()
+
+
+def _speak_subprocess(text: str, stop: threading.Event | None = None) -> None:
+    wav_path = cache_path(text)
+    if not wav_path.exists() and shutil.which("piper") is None:
         print("TTS unavailable; skipping speech output.")
         return
+
+    sink = get_sink()
+    if sink is not None:
+        if wav_path.exists():
+            sink.play_wav(wav_path).wait(stop)
+        else:
+            _stream_to_sink(sink, text, _model_sample_rate(), _piper_raw_chunks(text), True, stop)
+        return
+
+    if shutil.which("aplay") is None:
+        print("TTS unavailable; skipping speech output.")
+        return
+    if not wav_path.exists():
+        wav_path = render(text)
+    if stop is None or not stop.is_set():
+        _play_file_aplay(wav_path, stop)
+
+
+def speak(text: str, stop: threading.Event | None = None) -> None:
+    """Speaks ``text`` on the calling thread; ``stop`` cuts playback short."""
+    with tracing.span("speak", "tts", text=text):
+        _speak(text, stop)
+
+
+def _speak(text: str, stop: threading.Event | None) -> None:
+    global _engine_failed
+    if not _tts_enabled():
+        return
     if not MODEL_PATH.exists():
         print(f"TTS model not found at {MODEL_PATH}; skipping speech output.")
         return
 
-    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    wav_path = tmp.name
-    tmp.close()
+    cached = cache_path(text).exists()
+    engine = get_engine() if not cached else None
+    if engine is not None:
+        try:
+            with metrics.timer("cbord_tts_speak_seconds", path="resident"):
+                engine.speak(text, stop=stop)
+            return
+        except Exception as exc:
+            _engine_failed = True
+            print(f"Resident TTS engine failed ({exc}); using the piper CLI from now on.")
+
+    with metrics.timer("cbord_tts_speak_seconds", path="cache" if cached else "subprocess"):
+        _speak_subprocess(text, stop)
+
+
+_worker: SpeechWorker | None = None
+_worker_lock = threading.Lock()
+
+
+def _speech_worker() -> SpeechWorker:
+    global _worker
+    with _worker_lock:
+        if _worker is None:
+            _worker = SpeechWorker(speak)
+            atexit.register(shutdown)
+        return _worker
+
+
+def say(
+    text: str,
+    priority: int = PRIORITY_STEP,
+    channel: str | None = None,
+    supersedes: tuple[str, ...] = (),
+) -> None:
+    """Queues ``text`` for the background speech worker and returns at once."""
+    if not _tts_enabled():
+        return
+    tracing.instant("speech queued", "tts", text=text, channel=channel)
+    _speech_worker().say(text, priority, channel, supersedes)
+
+
+def wait(timeout: float | None = None) -> bool:
+    return _worker.wait(timeout) if _worker is not None else True
 
-    try:
-        subprocess.run(
-            ["piper", "--model", str(MODEL_PATH), "--output_file", wav_path],
-            input=text,
-            text=True,
-            check=True,
-        )
-        subprocess.run(["aplay", "-q", wav_path], check=True)
-    finally:
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
+
+def flush() -> None:
+    if _worker is not None:
+        _worker.flush()
+
+
+def shutdown(timeout: float | None = 10.0) -> None:
+    global _worker
+    with _worker_lock:
+        worker, _worker = _worker, None
+    if worker is not None:
+        worker.close(timeout)
+    close_sink()
+    _rotation.flush()
 
 
 def speak_failure() -> None:
     phrase = _next_phrase(FAILURE_PHRASES, "failure_bag")
-    speak(phrase)
+    say(phrase, PRIORITY_RESULT, channel="result", supersedes=("step",))
 
 
 def speak_success() -> None:
     phrase = _next_phrase(SUCCESS_PHRASES, "success_bag")
-    speak(phrase)
+    say(phrase, PRIORITY_RESULT, channel="result", supersedes=("step",))
 
 
 def speak_step_success(step_name: str) -> None:
@@ -123,4 +407,81 @@ def speak_step_success(step_name: str) -> None:
     if not phrases:
         return
     phrase = _next_phrase(phrases, f"{step_name}_bag")
-    speak(phrase)
+    say(phrase, PRIORITY_STEP, channel="step")
+
+
+def _cmd_warm(args: argparse.Namespace) -> int:
+    warm_cache(args.workers)
+    return 0
+
+
+def _bench_subprocess(text: str) -> tuple[float, float]:
+    fd, wav_path = tempfile.mkstemp(suffix=".wav")
+    os.close(fd)
+    start = time.perf_counter()
+    try:
+        subprocess.run(
+            ["piper", "--model", str(MODEL_PATH), "--output_file", wav_path],
+            input=text,
+            text=True,
+            check=True,
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        # aplay starts emitting samples right after it is spawned.
+        first_sample = time.perf_counter() - start
+        subprocess.run(["aplay", "-q", wav_path], check=True)
+    finally:
+        os.remove(wav_path)
+    return first_sample, time.perf_counter() - start
+
+
+def _bench_resident(engine: PiperEngine, text: str) -> tuple[float, float]:
+    start = time.perf_counter()
+    first_sample = engine.speak(text, cache=False)
+    return first_sample or 0.0, time.perf_counter() - start
+
+
+def _cmd_bench(args: argparse.Namespace) -> int:
+    if not MODEL_PATH.exists():
+        print(f"TTS model not found at {MODEL_PATH}.")
+        return 1
+
+    results: dict[str, list[tuple[float, float]]] = {}
+    if shutil.which("piper") is not None and shutil.which("aplay") is not None:
+        results["piper + aplay"] = [_bench_subprocess(args.text) for _ in range(args.runs)]
+    if PiperEngine.available():
+        engine = PiperEngine()
+        load_start = time.perf_counter()
+        engine.voice()
+        print(f"Resident voice loaded in {time.perf_counter() - load_start:.2f}s (once per process).")
+        results["resident stream"] = [_bench_resident(engine, args.text) for _ in range(args.runs)]
+    if not results:
+        print("Neither the piper CLI nor the piper module is available.")
+        return 1
+
+    print(f"{'engine':<16}  {'first sample':>12}  {'wall time':>10}")
+    for name, runs in results.items():
+        first = sum(r[0] for r in runs) / len(runs)
+        wall = sum(r[1] for r in runs) / len(runs)
+        print(f"{name:<16}  {first * 1000:>9.0f} ms  {wall * 1000:>7.0f} ms")
+    return 0
+
+
+def _at_least_one(value: str) -> int:
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def add_subcommand(subparsers) -> None:
+    parser = subparsers.add_parser("tts", help="Text-to-speech utilities.")
+    actions = parser.add_subparsers(dest="tts_action", required=True)
+    warm = actions.add_parser("warm", help="Pre-render every known phrase into the audio cache.")
+    warm.add_argument("--workers", type=_at_least_one, default=os.cpu_count() or 4)
+    warm.set_defaults(handler=_cmd_warm)
+    bench = actions.add_parser("bench", help="Compare the resident engine with the piper CLI.")
+    bench.add_argument("--text", default="Fingerprint matched. Speed it up. Face recognized. Almost there.")
+    bench.add_argument("--runs", type=_at_least_one, default=3)
+    bench.set_defaults(handler=_cmd_bench)
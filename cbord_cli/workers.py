@@ -0,0 +1,315 @@
+from __future__ import annotations
+
+import atexit
+import copy
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+import time
+import weakref
+from multiprocessing.connection import wait as wait_any
+from typing import Any
+
+from cbord_cli import metrics
+from cbord_cli.steps.base import PipelineContext
+
+# Workers are spawned rather than forked: the parent runs speech, actuator
+# and socket threads whose locks a forked child would inherit mid-use.
+_mp = multiprocessing.get_context("spawn")
+
+# A worker that ran this long before dying is restarted at once; quicker
+# deaths back off up to MAX_BACKOFF so a broken device does not spin.
+STABLE_SECONDS = 60.0
+MAX_BACKOFF = 30.0
+# How long a run waits for a restarting worker to be ready before failing
+# the attempt as unavailable.
+READY_TIMEOUT = 30.0
+
+_live: "weakref.WeakSet[WorkerStep]" = weakref.WeakSet()
+
+
+@atexit.register
+def _shutdown() -> None:
+    # Runs before multiprocessing reaps daemon children, so supervisors do
+    # not mistake the interpreter's exit for a crash.
+    for worker in list(_live):
+        worker.close()
+
+
+def worker_names(config) -> list[str]:
+    """Enabled steps that ``config`` runs in worker processes."""
+    return [step.name for step in config.steps if step.enabled and step.worker]
+
+
+def _exited(proc) -> bool:
+    # The sentinel becomes readable at exit; unlike is_alive() it does not
+    # reap the child, which the supervisor's join() does.
+    return bool(wait_any([proc.sentinel], timeout=0))
+
+
+def _worker_main(conn, name: str, kwargs: dict[str, Any], cpus: list[int] | None) -> None:
+    """Entry point of a worker process: builds, warms and serves one step."""
+    signal.signal(signal.SIGINT, signal.SIG_IGN)  # the parent shuts workers down
+    if cpus and hasattr(os, "sched_setaffinity"):
+        os.sched_setaffinity(0, cpus)
+
+    from cbord_cli.runner import STEP_TYPES
+
+    step = STEP_TYPES[name](**kwargs)
+    error = None
+    warm = getattr(step, "warm", None)
+    if warm is not None:
+        try:
+            warm()
+        except Exception as exc:
+            error = str(exc)
+    conn.send(("ready", error))
+
+    requests: queue.Queue[tuple] = queue.Queue()
+    current: list[PipelineContext] = []
+
+    def read() -> None:
+        # Runs beside the step so a cancel reaches it mid-run.
+        while True:
+            try:
+                message = conn.recv()
+            except (EOFError, OSError):
+                requests.put(("stop",))
+                return
+            if message[0] == "cancel":
+                if current:
+                    current[0].cancel.set()
+            else:
+                requests.put(message)
+
+    threading.Thread(target=read, name="worker-pipe", daemon=True).start()
+    try:
+        while True:
+            message = requests.get()
+            if message[0] == "stop":
+                break
+            snapshot = message[1]
+            context = PipelineContext(outputs=snapshot["outputs"], identity=snapshot["identity"])
+            current[:] = [context]
+            try:
+                passed = bool(step.run(context))
+                reply = ("result", passed, context.identity, context.outputs.get(name, {}), None)
+            except Exception as exc:
+                reply = ("result", False, None, {}, f"{type(exc).__name__}: {exc}")
+            conn.send(reply)
+    finally:
+        close = getattr(step, "close", None)
+        if close is not None:
+            close()
+
+
+class WorkerStep:
+    """Stands in for a step that runs in its own long-lived process.
+
+    The worker builds the step from ``kwargs``, warms it once and then
+    serves runs over a pipe; only the context snapshot and the step's
+    result cross it, so models and frames stay in the worker. A supervisor
+    thread blocks on the process sentinel and starts a fresh, warming
+    worker after one dies; runs in the meantime wait for it, up to
+    ``ready_timeout`` seconds.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        kwargs: dict[str, Any],
+        cpus: list[int] | None = None,
+        factor: bool = True,
+        ready_timeout: float = READY_TIMEOUT,
+    ) -> None:
+        self.name = name
+        self.kwargs = kwargs
+        self.cpus = cpus
+        self.factor = factor
+        self.ready_timeout = ready_timeout
+        self.restarts = 0
+        self._proc = None
+        self._conn = None
+        self._ready = False
+        self._closing = threading.Event()
+        self._supervisor: threading.Thread | None = None
+        self._lock = threading.Lock()  # guards the current process and pipe
+        self._respawned = threading.Condition(self._lock)
+        self._use = threading.Lock()  # one warm or run at a time
+
+    def _spawn(self) -> None:
+        parent, child = _mp.Pipe()
+        proc = _mp.Process(
+            target=_worker_main, args=(child, self.name, self.kwargs, self.cpus), name=f"step-{self.name}", daemon=True
+        )
+        proc.start()
+        child.close()
+        self._proc, self._conn, self._ready = proc, parent, False
+        self._respawned.notify_all()
+
+    def start(self) -> None:
+        """Starts the worker without waiting for it to warm."""
+        self._start()
+
+    def _start(self, context=None, deadline: float | None = None) -> tuple | None:
+        """The live worker's process and pipe, starting it on first use.
+
+        While the supervisor is replacing a dead worker this waits for the
+        new one; None if ``deadline`` passes, ``context`` is cancelled or
+        the step is closing.
+        """
+        with self._lock:
+            if self._supervisor is None and not self._closing.is_set():
+                self._spawn()
+                _live.add(self)
+                self._supervisor = threading.Thread(target=self._supervise, name=f"supervise-{self.name}", daemon=True)
+                self._supervisor.start()
+            while self._proc is None or _exited(self._proc):
+                if self._closing.is_set() or (context is not None and context.cancelled):
+                    return None
+                left = 0.1 if deadline is None else min(0.1, deadline - time.monotonic())
+                if left <= 0:
+                    return None
+                self._respawned.wait(left)
+            return self._proc, self._conn
+
+    def _supervise(self) -> None:
+        failures = 0
+        while not self._closing.is_set():
+            with self._lock:
+                proc = self._proc
+            started = time.monotonic()
+            proc.join()
+            if self._closing.is_set():
+                return
+            with self._lock:
+                # Runs now wait for the replacement instead of using this one.
+                self._proc = self._conn = None
+                self._ready = False
+            failures = 0 if time.monotonic() - started >= STABLE_SECONDS else failures + 1
+            delay = 0.0 if failures <= 1 else min(MAX_BACKOFF, 2.0 ** (failures - 1))
+            print(f"Worker for {self.name} exited (code {proc.exitcode}); restarting in {delay:.0f}s.")
+            metrics.inc("cbord_worker_restarts_total", step=self.name)
+            if self._closing.wait(delay):
+                return
+            with self._lock:
+                if self._closing.is_set():
+                    return
+                self.restarts += 1
+                self._spawn()
+
+    def _receive(self, proc, conn, context, cancellable: bool, deadline: float | None = None):
+        """Next message from the worker; None if it died, or the wait was cancelled or timed out."""
+        sent_cancel = False
+        while True:
+            ready = wait_any([conn, proc.sentinel], timeout=0.1)
+            if conn in ready:
+                try:
+                    return conn.recv()
+                except (EOFError, OSError):
+                    return None
+            if proc.sentinel in ready:
+                return None
+            if deadline is not None and time.monotonic() >= deadline:
+                return None
+            if context is not None and context.cancelled:
+                if not cancellable:
+                    return None
+                if not sent_cancel:
+                    conn.send(("cancel",))
+                    sent_cancel = True
+
+    def _wait_ready(self, proc, conn, context, deadline: float | None = None) -> bool:
+        if self._ready:
+            return True
+        message = self._receive(proc, conn, context, cancellable=False, deadline=deadline)
+        if message is None:
+            return False
+        with self._lock:
+            if self._proc is proc:
+                self._ready = True
+        if message[1] is not None:
+            print(f"Worker for {self.name} could not warm ({message[1]}).")
+        return True
+
+    def warm(self) -> None:
+        """Starts the worker and waits until it has built and warmed its step."""
+        with self._use:
+            started = self._start()
+            if started is None:
+                raise RuntimeError("worker is closed")
+            proc, conn = started
+            if not self._wait_ready(proc, conn, None):
+                proc.join(timeout=1)
+                raise RuntimeError(f"worker exited with code {proc.exitcode}")
+
+    def run(self, context: PipelineContext | None = None) -> bool:
+        deadline = time.monotonic() + self.ready_timeout
+        reply = None
+        problem = None
+        with self._use:
+            started = self._start(context, deadline)
+            if started is None:
+                problem = "is unavailable while it restarts"
+            else:
+                proc, conn = started
+                snapshot = {
+                    "identity": context.identity if context is not None else None,
+                    "outputs": copy.deepcopy(context.outputs) if context is not None else {},
+                }
+                try:
+                    if not self._wait_ready(proc, conn, context, deadline):
+                        problem = "died while warming" if _exited(proc) else "is unavailable while it warms"
+                    else:
+                        conn.send(("run", snapshot))
+                        reply = self._receive(proc, conn, context, cancellable=True)
+                        if reply is None:
+                            problem = "died mid-run"
+                except (BrokenPipeError, EOFError, OSError):
+                    problem = "died mid-run"
+        if reply is None:
+            if context is None or not context.cancelled:
+                print(f"Worker for {self.name} {problem}.")
+                if problem.startswith("is unavailable"):
+                    metrics.inc("cbord_worker_unavailable_total", step=self.name)
+            return False
+
+        _, passed, identity, values, error = reply
+        if error is not None:
+            raise RuntimeError(f"{self.name} worker: {error}")
+        if context is not None:
+            if values:
+                context.record(self.name, **values)
+            if identity is not None and context.identity is None:
+                context.identity = identity
+        return passed
+
+    def close(self) -> None:
+        _live.discard(self)
+        with self._lock:
+            self._closing.set()
+            self._respawned.notify_all()
+            proc, conn = self._proc, self._conn
+        if proc is not None:
+            try:
+                conn.send(("stop",))
+            except (BrokenPipeError, OSError):
+                pass
+            proc.join(timeout=5)
+            if proc.is_alive():
+                proc.terminate()
+                proc.join(timeout=2)
+            conn.close()
+        if self._supervisor is not None:
+            self._supervisor.join(timeout=2)
+
+    def status(self) -> dict[str, Any]:
+        proc = self._proc
+        return {
+            "pid": proc.pid if proc is not None else None,
+            "alive": proc is not None and not _exited(proc),
+            "restarts": self.restarts,
+            "cpus": self.cpus,
+        }
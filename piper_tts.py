@@ -1,11 +1,22 @@
 #!/usr/bin/env python3
 import argparse
+import json
+import os
 import sys
+import time
 import wave
+from concurrent.futures import ProcessPoolExecutor, as_completed
 from pathlib import Path
 
 from piper.voice import PiperVoice
 
+MODEL_PATH = Path(__file__).resolve().parent / "piper_work" / "en_US-joe-medium.onnx"
+# Written next to the WAVs by run_batch, so no job may use it as an output.
+MANIFEST_NAME = "manifest.json"
+
+# Loaded once per batch worker process by _init_worker.
+_worker_voice = None
+
 
 def read_text(cli_text: str) -> str:
     if cli_text:
@@ -16,6 +27,153 @@ def read_text(cli_text: str) -> str:
     return sys.stdin.read().strip()
 
 
+def synthesize_to_wav(voice: PiperVoice, text: str, output_path: Path) -> None:
+    with wave.open(str(output_path), "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)  # int16
+        wf.setframerate(voice.config.sample_rate)
+        voice.synthesize(text, wf)
+
+
+def _read_jobs_file(path: Path, problems: list[str]) -> list[tuple[str, str, str]]:
+    """Returns (text, output name, origin) from a .jsonl or plain text file.
+
+    Bad records are reported in ``problems`` as "file:line: reason" and skipped.
+    """
+    jobs = []
+    lines = path.read_text().splitlines()
+    if path.suffix == ".jsonl":
+        for lineno, line in enumerate(lines, start=1):
+            if not line.strip():
+                continue
+            origin = f"{path}:{lineno}"
+            try:
+                record = json.loads(line)
+            except ValueError as exc:
+                problems.append(f"{origin}: not valid JSON ({exc})")
+                continue
+            if not isinstance(record, dict):
+                problems.append(f"{origin}: expected an object with \"text\"")
+                continue
+            text = record.get("text")
+            if not isinstance(text, str) or not text.strip():
+                problems.append(f"{origin}: missing or empty \"text\"")
+                continue
+            name = record.get("output") or f"{path.stem}_{lineno:04d}.wav"
+            if not isinstance(name, str) or Path(name).name != name:
+                problems.append(f"{origin}: \"output\" must be a plain file name")
+                continue
+            if Path(name).suffix.lower() != ".wav":
+                problems.append(f"{origin}: \"output\" must end in .wav, not {name}")
+                continue
+            jobs.append((text.strip(), name, origin))
+    else:
+        for lineno, line in enumerate(lines, start=1):
+            if line.strip():
+                jobs.append((line.strip(), f"{path.stem}_{lineno:04d}.wav", f"{path}:{lineno}"))
+    return jobs
+
+
+def collect_jobs(source: Path) -> list[tuple[str, str]]:
+    """(text, output name) pairs from a file or directory of .txt/.jsonl files.
+
+    Raises ValueError listing every bad record and every output name used
+    twice or reserved for the manifest, since the later write would silently
+    overwrite the earlier one.
+    """
+    if source.is_dir():
+        files = sorted(p for p in source.iterdir() if p.suffix in {".txt", ".jsonl"})
+    else:
+        files = [source]
+    problems: list[str] = []
+    jobs = []
+    for path in files:
+        jobs.extend(_read_jobs_file(path, problems))
+    first_use: dict[str, str] = {}
+    for _, name, origin in jobs:
+        if name == MANIFEST_NAME:
+            problems.append(f"{origin}: output {name} is reserved for the batch manifest")
+        elif name in first_use:
+            problems.append(f"{origin}: output {name} is already used by {first_use[name]}")
+        else:
+            first_use[name] = origin
+    if problems:
+        raise ValueError("\n".join(problems))
+    return [(text, name) for text, name, _ in jobs]
+
+
+def _init_worker(model_path: str) -> None:
+    global _worker_voice
+    _worker_voice = PiperVoice.load(model_path)
+
+
+def _synthesize_job(text: str, output_path: str) -> dict:
+    start = time.perf_counter()
+    synthesize_to_wav(_worker_voice, text, Path(output_path))
+    synth_seconds = time.perf_counter() - start
+    with wave.open(output_path, "rb") as wf:
+        duration = wf.getnframes() / float(wf.getframerate())
+    return {
+        "output": Path(output_path).name,
+        "text": text,
+        "duration_s": round(duration, 3),
+        "synth_s": round(synth_seconds, 3),
+        "rtf": round(synth_seconds / duration, 3) if duration else None,
+    }
+
+
+def run_batch(source: Path, out_dir: Path, jobs: int, model_path: Path) -> int:
+    try:
+        work = collect_jobs(source)
+    except ValueError as exc:
+        print(f"Not starting the batch; fix these first:\n{exc}", file=sys.stderr)
+        return 1
+    if not work:
+        print(f"No text found in {source}", file=sys.stderr)
+        return 1
+
+    out_dir.mkdir(parents=True, exist_ok=True)
+    jobs = max(1, min(jobs, len(work)))
+    print(f"Synthesizing {len(work)} utterances with {jobs} workers...")
+
+    start = time.perf_counter()
+    results = []
+    failures = 0
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(str(model_path),)) as pool:
+        futures = {
+            pool.submit(_synthesize_job, text, str(out_dir / name)): name for text, name in work
+        }
+        for done, future in enumerate(as_completed(futures), start=1):
+            name = futures[future]
+            try:
+                result = future.result()
+            except Exception as exc:
+                failures += 1
+                print(f"  [{done}/{len(work)}] {name}: failed ({exc})", file=sys.stderr)
+                continue
+            results.append(result)
+            print(f"  [{done}/{len(work)}] {name}  {result['duration_s']:.2f}s audio  RTF {result['rtf']}")
+    wall = time.perf_counter() - start
+
+    results.sort(key=lambda r: r["output"])
+    audio_seconds = sum(r["duration_s"] for r in results)
+    manifest = {
+        "model": str(model_path),
+        "workers": jobs,
+        "wall_s": round(wall, 3),
+        "audio_s": round(audio_seconds, 3),
+        "rtf": round(wall / audio_seconds, 3) if audio_seconds else None,
+        "items": results,
+    }
+    manifest_path = out_dir / MANIFEST_NAME
+    manifest_path.write_text(json.dumps(manifest, indent=2) + "\n")
+    print(
+        f"Wrote {len(results)} files and {manifest_path} in {wall:.1f}s "
+        f"({audio_seconds:.1f}s of audio, overall RTF {manifest['rtf']})."
+    )
+    return 1 if failures else 0
+
+
 def main() -> int:
     parser = argparse.ArgumentParser(
         description="Text-to-speech using the local Piper voice model."
@@ -32,26 +190,43 @@ def main() -> int:
         help="Output WAV file path.",
         default="piper_tts.wav",
     )
+    parser.add_argument(
+        "-b",
+        "--batch",
+        help="File or directory of texts (one utterance per line, or .jsonl with "
+        "'text' and optional 'output' keys) to synthesize in bulk.",
+        default="",
+    )
+    parser.add_argument(
+        "--out-dir",
+        help="Output directory for batch mode.",
+        default="piper_tts_out",
+    )
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        help="Worker processes for batch mode (each loads the voice once).",
+        type=int,
+        default=os.cpu_count() or 1,
+    )
     args = parser.parse_args()
 
+    model_path = MODEL_PATH
+    if not model_path.exists():
+        print(f"Model not found at {model_path}", file=sys.stderr)
+        return 1
+
+    if args.batch:
+        return run_batch(Path(args.batch).expanduser(), Path(args.out_dir).expanduser(), args.jobs, model_path)
+
     text = read_text(args.text)
     if not text:
         print("No text provided.", file=sys.stderr)
         return 1
 
-    model_path = Path(__file__).resolve().parent / "piper_work" / "en_US-joe-medium.onnx"
-    if not model_path.exists():
-        print(f"Model not found at {model_path}", file=sys.stderr)
-        return 1
-
     voice = PiperVoice.load(str(model_path))
     output_path = Path(args.output).expanduser()
-
-    with wave.open(str(output_path), "wb") as wf:
-        wf.setnchannels(1)
-        wf.setsampwidth(2)  # int16
-        wf.setframerate(voice.config.sample_rate)
-        voice.synthesize(text, wf)
+    synthesize_to_wav(voice, text, output_path)
 
     print(f"Wrote {output_path}")
     return 0
@@ -1,25 +1,10 @@
-import subprocess
-import tempfile
-import os
+import sys
+from pathlib import Path
 
-MODEL = "en_US-joe-medium.onnx"
+sys.path.append(str(Path(__file__).resolve().parent.parent))
 
-def speak(text: str):
-    tmp = tempfile.NamedTemporaryFile(suffix=".wav", delete=False)
-    wav_path = tmp.name
-    tmp.close()
-
-    try:
-        subprocess.run(
-            ["piper", "--model", MODEL, "--output_file", wav_path],
-            input=text,
-            text=True,
-            check=True
-        )
-        subprocess.run(["aplay", "-q", wav_path], check=True)
-    finally:
-        if os.path.exists(wav_path):
-            os.remove(wav_path)
+# Plays through the shared, persistent audio sink (no per-line aplay or temp WAV).
+from cbord_cli.tts import speak
 
 print("Type something and press Enter. Type 'q' to quit.")
 while True: